@@ -0,0 +1,222 @@
+import json
+import time
+from urllib.parse import urlencode
+
+import pytest
+from fastapi.testclient import TestClient
+
+import web_app
+import web_auth
+
+CLIENT_PAYLOAD = {'name': 'Анна', 'link': '@bench', 'time': '11:00', 'date': '10.03.2025', 'prepayment': 0}
+BOT_TOKEN = '123456:bench'
+USER_ID = 424966792
+
+
+def make_init_data(user_id: int = USER_ID, token: str = BOT_TOKEN) -> str:
+    fields = {'auth_date': str(int(time.time())), 'user': json.dumps({'id': user_id, 'first_name': 'Bench'})}
+    return urlencode(dict(fields, hash=web_auth.sign_init_data(fields, token)))
+
+
+@pytest.fixture
+def api(bench_db, monkeypatch):
+    monkeypatch.setattr(web_auth, 'bot_token', BOT_TOKEN)
+    with TestClient(web_app.app, headers={'Authorization': f'tma {make_init_data()}'}) as client:
+        yield client
+
+
+def _ok(response):
+    assert response.status_code < 400, response.text
+    return response
+
+
+def bench_api_root(benchmark, api):
+    benchmark(lambda: _ok(api.get('/')))
+
+
+def bench_api_root_revalidate(benchmark, api):
+    # Повторное открытие мини-приложения: index.html по ETag, ассеты берутся из кеша браузера
+    etag = _ok(api.get('/')).headers['etag']
+    benchmark(lambda: api.get('/', headers={'If-None-Match': etag}))
+
+
+def bench_api_hashed_asset(benchmark, api):
+    path = '/assets/' + web_app.assets.hashed_names['app.js']
+    benchmark(lambda: _ok(api.get(path)))
+
+
+def bench_verify_init_data(benchmark):
+    init_data = make_init_data()
+    assert benchmark(web_auth.verify_init_data, init_data, BOT_TOKEN)['id'] == USER_ID
+
+
+def bench_api_unauthorized(benchmark, api):
+    # Неверная подпись отклоняется зависимостью до обращения к базе
+    headers = {'Authorization': f'tma {make_init_data(token="0:other")}'}
+    params = {'start': '2025-03-01', 'end': '2025-03-31'}
+    assert benchmark(lambda: api.get('/api/clients', params=params, headers=headers).status_code) == 401
+
+
+def bench_api_health(benchmark, api):
+    benchmark(lambda: _ok(api.get('/api/health')))
+
+
+def bench_api_clients_range(benchmark, api, fetch):
+    clients = benchmark(lambda: _ok(api.get('/api/clients', params={'start': '2025-03-01', 'end': '2025-03-31'}))).json()
+    expected = fetch("SELECT id FROM clients WHERE tenant_id = 1 AND day_rec BETWEEN '2025-03-01' AND '2025-03-31'")
+    assert sorted(client['id'] for client in clients) == sorted(row[0] for row in expected)
+
+
+def bench_api_clients_range_all(benchmark, api):
+    # Весь период синтетической базы, ответ сжимается gzip (TestClient шлет Accept-Encoding: gzip)
+    params = {'start': '2024-01-01', 'end': '2026-12-31'}
+    benchmark(lambda: _ok(api.get('/api/clients', params=params)))
+
+
+def bench_api_clients_range_all_identity(benchmark, api):
+    params = {'start': '2024-01-01', 'end': '2026-12-31'}
+    headers = {'Accept-Encoding': 'identity'}
+    benchmark(lambda: _ok(api.get('/api/clients', params=params, headers=headers)))
+
+
+def bench_api_clients_delta_full(benchmark, api, fetch):
+    delta = benchmark(lambda: _ok(api.get('/api/clients/delta'))).json()
+    assert delta['full'] and len(delta['clients']) == fetch('SELECT COUNT(*) FROM clients WHERE tenant_id = 1')[0][0]
+
+
+def bench_api_clients_delta_incremental(benchmark, api):
+    # Повторная синхронизация зеркала: одна новая запись после курсора
+    cursor = _ok(api.get('/api/clients/delta')).json()['cursor']
+    _ok(api.post('/api/clients', json=CLIENT_PAYLOAD))
+    params = {'updated_since': cursor}
+    delta = benchmark(lambda: _ok(api.get('/api/clients/delta', params=params))).json()
+    assert not delta['full'] and [client['link'] for client in delta['clients']] == ['@bench']
+
+
+def bench_api_changes_stream(benchmark, api):
+    # Полная выгрузка журнала: по записи на каждую строку синтетических таблиц
+    benchmark(lambda: _ok(api.get('/api/changes', params={'since': '0.0'})))
+
+
+def bench_api_clients_day(benchmark, api, fetch):
+    clients = benchmark(lambda: _ok(api.get('/api/clients/day', params={'date_iso': '2025-03-10'}))).json()
+    expected = fetch("SELECT id FROM clients WHERE tenant_id = 1 AND day_rec = '2025-03-10'")
+    assert sorted(client['id'] for client in clients) == sorted(row[0] for row in expected)
+
+
+def bench_api_clients_search(benchmark, api):
+    assert benchmark(lambda: _ok(api.get('/api/clients/search', params={'q': 'client1'})).json())
+
+
+def bench_api_marked_days(benchmark, api, fetch):
+    days = benchmark(lambda: _ok(api.get('/api/clients/marked-days', params={'year': 2025, 'month': 3}))).json()['days']
+    expected = fetch("SELECT DISTINCT CAST(substr(day_rec, 9) AS INTEGER) FROM clients WHERE tenant_id = 1 AND day_rec LIKE '2025-03-%'")
+    assert days == sorted(day for (day,) in expected)
+
+
+def bench_api_dashboard(benchmark, api):
+    params = {'year': 2025, 'month': 3, 'date': '2025-03-10'}
+    benchmark(lambda: _ok(api.get('/api/dashboard', params=params)))
+
+
+def bench_api_first_load_separate_calls(benchmark, api):
+    # Прежняя загрузка мини-приложения отдельными запросами, для сравнения с дашбордом
+    def first_load():
+        _ok(api.get('/api/clients/day', params={'date_iso': '2025-03-10'}))
+        _ok(api.get('/api/clients/marked-days', params={'year': 2025, 'month': 3}))
+        _ok(api.get('/api/schedule/selected', params={'year': 2025, 'month': 3}))
+        _ok(api.get('/api/schedule/slots'))
+        _ok(api.get('/api/salary', params={'month': '2025-03'}))
+        _ok(api.get('/api/expenses', params={'month': '2025-03'}))
+        _ok(api.get('/api/visits/top', params={'limit': 10}))
+
+    benchmark(first_load)
+
+
+def bench_api_create_client(benchmark, api):
+    benchmark(lambda: _ok(api.post('/api/clients', json=CLIENT_PAYLOAD)))
+
+
+def bench_api_update_client(benchmark, api):
+    benchmark(lambda: _ok(api.put('/api/clients/1', json=CLIENT_PAYLOAD)))
+
+
+def bench_api_delete_client_by_link(benchmark, api):
+    def create_and_delete():
+        _ok(api.post('/api/clients', json=CLIENT_PAYLOAD))
+        _ok(api.delete('/api/clients/by-link', params={'link': '@bench'}))
+
+    benchmark(create_and_delete)
+
+
+def bench_api_delete_client_by_id(benchmark, api):
+    def create_and_delete():
+        _ok(api.post('/api/clients', json=CLIENT_PAYLOAD))
+        client_id = api.get('/api/clients/day', params={'date_iso': '2025-03-10'}).json()[-1]['id']
+        _ok(api.delete(f'/api/clients/{client_id}'))
+
+    benchmark(create_and_delete)
+
+
+def bench_api_salary_total(benchmark, api, fetch):
+    data = benchmark(lambda: _ok(api.get('/api/salary', params={'month': '2025-03'}))).json()
+    assert data['total'] == fetch("SELECT SUM(amount) FROM salary WHERE tenant_id = 1 AND date = '2025-03'")[0][0]
+
+
+def bench_api_salary_add_and_remove(benchmark, api):
+    def add_and_remove():
+        _ok(api.post('/api/salary', json={'amount': 1000, 'month': '2025-03'}))
+        _ok(api.delete('/api/salary/last', params={'month': '2025-03'}))
+
+    benchmark(add_and_remove)
+
+
+def bench_api_expenses_total(benchmark, api):
+    benchmark(lambda: _ok(api.get('/api/expenses', params={'month': '2025-03'})))
+
+
+def bench_api_expenses_add_and_remove(benchmark, api):
+    def add_and_remove():
+        _ok(api.post('/api/expenses', json={'amount': 1000, 'month': '2025-03'}))
+        _ok(api.delete('/api/expenses/last', params={'month': '2025-03'}))
+
+    benchmark(add_and_remove)
+
+
+def bench_api_visits_count(benchmark, api, fetch):
+    data = benchmark(lambda: _ok(api.get('/api/visits', params={'link': '@client1'}))).json()
+    links = ('@client1', 'https://t.me/client1', 'client1')
+    assert data['count'] == fetch('SELECT COUNT(*) FROM clients WHERE tenant_id = 1 AND link IN (?, ?, ?)', *links)[0][0]
+
+
+def bench_api_visits_top(benchmark, api):
+    assert len(benchmark(lambda: _ok(api.get('/api/visits/top', params={'limit': 10}))).json()['items']) == 10
+
+
+def bench_api_schedule_selected(benchmark, api):
+    benchmark(lambda: _ok(api.get('/api/schedule/selected', params={'year': 2025, 'month': 3})))
+
+
+def bench_api_schedule_toggle(benchmark, api):
+    benchmark(lambda: _ok(api.post('/api/schedule/toggle', json={'year': 2025, 'month': 3, 'day': 10})))
+
+
+def bench_api_schedule_weekdays(benchmark, api):
+    def select_and_clear():
+        _ok(api.post('/api/schedule/weekdays', json={'year': 2025, 'month': 3}))
+        _ok(api.post('/api/schedule/clear', json={'year': 2025, 'month': 3}))
+
+    benchmark(select_and_clear)
+
+
+def bench_api_schedule_generate(benchmark, api):
+    benchmark(lambda: _ok(api.post('/api/schedule/generate', params={'year': 2025, 'month': 3})))
+
+
+def bench_api_schedule_slots(benchmark, api):
+    def update_and_read():
+        _ok(api.post('/api/schedule/slots', json={'slots': {'0': '11:00, 14:00'}}))
+        _ok(api.get('/api/schedule/slots'))
+        _ok(api.post('/api/schedule/slots/reset'))
+
+    benchmark(update_and_read)
@@ -0,0 +1,180 @@
+import itertools
+from datetime import date
+
+from database import database, db_expenses, delete_client, request_for_date, schedule_db
+
+MONTH = '2025-03'
+TENANT = 1
+# Ссылка в наборе datagen пишется тремя способами, все они — один клиент
+CLIENT1 = ('@client1', 'https://t.me/client1', 'client1')
+
+
+def _ids(rows):
+    return sorted(row[0] for row in rows)
+
+
+def bench_save_client(benchmark, bench_db, fetch):
+    client_id = benchmark(database.save_client, TENANT, 'Анна', '@bench', '11:00', '2025-03-10', 0)
+    assert fetch('SELECT tenant_id, name, link, time, day_rec, prepayment FROM clients WHERE id = ?', client_id) == [
+        (TENANT, 'Анна', '@bench', '11:00', '2025-03-10', 0.0)
+    ]
+
+
+def bench_update_client_by_id(benchmark, bench_db, fetch):
+    assert benchmark(database.update_client_by_id, TENANT, 1, 'Анна', '@bench', '12:00', '2025-03-10', 1)
+    assert fetch('SELECT name, link, time, day_rec, prepayment FROM clients WHERE id = 1') == [
+        ('Анна', '@bench', '12:00', '2025-03-10', 1.0)
+    ]
+
+
+def bench_delete_client_by_id(benchmark, bench_db, fetch):
+    ids = itertools.count(1)
+    benchmark(lambda: database.delete_client_by_id(TENANT, next(ids)))
+    assert fetch('SELECT id FROM clients WHERE id = 1') == []
+
+
+def bench_delete_client_by_link(benchmark, bench_db, fetch):
+    before = fetch('SELECT COUNT(*) FROM clients')
+    assert not benchmark(delete_client.delete_client, TENANT, '@missing')
+    assert fetch('SELECT COUNT(*) FROM clients') == before
+
+
+def bench_add_salary(benchmark, bench_db, fetch):
+    benchmark(database.add_salary_to_db, TENANT, 1000, MONTH)
+    assert fetch('SELECT tenant_id, amount, date FROM salary ORDER BY id DESC LIMIT 1') == [(TENANT, 1000, MONTH)]
+
+
+def bench_total_salary_for_month(benchmark, bench_db, fetch):
+    expected = fetch('SELECT SUM(amount) FROM salary WHERE tenant_id = ? AND date = ?', TENANT, MONTH)[0][0]
+    assert expected
+    assert benchmark(database.get_total_salary_for_month, TENANT, MONTH) == expected
+
+
+def bench_remove_last_salary(benchmark, bench_db, fetch):
+    last = fetch('SELECT MAX(id) FROM salary WHERE tenant_id = ? AND date = ?', TENANT, MONTH)[0][0]
+    benchmark(database.remove_last_salary_from_db, TENANT, MONTH)
+    assert fetch('SELECT id FROM salary WHERE id = ?', last) == []
+
+
+def bench_add_expenses(benchmark, bench_db, fetch):
+    benchmark(database.add_expenses_to_db, TENANT, 1000, MONTH)
+    assert fetch('SELECT tenant_id, amount, date FROM expenses ORDER BY id DESC LIMIT 1') == [(TENANT, 1000, MONTH)]
+
+
+def bench_total_expenses_for_month(benchmark, bench_db, fetch):
+    expected = fetch('SELECT SUM(amount) FROM expenses WHERE tenant_id = ? AND date = ?', TENANT, MONTH)[0][0]
+    assert expected
+    assert benchmark(database.get_total_expenses_for_month, TENANT, MONTH) == expected
+
+
+def bench_remove_last_expenses(benchmark, bench_db, fetch):
+    last = fetch('SELECT MAX(id) FROM expenses WHERE tenant_id = ? AND date = ?', TENANT, MONTH)[0][0]
+    benchmark(database.remove_last_expenses_from_db, TENANT, MONTH)
+    assert fetch('SELECT id FROM expenses WHERE id = ?', last) == []
+
+
+def bench_count_visits_by_link(benchmark, bench_db, fetch):
+    expected = fetch('SELECT COUNT(*) FROM clients WHERE tenant_id = ? AND link IN (?, ?, ?)', TENANT, *CLIENT1)[0][0]
+    assert expected > 0
+    assert benchmark(database.count_visits_by_link, TENANT, '@client1') == (expected, '@client1')
+
+
+def bench_top_visits(benchmark, bench_db, fetch):
+    top = benchmark(database.get_top_visits, TENANT, 10)
+    assert len(top) == 10
+    counts = [row[1] for row in top]
+    assert counts == sorted(counts, reverse=True)
+    # У лидера столько визитов, сколько записей со ссылкой в любом написании (client<N> без учета регистра)
+    base = database._normalize_link_base(top[0][0])
+    links = fetch('SELECT link FROM clients WHERE tenant_id = ? AND link LIKE ?', TENANT, f'%{base}')
+    assert sum(1 for (link,) in links if link.lower().endswith(('@' + base, '/' + base)) or link.lower() == base) == counts[0]
+
+
+def _clients_between(fetch, start, end):
+    return fetch('''
+    SELECT id FROM clients WHERE tenant_id = ? AND day_rec BETWEEN ? AND ?
+    ''', TENANT, start, end)
+
+
+def bench_clients_by_date_range_week(benchmark, bench_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_date_range, TENANT, '2025-03-01', '2025-03-07')
+    assert _ids(rows) == _ids(_clients_between(fetch, '2025-03-01', '2025-03-07'))
+    assert [row[4] for row in rows] == sorted(row[4] for row in rows)
+
+
+def bench_clients_by_date_range_year(benchmark, bench_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_date_range, TENANT, '2025-01-01', '2025-12-31')
+    assert rows
+    assert _ids(rows) == _ids(_clients_between(fetch, '2025-01-01', '2025-12-31'))
+
+
+def bench_clients_by_day(benchmark, bench_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_day, TENANT, '2025-03-10')
+    assert _ids(rows) == _ids(_clients_between(fetch, '2025-03-10', '2025-03-10'))
+    assert {row[4] for row in rows} <= {'2025-03-10'}
+
+
+def bench_marked_days_for_month(benchmark, bench_db, fetch):
+    expected = {int(day_rec[8:]) for (day_rec,) in fetch('''
+    SELECT day_rec FROM clients WHERE tenant_id = ? AND day_rec BETWEEN '2025-03-01' AND '2025-03-31'
+    ''', TENANT)}
+    assert expected
+    assert benchmark(request_for_date.get_marked_days_for_month, TENANT, 2025, 3) == expected
+
+
+def _selected(fetch, year, month):
+    rows = fetch('SELECT day FROM schedule_days WHERE tenant_id = ? AND year = ? AND month = ?',
+                 TENANT, year, month, db='schedule_db')
+    return {day for (day,) in rows}
+
+
+def bench_selected_days(benchmark, bench_db, fetch):
+    expected = _selected(fetch, 2025, 3)
+    assert benchmark(schedule_db.get_selected_days, TENANT, 2025, 3) == expected
+
+
+def bench_set_day_selected(benchmark, bench_db, fetch):
+    schedule_db.clear_month(TENANT, 2025, 3)
+    benchmark(schedule_db.set_day_selected, TENANT, 2025, 3, 10, True)
+    assert _selected(fetch, 2025, 3) == {10}
+
+
+def bench_toggle_day(benchmark, bench_db, fetch):
+    selected, days = benchmark(schedule_db.toggle_day, TENANT, 2025, 3, 10)
+    # Состояние после последнего переключения совпадает с базой, сколько бы раундов ни было
+    assert (10 in days) == selected
+    assert set(days) == _selected(fetch, 2025, 3)
+
+
+def bench_select_weekdays(benchmark, bench_db, fetch):
+    # Все будни месяца одной транзакцией; тот же результат по одному дню — ~22 вызова toggle_day
+    def clear_and_select():
+        schedule_db.clear_month(TENANT, 2025, 3)
+        return schedule_db.select_weekdays(TENANT, 2025, 3)
+
+    assert len(benchmark(clear_and_select)) == 21
+    assert _selected(fetch, 2025, 3) == {day for day in range(1, 32) if date(2025, 3, day).weekday() < 5}
+
+
+def bench_schedule_slots_roundtrip(benchmark, bench_db):
+    slots = {0: ['11:00', '14:00'], 5: ['10:00']}
+
+    def roundtrip():
+        schedule_db.save_schedule_slots(TENANT, slots)
+        result = schedule_db.get_schedule_slots(TENANT)
+        schedule_db.clear_schedule_slots(TENANT)
+        return result
+
+    assert benchmark(roundtrip) == slots
+
+
+def bench_legacy_expenses_db(benchmark, bench_db):
+    db_expenses.create_expenses_table()
+
+    def roundtrip():
+        db_expenses.add_expenses_to_db(100, MONTH)
+        total = db_expenses.get_total_expenses_for_month(MONTH)
+        db_expenses.remove_last_expenses_from_db(MONTH)
+        return total
+
+    assert benchmark(roundtrip) == 100
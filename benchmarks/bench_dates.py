@@ -0,0 +1,35 @@
+import random
+from datetime import date, datetime, timedelta
+
+from utils.common import format_date_display, parse_iso_date
+
+ROWS = 100_000
+
+
+def _make_dates(count: int):
+    # Записи за два года вперед: повторяющиеся даты, как в реальной таблице clients
+    rnd = random.Random(42)
+    start = date(2026, 1, 1)
+    return [(start + timedelta(days=rnd.randrange(730))).isoformat() for _ in range(count)]
+
+
+DATES = _make_dates(ROWS)
+
+
+def bench_strptime_display(benchmark):
+    result = benchmark(lambda: [datetime.strptime(d, "%Y-%m-%d").strftime("%d.%m.%Y") for d in DATES])
+    assert len(result) == ROWS
+
+
+def bench_cached_display(benchmark):
+    result = benchmark(lambda: [format_date_display(d) for d in DATES])
+    assert result[0] == datetime.strptime(DATES[0], "%Y-%m-%d").strftime("%d.%m.%Y")
+
+
+def bench_strptime_parse(benchmark):
+    benchmark(lambda: [datetime.strptime(d, "%Y-%m-%d").date() for d in DATES])
+
+
+def bench_cached_parse(benchmark):
+    result = benchmark(lambda: [parse_iso_date(d) for d in DATES])
+    assert result[0] == datetime.strptime(DATES[0], "%Y-%m-%d").date()
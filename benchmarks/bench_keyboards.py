@@ -0,0 +1,29 @@
+from keyboards import keyboards
+
+MARKED = {1, 5, 9, 14, 20, 28}
+SELECTED = {2, 3, 4, 10, 11, 17, 24}
+
+
+def _callbacks(markup):
+    return [button.callback_data for row in markup.inline_keyboard for button in row]
+
+
+def bench_calendar_keyboard(benchmark):
+    markup = benchmark(keyboards.get_calendar_keyboard, 2025, 3, MARKED)
+    days = [data for data in _callbacks(markup) if data.startswith('cal_day_')]
+    assert days[0] == 'cal_day_2025-03-01' and len(days) == 31
+    marked = {int(button.text[:-1]) for row in markup.inline_keyboard for button in row if button.text.endswith('•')}
+    assert marked == MARKED
+
+
+def bench_schedule_calendar_keyboard(benchmark):
+    markup = benchmark(keyboards.get_schedule_calendar_keyboard, 2025, 3, MARKED, SELECTED)
+    assert len(markup.inline_keyboard) > 5
+
+
+def bench_months_keyboard(benchmark):
+    assert benchmark(keyboards.get_months_keyboard).inline_keyboard
+
+
+def bench_prepayment_keyboard(benchmark):
+    assert set(_callbacks(benchmark(keyboards.get_prepayment_keyboard))) >= {'prepay_yes', 'prepay_no'}
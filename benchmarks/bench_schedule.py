@@ -0,0 +1,20 @@
+from functools import partial
+
+from database import request_for_date
+from utils.common import DEFAULT_SLOTS
+from utils.schedule import build_schedule_lines
+
+
+def bench_build_schedule_month(benchmark, bench_db):
+    days = list(range(1, 32))
+    lines = benchmark(build_schedule_lines, 2025, 3, days, DEFAULT_SLOTS, partial(request_for_date.get_clients_by_day, 1))
+    assert lines[0] == 'Расписание за март:'
+
+
+def bench_build_schedule_in_memory(benchmark):
+    # Только форматирование, без обращений к базе
+    booked = [(1, 'Анна', '@a', '11:00', '2025-03-10', 0), (2, 'Мария', '@m', '16.30', '2025-03-10', 1)]
+    days = list(range(1, 32))
+    lines = benchmark(build_schedule_lines, 2025, 3, days, DEFAULT_SLOTS, lambda ymd: booked)
+    assert lines[0] == 'Расписание за март:'
+    assert len(lines) > len(days)
@@ -0,0 +1,60 @@
+import sqlite3
+
+import pytest
+
+from database import database, request_for_date, search
+
+TENANT = 1
+
+
+# Имена в наборе — из datagen.NAMES, ссылки — client<N> в пяти написаниях
+@pytest.mark.parametrize('query', ['ан', 'Виктория', 'тори', '@client1', 'client12', 'cliemt123', 'нет-такого'])
+def bench_search_clients(benchmark, bench_db, query):
+    rows = benchmark(search.search_clients, TENANT, query, 20)
+    assert bool(rows) == (query != 'нет-такого')
+
+
+def bench_search_ranking(benchmark, bench_db):
+    database.save_client(TENANT, 'Алиса Искомая', '@needle_client', '11:00', '2025-03-10', 0)
+    rows = benchmark(search.search_clients, TENANT, 'needle', 20)
+    assert rows[0][2] == '@needle_client'
+
+
+def bench_search_after_update(benchmark, bench_db):
+    # Индекс clients_fts ведут триггеры: переименованный клиент находится по новому имени, но не по старому
+    database.save_client(TENANT, 'Старое Имя', '@renamed', '11:00', '2025-03-10', 0)
+    with sqlite3.connect(bench_db['clients_db']) as connection:
+        client_id = connection.execute("SELECT id FROM clients WHERE link = '@renamed'").fetchone()[0]
+    database.update_client_by_id(TENANT, client_id, 'Новое Имя', '@renamed', '11:00', '2025-03-10', 0)
+    assert not [row for row in search.search_clients(TENANT, 'Старое', 20) if row[0] == client_id]
+    rows = benchmark(search.search_clients, TENANT, 'Новое', 20)
+    assert rows[0][0] == client_id
+
+
+def bench_upcoming_visits(benchmark, bench_db, fetch):
+    links = [row[2] for row in search.search_clients(TENANT, 'client1', 20)]
+    visits = benchmark(request_for_date.get_upcoming_visits, TENANT, links, '2025-03-01', 3)
+    # Серий в наборе нет: ближайшие визиты — первые три записи клиента с 2025-03-01 по всем написаниям ссылки
+    bases = {database._normalize_link_base(link) for link in links}
+    expected = {}
+    for link, day_rec, time in fetch('SELECT link, day_rec, time FROM clients WHERE tenant_id = ? AND day_rec >= ?',
+                                     TENANT, '2025-03-01'):
+        base = database._normalize_link_base(link)
+        if base in bases:
+            expected.setdefault(base, []).append((day_rec, time))
+    assert visits
+    assert visits == {base: sorted(items)[:3] for base, items in expected.items()}
+
+
+@pytest.mark.parametrize('cached', [False, True], ids=['cold', 'cached'])
+def bench_inline_results(benchmark, bench_db, cached):
+    # Ответ на inline-запрос: поиск и ближайшие визиты; из кеша — только проверка seq журнала
+    from handlers import inline_search
+
+    def run():
+        if not cached:
+            inline_search._results.clear()
+        return inline_search.cached_results(TENANT, 'client1')
+
+    assert benchmark(run)
+    inline_search._results.clear()
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+
+from database import request_for_date
+from utils.common import format_prepayment
+from web_json import ORJSONResponse, serialize_clients
+
+
+@pytest.fixture
+def client_rows(bench_db):
+    # Весь период синтетической базы: --rows записей (по умолчанию 10 000)
+    rows = request_for_date.get_clients_by_date_range(1, '2024-01-01', '2026-12-31')
+    assert len(rows) == bench_db['rows']
+    return rows
+
+
+def _legacy_serialize_client(row):
+    return {
+        "id": row[0],
+        "name": row[1],
+        "link": row[2],
+        "time": row[3],
+        "date": row[4],
+        "prepayment": row[5] if len(row) > 5 else None,
+        "prepayment_display": format_prepayment(row[5] if len(row) > 5 else None),
+    }
+
+
+def bench_serialize_clients_default_encoder(benchmark, client_rows):
+    # Прежний путь FastAPI: словарь на строку, jsonable_encoder и json.dumps в JSONResponse
+    def encode():
+        content = jsonable_encoder([_legacy_serialize_client(row) for row in client_rows])
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    benchmark(encode)
+
+
+def bench_serialize_clients_orjson(benchmark, client_rows):
+    benchmark(lambda: ORJSONResponse(serialize_clients(client_rows)).body)
@@ -0,0 +1,47 @@
+import sqlite3
+
+import pytest
+
+from database import request_for_date, series
+
+TENANT = 1
+SERIES = 200
+
+
+@pytest.fixture
+def series_db(bench_db):
+    # Серии идут с 2020 года: развертка недели 2025 не должна проходить по пяти годам истории
+    with sqlite3.connect(bench_db['clients_db']) as connection:
+        connection.executemany('''
+        INSERT INTO client_series(tenant_id, name, link, link_base, time, start_date, interval_weeks, prepayment)
+        VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+        ''', [
+            (TENANT, f'Серия {i}', f'@series{i}', f'series{i}', f'{10 + i % 9}:00', f'2020-01-{i % 28 + 1:02d}', i % 2 + 1)
+            for i in range(SERIES)
+        ])
+    return bench_db
+
+
+def bench_expand_series_week(benchmark, series_db):
+    occurrences = benchmark(series.get_occurrences, TENANT, '2025-03-03', '2025-03-09')
+    # Недельная серия дает одно вхождение в неделю, двухнедельная — одно в две недели
+    assert SERIES // 2 <= len(occurrences) <= SERIES
+
+
+def bench_expand_series_year(benchmark, series_db):
+    occurrences = benchmark(series.get_occurrences, TENANT, '2025-01-01', '2025-12-31')
+    assert len(occurrences) > SERIES * 26
+
+
+def bench_clients_by_date_range_week_with_series(benchmark, series_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_date_range, TENANT, '2025-03-01', '2025-03-07')
+    # Разовые записи из clients и вхождения серий, вместе по возрастанию даты
+    clients = fetch("SELECT id FROM clients WHERE tenant_id = ? AND day_rec BETWEEN '2025-03-01' AND '2025-03-07'", TENANT)
+    assert sorted(row[0] for row in rows if row[0] > 0) == sorted(row[0] for row in clients)
+    assert len(rows) - len(clients) == len(series.get_occurrences(TENANT, '2025-03-01', '2025-03-07'))
+    assert [row[4] for row in rows] == sorted(row[4] for row in rows)
+
+
+def bench_marked_days_with_series(benchmark, series_db):
+    # Недельные серии заполняют все дни месяца
+    assert benchmark(request_for_date.get_marked_days_for_month, TENANT, 2025, 3) == set(range(1, 32))
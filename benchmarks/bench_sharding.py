@@ -0,0 +1,36 @@
+import asyncio
+from functools import partial
+
+import pytest
+
+from bot.sharding import ShardedDispatcher, checking_worker, fake_updates, shard_for
+
+UPDATES = 2000
+CHATS = 100
+WORK_SECONDS = 0.0005
+
+
+def _collect_updates():
+    async def collect():
+        return [update async for update in fake_updates(UPDATES, CHATS)]
+    return asyncio.run(collect())
+
+
+def bench_shard_for(benchmark):
+    updates = _collect_updates()
+    benchmark(lambda: [shard_for(update, 4) for update in updates])
+
+
+@pytest.mark.parametrize('workers', [1, 4])
+def bench_sharded_dispatch(benchmark, workers):
+    # Полный путь: очередь, процесс-обработчик, CPU-работа на апдейт. Выигрыш виден при workers <= ядер
+    updates = _collect_updates()
+
+    async def run():
+        dispatcher = ShardedDispatcher(workers, partial(checking_worker, WORK_SECONDS))
+        dispatcher.start()
+        for update in updates:
+            dispatcher.dispatch(update)
+        await dispatcher.stop()
+
+    benchmark.pedantic(lambda: asyncio.run(run()), rounds=2)
@@ -0,0 +1,58 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_PACKAGES = ('bot', 'database', 'handlers', 'keyboards', 'states', 'utils', 'monitoring',
+                    'web_app', 'web_auth', 'web_events', 'web_json', 'static_assets',
+                    'web_server', 'main_launch')
+
+# Суммарное собственное время импорта модулей проекта (без aiogram/fastapi), мкс.
+# Замер на dev-машине: web_app ~85 мс, старт бота с регистрацией хендлеров ~50 мс
+IMPORT_BUDGET_US = 150_000
+BOT_STARTUP_BUDGET_US = 100_000
+
+# Тот же путь, что в main_launch.py до start_polling (и в воркере bot.sharding):
+# хендлеры и клавиатуры импортируются в register(dp)
+BOT_STARTUP = 'import main_launch; main_launch.register(main_launch.dp)'
+
+_IMPORTTIME_RE = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|(\s+)(\S+)$')
+
+
+def _importtime(code: str, cwd: str):
+    env = dict(os.environ, PYTHONPATH=ROOT, BOT_TOKEN='123456:' + 'A' * 35)
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_RE.match(line)
+        if match:
+            modules[match.group(4)] = int(match.group(1))
+    return modules
+
+
+def _project_self_time(modules: dict) -> int:
+    return sum(us for name, us in modules.items() if name.split('.')[0] in PROJECT_PACKAGES)
+
+
+def _check_entry_point(benchmark, module: str, tmp_path, code: str = None, budget_us: int = IMPORT_BUDGET_US):
+    modules = benchmark.pedantic(_importtime, args=(code or f'import {module}', str(tmp_path)), rounds=3)
+    assert module in modules
+    assert _project_self_time(modules) < budget_us
+    # Импорт не должен трогать базы: миграции выполняются только на старте процесса
+    assert not list(tmp_path.glob('*.db'))
+    return modules
+
+
+def bench_import_web_app(benchmark, tmp_path):
+    modules = _check_entry_point(benchmark, 'web_app', tmp_path)
+    assert not any(name.startswith('handlers') for name in modules)
+
+
+def bench_bot_startup(benchmark, tmp_path):
+    modules = _check_entry_point(benchmark, 'main_launch', tmp_path, BOT_STARTUP, BOT_STARTUP_BUDGET_US)
+    # Бюджет считается по реальному старту, вместе со всеми хендлерами
+    assert 'handlers.rec_client' in modules and 'keyboards.keyboards' in modules
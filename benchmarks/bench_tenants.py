@@ -0,0 +1,110 @@
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from benchmarks.datagen import generate
+from database import database, request_for_date, schedule_db, search
+
+# Данные одного мастера фиксированы, растет только число мастеров в базе.
+# Запросы идут по индексам с tenant_id впереди, поэтому время не должно расти вместе с ним
+TENANT_ROWS = 2000
+TENANT_COUNTS = [1, 10, 100]
+TENANT = 1
+MONTH = '2025-03'
+
+
+@pytest.fixture(scope='module', params=TENANT_COUNTS, ids=lambda count: f'tenants={count}')
+def tenants_dataset(request, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(f'tenants_{request.param}')
+    clients_db = str(directory / 'database_client.db')
+    schedule_path = str(directory / 'shedule.db')
+    generate(clients_db, schedule_path, TENANT_ROWS, tenants=request.param)
+    return {'clients_db': clients_db, 'schedule_db': schedule_path}
+
+
+@pytest.fixture
+def tenants_db(tenants_dataset, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', tenants_dataset['clients_db'])
+    monkeypatch.setattr(schedule_db, 'DB_PATH', tenants_dataset['schedule_db'])
+    return tenants_dataset
+
+
+@pytest.fixture
+def fetch(tenants_db):
+    # Как fetch из conftest, но по базе с несколькими мастерами
+    def run(sql, *params, db='clients_db'):
+        with closing(sqlite3.connect(tenants_db[db])) as connection:
+            return connection.execute(sql, params).fetchall()
+    return run
+
+
+def _ids(rows):
+    return sorted(row[0] for row in rows)
+
+
+# Результат совпадает с выборкой только по своему мастеру: записи других мастеров не подмешиваются
+def bench_tenant_clients_by_day(benchmark, tenants_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_day, TENANT, '2025-03-10')
+    assert _ids(rows) == _ids(fetch("SELECT id FROM clients WHERE tenant_id = ? AND day_rec = '2025-03-10'", TENANT))
+
+
+def bench_tenant_clients_by_month(benchmark, tenants_db, fetch):
+    rows = benchmark(request_for_date.get_clients_by_date_range, TENANT, '2025-03-01', '2025-03-31')
+    expected = fetch("SELECT id FROM clients WHERE tenant_id = ? AND day_rec BETWEEN '2025-03-01' AND '2025-03-31'", TENANT)
+    assert rows
+    assert _ids(rows) == _ids(expected)
+
+
+def bench_tenant_marked_days(benchmark, tenants_db, fetch):
+    expected = fetch("SELECT DISTINCT CAST(substr(day_rec, 9) AS INTEGER) FROM clients WHERE tenant_id = ? AND day_rec LIKE '2025-03-%'", TENANT)
+    assert benchmark(request_for_date.get_marked_days_for_month, TENANT, 2025, 3) == {day for (day,) in expected}
+
+
+def bench_tenant_salary_total(benchmark, tenants_db, fetch):
+    expected = fetch('SELECT SUM(amount) FROM salary WHERE tenant_id = ? AND date = ?', TENANT, MONTH)[0][0]
+    assert benchmark(database.get_total_salary_for_month, TENANT, MONTH) == expected
+
+
+def bench_tenant_top_visits(benchmark, tenants_db, fetch):
+    top = benchmark(database.get_top_visits, TENANT, 10)
+    assert len(top) == 10
+    assert sum(count for _, count in top) <= fetch('SELECT COUNT(*) FROM clients WHERE tenant_id = ?', TENANT)[0][0]
+
+
+def bench_tenant_selected_days(benchmark, tenants_db, fetch):
+    expected = fetch('SELECT day FROM schedule_days WHERE tenant_id = ? AND year = 2025 AND month = 3', TENANT,
+                     db='schedule_db')
+    assert benchmark(schedule_db.get_selected_days, TENANT, 2025, 3) == {day for (day,) in expected}
+
+
+# Поиск подстроки у маленького мастера среди больших: MATCH читает только диапазон rowid мастера
+# в clients_fts, поэтому время не растет с числом и объемом чужих записей
+SMALL_TENANT_ROWS = 50
+
+
+@pytest.fixture(scope='module', params=TENANT_COUNTS, ids=lambda count: f'tenants={count}')
+def small_tenant_dataset(request, tmp_path_factory):
+    directory = tmp_path_factory.mktemp(f'small_tenant_{request.param}')
+    clients_db = str(directory / 'database_client.db')
+    generate(clients_db, str(directory / 'shedule.db'), TENANT_ROWS, tenants=request.param)
+    small_tenant = request.param + 1
+    # Ссылки client0..client15 — те же, что у больших мастеров
+    with closing(sqlite3.connect(clients_db)) as connection, connection:
+        connection.executemany(
+            'INSERT INTO clients(tenant_id, name, link, link_base, time, day_rec, prepayment) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(small_tenant, 'Анна', f'@client{i % 16}', f'client{i % 16}', '10:00', '2025-03-10', 0)
+             for i in range(SMALL_TENANT_ROWS)],
+        )
+    return {'clients_db': clients_db, 'tenant': small_tenant}
+
+
+def bench_small_tenant_search(benchmark, small_tenant_dataset, monkeypatch):
+    monkeypatch.setattr(database, 'DB_PATH', small_tenant_dataset['clients_db'])
+    tenant = small_tenant_dataset['tenant']
+    # Без совпадения по началу: кандидаты дает только clients_fts
+    rows = benchmark(search.search_clients, tenant, 'ient1', 20)
+    with closing(sqlite3.connect(small_tenant_dataset['clients_db'])) as connection:
+        own = {row[0] for row in connection.execute('SELECT id FROM clients WHERE tenant_id = ?', (tenant,))}
+    assert {row[0] for row in rows} <= own
+    assert sorted(row[2] for row in rows) == sorted(f'@client{i}' for i in [1, *range(10, 16)])
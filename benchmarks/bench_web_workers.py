@@ -0,0 +1,107 @@
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from benchmarks.bench_api import BOT_TOKEN, CLIENT_PAYLOAD, make_init_data
+
+# Нагрузочный тест режима нескольких процессов: web_server.py поднимает uvicorn на копии базы,
+# потоки шлют вперемешку чтения и записи. Ни одна запись не должна потеряться из-за блокировки
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONCURRENCY = 16
+REQUESTS_PER_THREAD = 40
+STARTUP_TIMEOUT = 60
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def web_server(request, bench_db, tmp_path):
+    workers = request.param
+    port = _free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=PROJECT_ROOT,
+        BOT_TOKEN=BOT_TOKEN,
+        CLIENTS_DB_PATH=bench_db['clients_db'],
+        SCHEDULE_DB_PATH=bench_db['schedule_db'],
+        TENANTS_FILE=str(tmp_path / 'tenants.json'),
+    )
+    log_path = tmp_path / 'server.log'
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(PROJECT_ROOT, 'web_server.py'),
+             '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers)],
+            cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while True:
+            try:
+                if httpx.get(base_url + '/api/health').status_code == 200:
+                    break
+            except httpx.TransportError:
+                pass
+            assert process.poll() is None and time.monotonic() < deadline, log_path.read_text()
+            time.sleep(0.2)
+        yield {'base_url': base_url, 'log_path': log_path, 'clients_db': bench_db['clients_db']}
+    finally:
+        process.terminate()
+        process.wait(30)
+
+
+def _client_count(clients_db: str) -> int:
+    with sqlite3.connect(clients_db) as connection:
+        return connection.execute('SELECT COUNT(*) FROM clients').fetchone()[0]
+
+
+def _mixed_load(base_url: str, thread: int):
+    statuses = []
+    headers = {'Authorization': f'tma {make_init_data()}'}
+    with httpx.Client(base_url=base_url, headers=headers, timeout=30) as client:
+        for i in range(REQUESTS_PER_THREAD):
+            kind = i % 6
+            if kind == 0:
+                response = client.post('/api/clients', json=dict(CLIENT_PAYLOAD, link=f'@load{thread}_{i}'))
+            elif kind == 1:
+                response = client.post('/api/salary', json={'amount': 100, 'month': '2025-03'})
+            elif kind == 2:
+                response = client.post('/api/schedule/toggle', json={'year': 2025, 'month': 3, 'day': i % 28 + 1})
+            elif kind == 3:
+                response = client.get('/api/clients', params={'start': '2025-03-01', 'end': '2025-03-31'})
+            elif kind == 4:
+                response = client.get('/api/dashboard', params={'year': 2025, 'month': 3})
+            else:
+                response = client.get('/api/changes')
+            statuses.append(response.status_code)
+    return statuses
+
+
+@pytest.mark.parametrize('web_server', [1, 4], indirect=True, ids=lambda workers: f'workers={workers}')
+def bench_web_workers_mixed_load(benchmark, web_server):
+    before = _client_count(web_server['clients_db'])
+
+    def run():
+        with ThreadPoolExecutor(CONCURRENCY) as pool:
+            results = pool.map(lambda thread: _mixed_load(web_server['base_url'], thread), range(CONCURRENCY))
+            return [status for statuses in results for status in statuses]
+
+    statuses = benchmark.pedantic(run, rounds=1)
+    failed = [status for status in statuses if status >= 400]
+    assert not failed, failed
+    # Обработчики записи печатают ошибку SQLite и отвечают 200, поэтому проверяются и лог, и сами строки
+    log = web_server['log_path'].read_text()
+    assert 'database is locked' not in log and 'Ошибка при' not in log, log
+    inserted = sum(1 for i in range(REQUESTS_PER_THREAD) if i % 6 == 0) * CONCURRENCY
+    assert _client_count(web_server['clients_db']) == before + inserted
@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import pytest
+
+from database import database, write_queue
+
+# Одинаковая нагрузка — WRITES вставок из THREADS потоков (как веб-API в пуле потоков).
+# off — коммит на каждую запись, commit/deferred — групповой коммит через write_queue
+THREADS = 16
+WRITES = 800
+MONTH = '2025-03'
+
+
+@pytest.fixture
+def batch_mode(request, bench_db, monkeypatch):
+    mode, synchronous = request.param
+    monkeypatch.setattr(write_queue, 'WRITE_BATCH_MODE', mode)
+    monkeypatch.setattr(write_queue, 'WRITE_BATCH_SYNCHRONOUS', synchronous)
+    yield mode
+    write_queue.close_write_queues()
+
+
+def _salary_rows() -> int:
+    with database.get_db_connection() as connection:
+        return connection.execute('SELECT COUNT(*) FROM salary').fetchone()[0]
+
+
+@pytest.mark.parametrize('batch_mode', [('off', 'FULL'), ('commit', 'FULL'), ('commit', 'NORMAL'),
+                                        ('deferred', 'FULL')],
+                         indirect=True, ids=lambda param: '-'.join(param))
+def bench_concurrent_salary_inserts(benchmark, batch_mode):
+    before = _salary_rows()
+    rounds = []
+
+    def run():
+        rounds.append(1)
+        with ThreadPoolExecutor(THREADS) as pool:
+            results = list(pool.map(lambda i: database.add_salary_to_db(1, i, MONTH), range(WRITES)))
+        # deferred возвращает управление до коммита — время считается до фиксации всех записей
+        wait([future for future in results if future is not None])
+
+    benchmark.pedantic(run, rounds=3)
+    assert _salary_rows() == before + len(rounds) * WRITES
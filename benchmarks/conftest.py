@@ -0,0 +1,46 @@
+import os
+import shutil
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from benchmarks.datagen import generate
+from database import database, schedule_db
+
+
+def pytest_addoption(parser):
+    parser.addoption('--rows', type=int, default=int(os.getenv('BENCH_ROWS', '10000')),
+                     help='строк в каждой таблице синтетической базы')
+
+
+@pytest.fixture(scope='session')
+def dataset(request, tmp_path_factory):
+    rows = request.config.getoption('--rows')
+    directory = tmp_path_factory.mktemp(f'dataset_{rows}')
+    clients_db = str(directory / 'database_client.db')
+    schedule_path = str(directory / 'shedule.db')
+    generate(clients_db, schedule_path, rows)
+    return {'rows': rows, 'clients_db': clients_db, 'schedule_db': schedule_path}
+
+
+@pytest.fixture
+def bench_db(dataset, tmp_path, monkeypatch):
+    # Каждый бенчмарк работает с копией, чтобы записи одного кейса не влияли на другие
+    clients_db = str(tmp_path / 'database_client.db')
+    schedule_path = str(tmp_path / 'shedule.db')
+    shutil.copyfile(dataset['clients_db'], clients_db)
+    shutil.copyfile(dataset['schedule_db'], schedule_path)
+    monkeypatch.setattr(database, 'DB_PATH', clients_db)
+    monkeypatch.setattr(schedule_db, 'DB_PATH', schedule_path)
+    monkeypatch.chdir(tmp_path)
+    return dict(dataset, clients_db=clients_db, schedule_db=schedule_path)
+
+
+@pytest.fixture
+def fetch(bench_db):
+    # Эталон для проверки результатов: прямой запрос к копии базы в обход проверяемых функций
+    def run(sql, *params, db='clients_db'):
+        with closing(sqlite3.connect(bench_db[db])) as connection:
+            return connection.execute(sql, params).fetchall()
+    return run
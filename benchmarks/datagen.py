@@ -0,0 +1,92 @@
+import argparse
+import os
+import random
+import sqlite3
+from contextlib import closing
+from datetime import date, timedelta
+
+from database import migrations
+from database.database import _normalize_link_base
+from database.connection import enable_wal
+
+NAMES = ['Анна', 'Мария', 'Елена', 'Ольга', 'Дарья', 'Ирина', 'Светлана', 'Алина', 'Виктория', 'Полина']
+TIMES = ['10:00', '11:00', '11.30', '13:00', '14', '16:00', '17-00', '18:00', '19:00']
+START_DATE = date(2024, 1, 1)
+
+
+def _clients(rnd: random.Random, count: int):
+    # Около count/3 уникальных ссылок, чтобы у постоянных клиентов было несколько визитов
+    links = max(1, count // 3)
+    for _ in range(count):
+        link_id = rnd.randrange(links)
+        link = rnd.choice([f"@client{link_id}", f"https://t.me/client{link_id}", f"client{link_id}",
+                           f"http://telegram.me/Client{link_id}", f"@CLIENT{link_id}"])
+        day_rec = (START_DATE + timedelta(days=rnd.randrange(3 * 365))).isoformat()
+        prepayment = rnd.choice([0, 0, 1, 500, 1000.5])
+        yield rnd.choice(NAMES), link, _normalize_link_base(link), rnd.choice(TIMES), day_rec, prepayment
+
+
+def _amounts(rnd: random.Random, count: int):
+    for _ in range(count):
+        month = START_DATE.replace(year=START_DATE.year + rnd.randrange(3), month=rnd.randrange(1, 13))
+        yield rnd.randrange(100, 10_000), month.strftime('%Y-%m')
+
+
+def _schedule_days(count: int):
+    # Первичный ключ (year, month, day): дни подряд, начиная с START_DATE
+    for offset in range(count):
+        day = START_DATE + timedelta(days=offset)
+        yield day.year, day.month, day.day
+
+
+def _with_tenant(tenant_id: int, items):
+    for item in items:
+        yield (tenant_id,) + item
+
+
+def generate(clients_db: str, schedule_db: str, rows: int, seed: int = 1, tenants: int = 1):
+    # rows строк на каждого мастера: объем данных одного мастера не зависит от их числа
+    rnd = random.Random(seed)
+    for db_path, steps in [(clients_db, migrations.CLIENTS_MIGRATIONS), (schedule_db, migrations.SCHEDULE_MIGRATIONS)]:
+        migrations.migrate(db_path, steps, backup=False)
+        enable_wal(db_path)
+
+    for tenant_id in range(1, tenants + 1):
+        with sqlite3.connect(clients_db) as connection:
+            connection.executemany(
+                'INSERT INTO clients(tenant_id, name, link, link_base, time, day_rec, prepayment) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                _with_tenant(tenant_id, _clients(rnd, rows)),
+            )
+            connection.executemany('INSERT INTO salary(tenant_id, amount, date) VALUES (?, ?, ?)',
+                                   _with_tenant(tenant_id, _amounts(rnd, rows)))
+            connection.executemany('INSERT INTO expenses(tenant_id, amount, date) VALUES (?, ?, ?)',
+                                   _with_tenant(tenant_id, _amounts(rnd, rows)))
+        with sqlite3.connect(schedule_db) as connection:
+            connection.executemany(
+                'INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)',
+                _with_tenant(tenant_id, _schedule_days(rows)),
+            )
+
+    # Базы в режиме WAL: без контрольной точки строки остаются в -wal, и копия одного файла базы пуста
+    for db_path in (clients_db, schedule_db):
+        with closing(sqlite3.connect(db_path)) as connection:
+            connection.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Синтетические данные для бенчмарков')
+    parser.add_argument('--rows', type=int, default=10_000, help='строк в каждой таблице (10^3 .. 10^6)')
+    parser.add_argument('--tenants', type=int, default=1, help='мастеров, по --rows строк на каждого')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--out', default='.', help='каталог для database_client.db и shedule.db')
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    clients_db = os.path.join(args.out, 'database_client.db')
+    schedule_db = os.path.join(args.out, 'shedule.db')
+    generate(clients_db, schedule_db, args.rows, args.seed, args.tenants)
+    print(f"{args.rows} строк x {args.tenants} мастеров: {clients_db}, {schedule_db}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,10 @@
-from aiogram import Bot, Dispatcher
+from aiogram import Dispatcher
 from aiogram.contrib.fsm_storage.memory import MemoryStorage
 from bot.config import token
+from bot.middleware import TenantMiddleware
+from monitoring.bot_middleware import InstrumentedBot, MetricsMiddleware
 
-bot = Bot(token=token)
-dp = Dispatcher(bot, storage=MemoryStorage())
\ No newline at end of file
+bot = InstrumentedBot(token=token)
+dp = Dispatcher(bot, storage=MemoryStorage())
+dp.middleware.setup(MetricsMiddleware())
+dp.middleware.setup(TenantMiddleware())
\ No newline at end of file
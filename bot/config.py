@@ -2,3 +2,21 @@ import os
 
 token = os.getenv("BOT_TOKEN", "")
 webapp_url = os.getenv("WEBAPP_URL", "")
+metrics_port = int(os.getenv("BOT_METRICS_PORT", "0"))
+admin_token = os.getenv("ADMIN_TOKEN", "")
+tenants_file = os.getenv("TENANTS_FILE", "tenants.json")
+# Число процессов-обработчиков бота; при 1 бот работает одним процессом, как раньше
+bot_workers = int(os.getenv("BOT_WORKERS", "1"))
+# Вебхук вместо polling (только вместе с BOT_WORKERS > 1)
+webhook_url = os.getenv("WEBHOOK_URL", "")
+webhook_host = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+webhook_port = int(os.getenv("WEBHOOK_PORT", "8443"))
+webhook_secret = os.getenv("WEBHOOK_SECRET", "")
+# Веб-API: число процессов uvicorn при запуске через web_server.py
+web_host = os.getenv("WEB_HOST", "0.0.0.0")
+web_port = int(os.getenv("WEB_PORT", "8000"))
+web_workers = int(os.getenv("WEB_WORKERS", "1"))
+# Inline-режим (@бот запрос): сколько секунд ответ кеширует Telegram и сколько — сам бот
+inline_cache_time = int(os.getenv("INLINE_CACHE_TIME", "10"))
+inline_results_ttl = float(os.getenv("INLINE_RESULTS_TTL", "60"))
+inline_results_cache_size = int(os.getenv("INLINE_RESULTS_CACHE_SIZE", "1024"))
@@ -0,0 +1,33 @@
+from aiogram import types
+from aiogram.dispatcher.handler import CancelHandler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from bot.tenants import get_tenant_id
+
+NOT_AUTHORIZED_TEXT = 'Вы не авторизованы для использования этой команды.'
+
+
+class TenantMiddleware(BaseMiddleware):
+    # Мастер определяется до фильтров и запросов к базе, хендлеры получают его аргументом tenant_id
+    @staticmethod
+    def _resolve(user: types.User, data: dict) -> bool:
+        tenant_id = get_tenant_id(user.id) if user else None
+        if tenant_id is None:
+            return False
+        data['tenant_id'] = tenant_id
+        return True
+
+    async def on_pre_process_message(self, message: types.Message, data: dict):
+        if not self._resolve(message.from_user, data):
+            await message.answer(NOT_AUTHORIZED_TEXT)
+            raise CancelHandler()
+
+    async def on_pre_process_callback_query(self, callback_query: types.CallbackQuery, data: dict):
+        if not self._resolve(callback_query.from_user, data):
+            await callback_query.answer(NOT_AUTHORIZED_TEXT, show_alert=True)
+            raise CancelHandler()
+
+    async def on_pre_process_inline_query(self, inline_query: types.InlineQuery, data: dict):
+        if not self._resolve(inline_query.from_user, data):
+            await inline_query.answer([], cache_time=60, is_personal=True)
+            raise CancelHandler()
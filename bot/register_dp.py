@@ -1,14 +1,19 @@
-from handlers.start import register_handlers as register_start_handlers
-from handlers.rec_client import register_handlers as register_rec_client_handlers
-from handlers.handler_back_buttons import register_handlers as register_callback_handlers
-from handlers.clients_request_date import register_handlers as register_request_date
-from handlers.delete_client import register_delete_client as register_delete
-from handlers.salary import register_salary
-from handlers.expenses import register_expenses
-from handlers.calendar import register_calendar
-from handlers.schedule import register_schedule
-
 def register(dp):
+    # Хендлеры (и клавиатуры вместе с ними) импортируются только при регистрации,
+    # чтобы import bot.* и web_app не тянули весь aiogram-слой
+    from handlers.start import register_handlers as register_start_handlers
+    from handlers.rec_client import register_handlers as register_rec_client_handlers
+    from handlers.handler_back_buttons import register_handlers as register_callback_handlers
+    from handlers.clients_request_date import register_handlers as register_request_date
+    from handlers.delete_client import register_delete_client as register_delete
+    from handlers.salary import register_salary
+    from handlers.expenses import register_expenses
+    from handlers.calendar import register_calendar
+    from handlers.schedule import register_schedule
+    from handlers.inline_search import register_inline_search
+    from handlers.admin import register_admin
+
+    register_admin(dp)
     register_start_handlers(dp)
     register_rec_client_handlers(dp)
     register_callback_handlers(dp)
@@ -18,3 +23,4 @@ def register(dp):
     register_expenses(dp)
     register_calendar(dp)
     register_schedule(dp)
+    register_inline_search(dp)
@@ -0,0 +1,421 @@
+import argparse
+import asyncio
+import hmac
+import multiprocessing
+import os
+import random
+import signal
+import time
+from contextlib import asynccontextmanager
+from queue import Empty
+
+from monitoring.metrics import (
+    SHARD_UPDATES_DROPPED,
+    SHARD_UPDATES_PENDING,
+    SHARD_UPDATES_REPLAYED,
+    SHARD_WORKER_RESTARTS,
+    SHARD_WORKER_UP,
+)
+
+# Процесс-диспетчер получает апдейты (polling или вебхук) и раскладывает их по очередям
+# N процессов-обработчиков по chat_id. Все апдейты одного чата попадают в один процесс
+# и обрабатываются по порядку, поэтому FSM в MemoryStorage работает как в одном процессе.
+# Обработчик подтверждает каждый апдейт; неподтвержденные апдейты упавшего обработчика
+# отдаются перезапущенному заново (апдейт может обработаться дважды, но не теряется)
+WORKER_STOP_TIMEOUT = 30
+WATCH_INTERVAL = 1.0
+# Обработчик отправляет подтверждения пачкой раз в ACK_INTERVAL, диспетчер с тем же шагом их читает.
+# После падения повторяются и апдейты, обработанные за последний ACK_INTERVAL
+ACK_INTERVAL = 0.02
+# Пачка до ACK_BATCH update_id пишется в pipe одним вызовом write меньше PIPE_BUF, то есть целиком:
+# упавший обработчик не оставляет в очереди подтверждений оборванное сообщение
+ACK_BATCH = 500
+# Апдейт, на котором обработчик упал столько раз, больше не повторяется
+SHARD_REPLAY_LIMIT = 3
+POLLING_TIMEOUT = 20
+POLLING_RETRY_DELAY = 5
+
+_CHAT_SOURCES = ('message', 'edited_message', 'channel_post', 'edited_channel_post', 'my_chat_member',
+                 'chat_member', 'chat_join_request')
+_USER_SOURCES = ('callback_query', 'inline_query', 'chosen_inline_result', 'shipping_query',
+                 'pre_checkout_query', 'poll_answer')
+
+
+def update_chat_id(update: dict) -> int:
+    for key in _CHAT_SOURCES:
+        if key in update:
+            return update[key]['chat']['id']
+    for key in _USER_SOURCES:
+        if key in update:
+            item = update[key]
+            message = item.get('message')
+            if message:
+                return message['chat']['id']
+            user = item.get('from') or item.get('user')
+            if user:
+                return user['id']
+    return 0
+
+
+def shard_for(update: dict, workers: int) -> int:
+    return update_chat_id(update) % workers
+
+
+@asynccontextmanager
+async def bot_worker():
+    # Каждый процесс-обработчик поднимает свой Bot и Dispatcher со всеми хендлерами
+    from aiogram import Bot, Dispatcher, types
+
+    from bot.bot import bot, dp
+    from bot.register_dp import register
+    from monitoring.loop_monitor import start_loop_monitor
+
+    register(dp)
+    Bot.set_current(bot)
+    Dispatcher.set_current(dp)
+    loop_monitor = start_loop_monitor('bot-worker')
+
+    async def handle(update: dict):
+        await dp.process_update(types.Update(**update))
+
+    try:
+        yield handle
+    finally:
+        if loop_monitor is not None:
+            loop_monitor.stop()
+        await dp.storage.close()
+        await (await bot.get_session()).close()
+
+
+async def _process_in_order(previous, handle, update: dict, done: list):
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await handle(update)
+    except Exception as e:
+        print(f"Ошибка при обработке апдейта {update.get('update_id')}: {e}")
+    # Апдейт с ошибкой в хендлере тоже подтверждается: повторять стоит только упавший процесс
+    done.append(update['update_id'])
+
+
+def _send_acks(acks, done: list):
+    for start in range(0, len(done), ACK_BATCH):
+        acks.put(done[start:start + ACK_BATCH])
+    done.clear()
+
+
+async def _ack_loop(acks, done: list):
+    while True:
+        await asyncio.sleep(ACK_INTERVAL)
+        _send_acks(acks, done)
+
+
+async def _worker_loop(queue, acks, worker_factory):
+    loop = asyncio.get_running_loop()
+    # Разные чаты обрабатываются конкурентно, апдейты одного чата — строго друг за другом
+    tails = {}
+    done = []
+    ack_task = loop.create_task(_ack_loop(acks, done))
+    async with worker_factory() as handle:
+        while True:
+            update = await loop.run_in_executor(None, queue.get)
+            if update is None:
+                break
+            chat_id = update_chat_id(update)
+            task = loop.create_task(_process_in_order(tails.get(chat_id), handle, update, done))
+            tails[chat_id] = task
+            task.add_done_callback(lambda done, key=chat_id: tails.get(key) is done and tails.pop(key))
+        # Остановка: новые апдейты не берем, уже взятые дорабатываем
+        if tails:
+            await asyncio.wait(list(tails.values()))
+    ack_task.cancel()
+    _send_acks(acks, done)
+
+
+def _worker_main(index: int, queue, acks, worker_factory):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    asyncio.run(_worker_loop(queue, acks, worker_factory))
+
+
+class ShardedDispatcher:
+    def __init__(self, workers: int, worker_factory=bot_worker):
+        self.workers = workers
+        self.worker_factory = worker_factory
+        self._context = multiprocessing.get_context('spawn')
+        # Очереди живут в диспетчере: при перезапуске обработчика апдейты его чатов ждут в очереди
+        self.queues = [self._context.Queue() for _ in range(workers)]
+        # Подтверждения (update_id) от обработчиков и отданные, но еще не подтвержденные апдейты
+        # шарда в порядке отправки: update_id -> [апдейт, сколько раз на нем падал обработчик]
+        self.acks = [self._context.Queue() for _ in range(workers)]
+        self.pending = [{} for _ in range(workers)]
+        self.processes = [None] * workers
+        self._restarting = set()
+        self._stopping = False
+        self._watch_task = None
+        self._ack_task = None
+
+    def _start_worker(self, index: int):
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.queues[index], self.acks[index], self.worker_factory),
+            name=f'bot-worker-{index}',
+        )
+        process.start()
+        self.processes[index] = process
+        SHARD_WORKER_UP.set(1, shard=index)
+
+    def start(self):
+        for index in range(self.workers):
+            self._start_worker(index)
+        loop = asyncio.get_running_loop()
+        self._watch_task = loop.create_task(self._watch())
+        self._ack_task = loop.create_task(self._read_acks())
+
+    def dispatch(self, update: dict):
+        index = shard_for(update, self.workers)
+        self.pending[index][update['update_id']] = [update, 0]
+        self.queues[index].put(update)
+
+    def _collect_acks(self, index: int):
+        pending = self.pending[index]
+        while True:
+            try:
+                update_ids = self.acks[index].get_nowait()
+            except Empty:
+                break
+            for update_id in update_ids:
+                pending.pop(update_id, None)
+        SHARD_UPDATES_PENDING.set(len(pending), shard=index)
+
+    async def _read_acks(self):
+        while True:
+            for index in range(self.workers):
+                self._collect_acks(index)
+            await asyncio.sleep(ACK_INTERVAL)
+
+    def _replay(self, index: int):
+        # Новая очередь получает неподтвержденные апдейты раньше новых, в исходном порядке,
+        # поэтому порядок апдейтов каждого чата сохраняется
+        pending = self.pending[index]
+        for update_id, entry in list(pending.items()):
+            entry[1] += 1
+            if entry[1] >= SHARD_REPLAY_LIMIT:
+                print(f"Апдейт {update_id} не обработан после {entry[1]} падений bot-worker-{index}, пропускаем")
+                del pending[update_id]
+                SHARD_UPDATES_DROPPED.inc(shard=index)
+                continue
+            self.queues[index].put(entry[0])
+            SHARD_UPDATES_REPLAYED.inc(shard=index)
+        SHARD_UPDATES_PENDING.set(len(pending), shard=index)
+
+    async def _stop_worker(self, index: int):
+        process = self.processes[index]
+        self.queues[index].put(None)
+        await asyncio.to_thread(process.join, WORKER_STOP_TIMEOUT)
+        if process.is_alive():
+            print(f"{process.name} не остановился за {WORKER_STOP_TIMEOUT} с, завершаем принудительно")
+            process.terminate()
+            await asyncio.to_thread(process.join)
+        SHARD_WORKER_UP.set(0, shard=index)
+
+    async def restart_worker(self, index: int):
+        # Новый процесс стартует только после выхода старого: порядок апдейтов чата сохраняется
+        self._restarting.add(index)
+        try:
+            await self._stop_worker(index)
+            if not self._stopping:
+                self._start_worker(index)
+                SHARD_WORKER_RESTARTS.inc(shard=index, reason='reload')
+        finally:
+            self._restarting.discard(index)
+
+    async def restart_workers(self):
+        # Поочередно, чтобы остальные обработчики продолжали работать
+        for index in range(self.workers):
+            await self.restart_worker(index)
+
+    async def _watch(self):
+        while not self._stopping:
+            await asyncio.sleep(WATCH_INTERVAL)
+            for index, process in enumerate(self.processes):
+                if index in self._restarting or self._stopping or process.is_alive():
+                    continue
+                print(f"{process.name} завершился с кодом {process.exitcode}, перезапускаем")
+                SHARD_WORKER_UP.set(0, shard=index)
+                # Упавший процесс мог оставить захваченными блокировку чтения очереди апдейтов
+                # и блокировку записи очереди подтверждений, поэтому новый обработчик получает новые
+                # очереди, а все неподтвержденные апдейты шарда — заново
+                self._collect_acks(index)
+                for queues in (self.queues, self.acks):
+                    old_queue = queues[index]
+                    queues[index] = self._context.Queue()
+                    old_queue.cancel_join_thread()
+                    old_queue.close()
+                self._replay(index)
+                self._start_worker(index)
+                SHARD_WORKER_RESTARTS.inc(shard=index, reason='crash')
+
+    async def stop(self):
+        self._stopping = True
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+        await asyncio.gather(*(self._stop_worker(index) for index in range(self.workers)
+                               if self.processes[index] is not None))
+        if self._ack_task is not None:
+            self._ack_task.cancel()
+
+    async def run(self, updates):
+        self.start()
+        try:
+            async for update in updates:
+                self.dispatch(update)
+        finally:
+            await self.stop()
+
+
+async def polling_updates(bot, timeout: int = POLLING_TIMEOUT):
+    offset = None
+    while True:
+        try:
+            updates = await bot.get_updates(offset=offset, timeout=timeout)
+        except Exception as e:
+            print(f"Ошибка при получении апдейтов: {e}")
+            await asyncio.sleep(POLLING_RETRY_DELAY)
+            continue
+        for update in updates:
+            offset = update.update_id + 1
+            yield update.to_python()
+
+
+async def webhook_updates(host: str, port: int, path: str, secret: str = ''):
+    from aiohttp import web
+
+    received = asyncio.Queue()
+
+    async def receive(request):
+        if secret and not hmac.compare_digest(request.headers.get('X-Telegram-Bot-Api-Secret-Token', ''), secret):
+            return web.Response(status=403)
+        received.put_nowait(await request.json())
+        return web.Response()
+
+    app = web.Application()
+    app.router.add_post(path, receive)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    try:
+        while True:
+            yield await received.get()
+    finally:
+        await runner.cleanup()
+
+
+async def fake_updates(count: int, chats: int, delay: float = 0.0):
+    # Локальная проверка без Telegram: текстовые сообщения со сквозной нумерацией внутри чата
+    sequence = {}
+    for update_id in range(1, count + 1):
+        chat_id = random.randrange(1, chats + 1)
+        sequence[chat_id] = sequence.get(chat_id, 0) + 1
+        yield {
+            'update_id': update_id,
+            'message': {
+                'message_id': sequence[chat_id],
+                'date': int(time.time()),
+                'chat': {'id': chat_id, 'type': 'private'},
+                'from': {'id': chat_id, 'is_bot': False, 'first_name': 'Fake'},
+                'text': str(sequence[chat_id]),
+            },
+        }
+        if delay:
+            await asyncio.sleep(delay)
+
+
+@asynccontextmanager
+async def checking_worker(work_seconds: float = 0.0):
+    # Обработчик для fake_updates: проверяет, что номера сообщений каждого чата идут подряд.
+    # После перезапуска процесс начинает с середины, поэтому первый номер чата не проверяется
+    last_seen = {}
+    errors = []
+    handled = 0
+
+    async def handle(update: dict):
+        nonlocal handled
+        message = update['message']
+        chat_id = message['chat']['id']
+        if chat_id in last_seen and message['message_id'] != last_seen[chat_id] + 1:
+            errors.append((chat_id, last_seen[chat_id], message['message_id']))
+        last_seen[chat_id] = message['message_id']
+        if work_seconds:
+            deadline = time.perf_counter() + work_seconds
+            while time.perf_counter() < deadline:
+                pass
+        handled += 1
+
+    try:
+        yield handle
+    finally:
+        status = 'порядок соблюден' if not errors else f'нарушений порядка: {len(errors)}'
+        print(f"pid {os.getpid()}: {handled} апдейтов, {len(last_seen)} чатов, {status}")
+
+
+async def run_sharded(workers: int):
+    from bot.bot import bot
+    from bot.config import metrics_port, webhook_host, webhook_port, webhook_secret, webhook_url
+    from database.changes import start_compaction
+    from database.migrations import run_migrations
+
+    # Миграции и сжатие журнала — один раз в диспетчере, а не в каждом обработчике
+    run_migrations()
+    compaction = start_compaction()
+    # /metrics диспетчера: состояние и перезапуски обработчиков, очередь неподтвержденных апдейтов
+    metrics = None
+    if metrics_port:
+        from monitoring.exporter import start_metrics_server
+        metrics = await start_metrics_server(metrics_port)
+    dispatcher = ShardedDispatcher(workers)
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGHUP, lambda: loop.create_task(dispatcher.restart_workers()))
+    if webhook_url:
+        from urllib.parse import urlparse
+
+        await bot.set_webhook(webhook_url, secret_token=webhook_secret or None, drop_pending_updates=True)
+        updates = webhook_updates(webhook_host, webhook_port, urlparse(webhook_url).path or '/', webhook_secret)
+    else:
+        await bot.delete_webhook(drop_pending_updates=True)
+        updates = polling_updates(bot)
+    try:
+        await dispatcher.run(updates)
+    finally:
+        compaction.cancel()
+        if metrics is not None:
+            await metrics.cleanup()
+        await (await bot.get_session()).close()
+
+
+async def _run_fake(workers: int, count: int, chats: int, work_ms: float, restart: bool):
+    from functools import partial
+
+    dispatcher = ShardedDispatcher(workers, partial(checking_worker, work_ms / 1000))
+    started = time.perf_counter()
+    dispatcher.start()
+    async for update in fake_updates(count, chats):
+        dispatcher.dispatch(update)
+        if restart and update['update_id'] == count // 2:
+            await dispatcher.restart_workers()
+    await dispatcher.stop()
+    print(f"{count} апдейтов, {workers} обработчиков: {time.perf_counter() - started:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Проверка шардирования бота на синтетических апдейтах')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--updates', type=int, default=10_000)
+    parser.add_argument('--chats', type=int, default=100)
+    parser.add_argument('--work-ms', type=float, default=0.0, help='CPU-нагрузка на один апдейт')
+    parser.add_argument('--restart', action='store_true', help='перезапустить обработчики посередине')
+    args = parser.parse_args()
+    asyncio.run(_run_fake(args.workers, args.updates, args.chats, args.work_ms, args.restart))
+
+
+if __name__ == '__main__':
+    main()
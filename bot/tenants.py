@@ -0,0 +1,68 @@
+import json
+import os
+import time
+from typing import Optional
+
+from bot.config import tenants_file
+
+# Без файла настроек работают два прежних пользователя, их данные принадлежат мастеру 1
+DEFAULT_TENANT_ID = 1
+DEFAULT_TENANTS = {
+    "users": {"424966792": DEFAULT_TENANT_ID, "440813374": DEFAULT_TENANT_ID},
+    "admins": [424966792, 440813374],
+}
+# Как часто проверять mtime файла: сама проверка доступа — только поиск в словаре
+TENANTS_RELOAD_INTERVAL = float(os.getenv("TENANTS_RELOAD_INTERVAL", "5"))
+
+_users = None
+_admins = None
+_mtime = None
+_next_check = 0.0
+
+
+def _file_mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def load_tenants(path: str = tenants_file):
+    global _users, _admins, _mtime
+    mtime = _file_mtime(path)
+    try:
+        config = DEFAULT_TENANTS
+        if mtime is not None:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        users = {int(user_id): int(tenant_id) for user_id, tenant_id in config.get("users", {}).items()}
+        admins = {int(user_id) for user_id in config.get("admins", [])}
+    except (OSError, ValueError, AttributeError, TypeError) as e:
+        # Битый файл не должен открыть доступ: остается прежний список, при первом запуске — пустой
+        print(f"Ошибка при чтении {path}: {e}")
+        if _users is None:
+            _users, _admins = {}, set()
+        _mtime = mtime
+        return _users
+    _users, _admins, _mtime = users, admins, mtime
+    return _users
+
+
+def _refresh():
+    global _next_check
+    now = time.monotonic()
+    if _users is not None and now < _next_check:
+        return
+    _next_check = now + TENANTS_RELOAD_INTERVAL
+    if _users is None or _file_mtime(tenants_file) != _mtime:
+        load_tenants()
+
+
+def get_tenant_id(user_id: int) -> Optional[int]:
+    _refresh()
+    return _users.get(int(user_id))
+
+
+def is_admin(user_id: int) -> bool:
+    _refresh()
+    return int(user_id) in _admins
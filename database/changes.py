@@ -0,0 +1,114 @@
+import asyncio
+import os
+import sqlite3
+from typing import Optional
+
+from database.database import get_db_connection
+from database.schedule_db import get_connection as get_schedule_connection
+
+# Журнал изменений ведется в каждой базе отдельно, seq у них независимые
+SOURCES = {
+    'clients': get_db_connection,
+    'schedule': get_schedule_connection,
+}
+
+# Записи журнала старше срока хранения удаляются; потребитель с более старым курсором делает полную выгрузку
+CHANGES_RETENTION_DAYS = int(os.getenv('CHANGES_RETENTION_DAYS', '30'))
+CHANGES_COMPACT_INTERVAL = int(os.getenv('CHANGES_COMPACT_INTERVAL', '3600'))
+
+_compaction_task = None
+
+
+def get_last_seq(source: str) -> int:
+    try:
+        with SOURCES[source]() as connection:
+            cursor = connection.cursor()
+            cursor.execute('SELECT MAX(seq) FROM changes')
+            value = cursor.fetchone()[0]
+            return value or 0
+    except sqlite3.Error as e:
+        print(f"Ошибка при чтении журнала изменений: {e}")
+        return 0
+
+
+def get_changes_since(tenant_id: Optional[int], source: str, since: int, limit: int = 500):
+    # seq общий для всех мастеров; tenant_id=None — журнал целиком для общего опроса живых обновлений
+    try:
+        with SOURCES[source]() as connection:
+            cursor = connection.cursor()
+            if tenant_id is None:
+                cursor.execute('''
+                SELECT seq, entity, op, row_id, payload, tenant_id
+                FROM changes
+                WHERE seq > ?
+                ORDER BY seq ASC
+                LIMIT ?
+                ''', (since, limit))
+            else:
+                cursor.execute('''
+                SELECT seq, entity, op, row_id, payload, tenant_id
+                FROM changes
+                WHERE tenant_id = ? AND seq > ?
+                ORDER BY seq ASC
+                LIMIT ?
+                ''', (tenant_id, since, limit))
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Ошибка при чтении журнала изменений: {e}")
+        return []
+
+
+def get_compacted_seq(source: str) -> int:
+    try:
+        with SOURCES[source]() as connection:
+            cursor = connection.cursor()
+            cursor.execute("SELECT value FROM changes_state WHERE name = 'compacted_seq'")
+            row = cursor.fetchone()
+            return int(row[0]) if row else 0
+    except sqlite3.Error as e:
+        print(f"Ошибка при чтении журнала изменений: {e}")
+        return 0
+
+
+def compact_changes(source: str, retention_days: int = CHANGES_RETENTION_DAYS) -> int:
+    try:
+        with SOURCES[source]() as connection:
+            cursor = connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('''
+            SELECT MAX(seq), MAX(created_at)
+            FROM changes
+            WHERE created_at < datetime('now', ?)
+            ''', (f'-{retention_days} days',))
+            seq, created_at = cursor.fetchone()
+            if seq is None:
+                connection.commit()
+                return 0
+            # Удаляем по seq, чтобы в журнале всегда оставался непрерывный хвост
+            cursor.execute('DELETE FROM changes WHERE seq <= ?', (seq,))
+            deleted = cursor.rowcount
+            cursor.executemany('''
+            INSERT INTO changes_state(name, value) VALUES (?, ?)
+            ON CONFLICT(name) DO UPDATE SET value = excluded.value
+            ''', [('compacted_seq', str(seq)), ('compacted_at', created_at)])
+            connection.commit()
+            return deleted
+    except sqlite3.Error as e:
+        print(f"Ошибка при сжатии журнала изменений: {e}")
+        return 0
+
+
+async def compaction_loop(interval: int = CHANGES_COMPACT_INTERVAL):
+    while True:
+        for source in SOURCES:
+            deleted = await asyncio.to_thread(compact_changes, source)
+            if deleted:
+                print(f"Журнал изменений {source}: удалено {deleted} старых записей")
+        await asyncio.sleep(interval)
+
+
+def start_compaction() -> asyncio.Task:
+    global _compaction_task
+    if _compaction_task is None or _compaction_task.done():
+        _compaction_task = asyncio.get_running_loop().create_task(compaction_loop())
+    return _compaction_task
@@ -0,0 +1,71 @@
+import os
+import random
+import sqlite3
+import time
+
+from monitoring.db import InstrumentedConnection, InstrumentedCursor
+
+# Базы открывают несколько процессов (uvicorn --workers, обработчики бота). В режиме WAL читатели
+# не мешают писателю, писатели ждут друг друга до BUSY_TIMEOUT_MS. Если блокировку не дождались,
+# первый оператор транзакции повторяется с экспоненциальной паузой и случайным разбросом
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', '5000'))
+WRITE_RETRIES = int(os.getenv('SQLITE_WRITE_RETRIES', '5'))
+WRITE_RETRY_DELAY = float(os.getenv('SQLITE_WRITE_RETRY_DELAY', '0.05'))
+
+_WRITE_OPERATIONS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'BEGIN')
+
+
+def is_locked_error(error: Exception) -> bool:
+    if not isinstance(error, sqlite3.OperationalError):
+        return False
+    message = str(error)
+    return 'locked' in message or 'busy' in message
+
+
+def retry_delay(attempt: int) -> float:
+    # Разброс разводит процессы, которые одновременно упёрлись в одну блокировку
+    return random.uniform(0, WRITE_RETRY_DELAY * 2 ** attempt)
+
+
+def _is_write(sql: str) -> bool:
+    parts = sql.split(None, 1)
+    return bool(parts) and parts[0].upper() in _WRITE_OPERATIONS
+
+
+class RetryingCursor(InstrumentedCursor):
+    def _retry(self, execute, sql, parameters):
+        # Повторять безопасно только оператор, открывающий транзакцию: до него она ничего не сделала.
+        # Операторы внутри уже начатой транзакции не повторяются — ошибка уходит вызывающему коду
+        if self.connection.in_transaction or not _is_write(sql):
+            return execute(sql, parameters)
+        for attempt in range(WRITE_RETRIES):
+            try:
+                return execute(sql, parameters)
+            except sqlite3.OperationalError as e:
+                if attempt == WRITE_RETRIES - 1 or not is_locked_error(e):
+                    raise
+                if self.connection.in_transaction:
+                    self.connection.rollback()
+                time.sleep(retry_delay(attempt))
+
+    def execute(self, sql, parameters=()):
+        return self._retry(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        # Итератор нельзя пройти повторно, поэтому параметры фиксируются списком
+        return self._retry(super().executemany, sql, list(seq_of_parameters))
+
+
+class SharedConnection(InstrumentedConnection):
+    def cursor(self, factory=RetryingCursor):
+        return super().cursor(factory)
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    return sqlite3.connect(db_path, factory=SharedConnection, timeout=BUSY_TIMEOUT_MS / 1000)
+
+
+def enable_wal(db_path: str) -> str:
+    # journal_mode=WAL хранится в самом файле базы, достаточно включить один раз до запуска процессов
+    with sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_MS / 1000) as connection:
+        return connection.execute('PRAGMA journal_mode=WAL').fetchone()[0]
@@ -0,0 +1,66 @@
+import sqlite3
+
+from database import schedule_db
+from database.database import get_db_connection, summarize_top_visits
+from database.series import series_month_days, with_series_day
+
+
+def get_dashboard(tenant_id: int, year: int, month: int, day_iso: str, top_limit: int = 10):
+    # Все данные первого экрана одним соединением: база расписания подключается через ATTACH,
+    # чтение идет в одной транзакции, поэтому ответ согласован между таблицами
+    month_start = f"{year:04d}-{month:02d}-01"
+    month_key = f"{year:04d}-{month:02d}"
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('ATTACH DATABASE ? AS schedule', (schedule_db.DB_PATH,))
+            cursor.execute('BEGIN')
+            cursor.execute('''
+            SELECT id, name, link, time, day_rec, prepayment
+            FROM clients
+            WHERE tenant_id = ? AND DATE(day_rec) = DATE(?)
+            ORDER BY time ASC
+            ''', (tenant_id, day_iso))
+            day_clients = with_series_day(cursor.fetchall(), cursor, tenant_id, day_iso)
+            cursor.execute('''
+            SELECT strftime('%d', day_rec) as d
+            FROM clients
+            WHERE tenant_id = ? AND DATE(day_rec) BETWEEN DATE(?) AND DATE( DATE(?, '+1 month', '-1 day') )
+            GROUP BY d
+            ''', (tenant_id, month_start, month_start))
+            marked_days = {int(r[0]) for r in cursor.fetchall() if r and r[0] is not None}
+            marked_days |= series_month_days(cursor, tenant_id, year, month)
+            cursor.execute('''
+            SELECT day FROM schedule.schedule_days
+            WHERE tenant_id=? AND year=? AND month=?
+            ORDER BY day ASC
+            ''', (tenant_id, year, month))
+            selected_days = {int(r[0]) for r in cursor.fetchall()}
+            cursor.execute('SELECT weekday, slots FROM schedule.schedule_slots WHERE tenant_id=? ORDER BY weekday ASC',
+                           (tenant_id,))
+            slots = {}
+            for weekday, slots_text in cursor.fetchall():
+                parts = [s.strip() for s in (slots_text or "").split(",") if s.strip()]
+                if parts:
+                    slots[int(weekday)] = parts
+            cursor.execute('SELECT SUM(amount) FROM salary WHERE tenant_id = ? AND date = ?', (tenant_id, month_key))
+            salary_total = cursor.fetchone()[0] or 0
+            cursor.execute('SELECT SUM(amount) FROM expenses WHERE tenant_id = ? AND date = ?', (tenant_id, month_key))
+            expenses_total = cursor.fetchone()[0] or 0
+            cursor.execute('SELECT link FROM clients WHERE tenant_id = ?', (tenant_id,))
+            top_visits = summarize_top_visits(cursor.fetchall(), top_limit)
+            connection.commit()
+            cursor.execute('DETACH DATABASE schedule')
+    except sqlite3.Error as e:
+        print(f"Ошибка при получении данных для дашборда: {e}")
+        return None
+    return {
+        'month_key': month_key,
+        'day_clients': day_clients,
+        'marked_days': marked_days,
+        'selected_days': selected_days,
+        'slots': slots,
+        'salary_total': salary_total,
+        'expenses_total': expenses_total,
+        'top_visits': top_visits,
+    }
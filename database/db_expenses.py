@@ -52,5 +52,3 @@ def remove_last_expenses_from_db(month_year):
             connection.commit()
     except sqlite3.Error as e:
         print(f"Ошибка при удалении последней траты: {e}")
-
-create_expenses_table()
@@ -1,13 +1,23 @@
 import sqlite3
 
-def delete_client(client_link):
+from database.database import _normalize_link_base, get_db_connection
+
+def delete_client(tenant_id: int, client_link):
+    # Удаляются записи с любым написанием ссылки: @name, t.me/name, https://telegram.me/Name
+    link_base = _normalize_link_base(client_link)
+    if not link_base:
+        return False
     try:
-        with sqlite3.connect('database_client.db') as connection:
+        with get_db_connection() as connection:
             cursor = connection.cursor()
 
-            cursor.execute('DELETE FROM clients WHERE LINK = ?', (client_link,))
+            cursor.execute('DELETE FROM clients WHERE tenant_id = ? AND link_base = ?', (tenant_id, link_base))
+            deleted = cursor.rowcount
+            # Вместе с записями клиента удаляются и его повторяющиеся серии
+            cursor.execute('DELETE FROM client_series WHERE tenant_id = ? AND link_base = ?', (tenant_id, link_base))
+            deleted += cursor.rowcount
 
-            if cursor.rowcount:
+            if deleted:
                 return True
             return False
     except sqlite3.Error as e:
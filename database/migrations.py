@@ -0,0 +1,613 @@
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+
+from database import database, schedule_db
+from database.connection import BUSY_TIMEOUT_MS, enable_wal
+
+
+def _clients_initial_schema(connection):
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS clients (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name TEXT,
+        link TEXT,
+        time TEXT,
+        day_rec TEXT,
+        prepayment REAL DEFAULT 0
+    )
+    ''')
+    # Старые базы создавались без колонки prepayment
+    columns = [row[1] for row in connection.execute('PRAGMA table_info(clients)')]
+    if 'prepayment' not in columns:
+        connection.execute('ALTER TABLE clients ADD COLUMN prepayment REAL DEFAULT 0')
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS salary (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount INTEGER,
+        date TEXT
+    )
+    ''')
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS expenses (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        amount INTEGER,
+        date TEXT
+    )
+    ''')
+
+
+def _clients_day_index(connection):
+    # Выражение совпадает с WHERE в request_for_date, поэтому индекс используется
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_clients_day ON clients(DATE(day_rec))')
+
+
+def _create_changes_table(connection):
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS changes (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        entity TEXT NOT NULL,
+        op TEXT NOT NULL,
+        row_id INTEGER,
+        payload TEXT,
+        created_at TEXT NOT NULL DEFAULT (datetime('now'))
+    )
+    ''')
+
+
+def _clients_changes_log(connection):
+    # Журнал изменений пишут триггеры, поэтому в него попадают записи и из бота, и из веб-API
+    _create_changes_table(connection)
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS clients_log_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload) VALUES ('client', 'insert', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS clients_log_update AFTER UPDATE ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload) VALUES ('client', 'update', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment, 'old_day_rec', OLD.day_rec));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS clients_log_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload) VALUES ('client', 'delete', OLD.id, json_object(
+            'id', OLD.id, 'day_rec', OLD.day_rec));
+    END
+    ''')
+    for table in ('salary', 'expenses'):
+        connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_log_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO changes(entity, op, row_id, payload)
+            VALUES ('{table}', 'insert', NEW.id, json_object('month', NEW.date));
+        END
+        ''')
+        connection.execute(f'''
+        CREATE TRIGGER IF NOT EXISTS {table}_log_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO changes(entity, op, row_id, payload)
+            VALUES ('{table}', 'delete', OLD.id, json_object('month', OLD.date));
+        END
+        ''')
+
+
+CHANGES_TIMESTAMP = "strftime('%Y-%m-%d %H:%M:%f', 'now')"
+CLIENT_FIELDS = 'name, link, time, day_rec, prepayment'
+
+
+def _clients_updated_at(connection):
+    connection.execute('ALTER TABLE clients ADD COLUMN updated_at TEXT')
+    # Журнал и updated_at реагируют только на поля записи, иначе проставление updated_at
+    # само попадало бы в журнал. Время в журнале с миллисекундами, как и в updated_at
+    for name in ('clients_log_insert', 'clients_log_update', 'clients_log_delete'):
+        connection.execute(f'DROP TRIGGER IF EXISTS {name}')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload, created_at) VALUES ('client', 'insert', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_update AFTER UPDATE OF {CLIENT_FIELDS} ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload, created_at) VALUES ('client', 'update', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment, 'old_day_rec', OLD.day_rec), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO changes(entity, op, row_id, payload, created_at) VALUES ('client', 'delete', OLD.id, json_object(
+            'id', OLD.id, 'day_rec', OLD.day_rec), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    connection.execute(f'UPDATE clients SET updated_at = {CHANGES_TIMESTAMP}')
+    connection.execute(f'''
+    CREATE TRIGGER clients_touch_insert AFTER INSERT ON clients WHEN NEW.updated_at IS NULL BEGIN
+        UPDATE clients SET updated_at = {CHANGES_TIMESTAMP} WHERE id = NEW.id;
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_touch_update AFTER UPDATE OF {CLIENT_FIELDS} ON clients BEGIN
+        UPDATE clients SET updated_at = {CHANGES_TIMESTAMP} WHERE id = NEW.id;
+    END
+    ''')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_clients_updated_at ON clients(updated_at)')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_changes_entity_op ON changes(entity, op, created_at)')
+
+
+def _schedule_changes_log(connection):
+    _create_changes_table(connection)
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS schedule_days_log_insert AFTER INSERT ON schedule_days BEGIN
+        INSERT INTO changes(entity, op, payload) VALUES ('schedule_day', 'insert', json_object(
+            'year', NEW.year, 'month', NEW.month, 'day', NEW.day));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS schedule_days_log_delete AFTER DELETE ON schedule_days BEGIN
+        INSERT INTO changes(entity, op, payload) VALUES ('schedule_day', 'delete', json_object(
+            'year', OLD.year, 'month', OLD.month, 'day', OLD.day));
+    END
+    ''')
+
+
+def _create_changes_state(connection):
+    # До какого seq и времени журнал уже сжат: потребителю с более старым курсором нужна полная выгрузка
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS changes_state (
+        name TEXT PRIMARY KEY,
+        value TEXT
+    )
+    ''')
+
+
+def _clients_changes_compaction(connection):
+    _create_changes_state(connection)
+
+
+def _schedule_changes_slots(connection):
+    _create_changes_state(connection)
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_changes_entity_op ON changes(entity, op, created_at)')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS schedule_slots_log_insert AFTER INSERT ON schedule_slots BEGIN
+        INSERT INTO changes(entity, op, payload) VALUES ('schedule_slots', 'insert', json_object(
+            'weekday', NEW.weekday, 'slots', NEW.slots));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS schedule_slots_log_update AFTER UPDATE ON schedule_slots
+    WHEN OLD.slots IS NOT NEW.slots BEGIN
+        INSERT INTO changes(entity, op, payload) VALUES ('schedule_slots', 'update', json_object(
+            'weekday', NEW.weekday, 'slots', NEW.slots));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER IF NOT EXISTS schedule_slots_log_delete AFTER DELETE ON schedule_slots BEGIN
+        INSERT INTO changes(entity, op, payload) VALUES ('schedule_slots', 'delete', json_object(
+            'weekday', OLD.weekday));
+    END
+    ''')
+
+
+# Данные, созданные до разделения по мастерам, принадлежат мастеру 1
+TENANT_COLUMN = 'tenant_id INTEGER NOT NULL DEFAULT 1'
+
+
+def _changes_tenant_indexes(connection):
+    # Журнал читается по мастеру: хвост по seq и удаления клиентов по времени
+    connection.execute('DROP INDEX IF EXISTS idx_changes_entity_op')
+    connection.execute('CREATE INDEX IF NOT EXISTS idx_changes_tenant_seq ON changes(tenant_id, seq)')
+    connection.execute(
+        'CREATE INDEX IF NOT EXISTS idx_changes_tenant_entity_op ON changes(tenant_id, entity, op, created_at)'
+    )
+
+
+def _clients_tenants(connection):
+    for table in ('clients', 'salary', 'expenses', 'changes'):
+        connection.execute(f'ALTER TABLE {table} ADD COLUMN {TENANT_COLUMN}')
+    # tenant_id впереди каждого индекса: запрос одного мастера читает только его диапазон,
+    # и время ответа не растет с числом мастеров
+    for name in ('idx_clients_day', 'idx_clients_updated_at'):
+        connection.execute(f'DROP INDEX IF EXISTS {name}')
+    connection.execute('CREATE INDEX idx_clients_tenant_day ON clients(tenant_id, DATE(day_rec))')
+    connection.execute('CREATE INDEX idx_clients_tenant_updated_at ON clients(tenant_id, updated_at)')
+    connection.execute('CREATE INDEX idx_clients_tenant_link ON clients(tenant_id, link)')
+    connection.execute('CREATE INDEX idx_salary_tenant_date ON salary(tenant_id, date)')
+    connection.execute('CREATE INDEX idx_expenses_tenant_date ON expenses(tenant_id, date)')
+    _changes_tenant_indexes(connection)
+
+    names = ['clients_log_insert', 'clients_log_update', 'clients_log_delete']
+    names += [f'{table}_log_{op}' for table in ('salary', 'expenses') for op in ('insert', 'delete')]
+    for name in names:
+        connection.execute(f'DROP TRIGGER IF EXISTS {name}')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+        VALUES (NEW.tenant_id, 'client', 'insert', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_update AFTER UPDATE OF {CLIENT_FIELDS} ON clients BEGIN
+        INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+        VALUES (NEW.tenant_id, 'client', 'update', NEW.id, json_object(
+            'id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time,
+            'day_rec', NEW.day_rec, 'prepayment', NEW.prepayment, 'old_day_rec', OLD.day_rec), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_log_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+        VALUES (OLD.tenant_id, 'client', 'delete', OLD.id, json_object(
+            'id', OLD.id, 'day_rec', OLD.day_rec), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    for table in ('salary', 'expenses'):
+        connection.execute(f'''
+        CREATE TRIGGER {table}_log_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO changes(tenant_id, entity, op, row_id, payload)
+            VALUES (NEW.tenant_id, '{table}', 'insert', NEW.id, json_object('month', NEW.date));
+        END
+        ''')
+        connection.execute(f'''
+        CREATE TRIGGER {table}_log_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO changes(tenant_id, entity, op, row_id, payload)
+            VALUES (OLD.tenant_id, '{table}', 'delete', OLD.id, json_object('month', OLD.date));
+        END
+        ''')
+
+
+def _schedule_tenants(connection):
+    # Первичные ключи расписания меняются на (tenant_id, ...), поэтому таблицы пересоздаются.
+    # Их триггеры удаляются вместе со старыми таблицами; неявное удаление строк при DROP триггеры не вызывает
+    connection.execute(f'ALTER TABLE changes ADD COLUMN {TENANT_COLUMN}')
+    _changes_tenant_indexes(connection)
+    connection.execute('''
+    CREATE TABLE schedule_days_new (
+        tenant_id INTEGER NOT NULL,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        PRIMARY KEY (tenant_id, year, month, day)
+    )
+    ''')
+    connection.execute('''
+    CREATE TABLE schedule_slots_new (
+        tenant_id INTEGER NOT NULL,
+        weekday INTEGER NOT NULL,
+        slots TEXT NOT NULL,
+        PRIMARY KEY (tenant_id, weekday)
+    )
+    ''')
+    connection.execute('INSERT INTO schedule_days_new SELECT 1, year, month, day FROM schedule_days')
+    connection.execute('INSERT INTO schedule_slots_new SELECT 1, weekday, slots FROM schedule_slots')
+    for table in ('schedule_days', 'schedule_slots'):
+        connection.execute(f'DROP TABLE {table}')
+        connection.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+    connection.execute('''
+    CREATE TRIGGER schedule_days_log_insert AFTER INSERT ON schedule_days BEGIN
+        INSERT INTO changes(tenant_id, entity, op, payload) VALUES (NEW.tenant_id, 'schedule_day', 'insert', json_object(
+            'year', NEW.year, 'month', NEW.month, 'day', NEW.day));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER schedule_days_log_delete AFTER DELETE ON schedule_days BEGIN
+        INSERT INTO changes(tenant_id, entity, op, payload) VALUES (OLD.tenant_id, 'schedule_day', 'delete', json_object(
+            'year', OLD.year, 'month', OLD.month, 'day', OLD.day));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER schedule_slots_log_insert AFTER INSERT ON schedule_slots BEGIN
+        INSERT INTO changes(tenant_id, entity, op, payload) VALUES (NEW.tenant_id, 'schedule_slots', 'insert', json_object(
+            'weekday', NEW.weekday, 'slots', NEW.slots));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER schedule_slots_log_update AFTER UPDATE ON schedule_slots
+    WHEN OLD.slots IS NOT NEW.slots BEGIN
+        INSERT INTO changes(tenant_id, entity, op, payload) VALUES (NEW.tenant_id, 'schedule_slots', 'update', json_object(
+            'weekday', NEW.weekday, 'slots', NEW.slots));
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER schedule_slots_log_delete AFTER DELETE ON schedule_slots BEGIN
+        INSERT INTO changes(tenant_id, entity, op, payload) VALUES (OLD.tenant_id, 'schedule_slots', 'delete', json_object(
+            'weekday', OLD.weekday));
+    END
+    ''')
+
+
+def _clients_series(connection):
+    # Повторяющаяся запись хранится одним правилом: первая дата, шаг в неделях, последняя дата.
+    # Вхождения не материализуются, request_for_date разворачивает их на запрошенный диапазон
+    connection.execute('''
+    CREATE TABLE client_series (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        tenant_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        link TEXT NOT NULL,
+        time TEXT NOT NULL,
+        start_date TEXT NOT NULL,
+        end_date TEXT,
+        interval_weeks INTEGER NOT NULL DEFAULT 1 CHECK (interval_weeks > 0),
+        prepayment REAL DEFAULT 0
+    )
+    ''')
+    connection.execute('CREATE INDEX idx_client_series_tenant_start ON client_series(tenant_id, start_date)')
+    # Исключение относится к одному вхождению (day): отмена или перенос на new_day / new_time
+    connection.execute('''
+    CREATE TABLE client_series_exceptions (
+        series_id INTEGER NOT NULL REFERENCES client_series(id) ON DELETE CASCADE,
+        day TEXT NOT NULL,
+        cancelled INTEGER NOT NULL DEFAULT 0,
+        new_day TEXT,
+        new_time TEXT,
+        PRIMARY KEY (series_id, day)
+    )
+    ''')
+    connection.execute(
+        'CREATE INDEX idx_client_series_exceptions_new_day ON client_series_exceptions(new_day) WHERE new_day IS NOT NULL'
+    )
+    # Внешние ключи в проекте не включены, поэтому исключения удаляются вместе с серией триггером
+    connection.execute('''
+    CREATE TRIGGER client_series_delete_exceptions AFTER DELETE ON client_series BEGIN
+        DELETE FROM client_series_exceptions WHERE series_id = OLD.id;
+    END
+    ''')
+
+
+def _clients_search(connection):
+    # Поиск по имени и ссылке: триграммный FTS5-индекс поверх clients (строки не дублируются,
+    # content_rowid = clients.id), триггеры держат его в согласии с таблицей
+    connection.execute('''
+    CREATE VIRTUAL TABLE clients_fts USING fts5(
+        name, link, content='clients', content_rowid='id', tokenize='trigram'
+    )
+    ''')
+    connection.execute('''
+    CREATE TRIGGER clients_fts_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, link) VALUES (NEW.id, NEW.name, NEW.link);
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER clients_fts_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, link) VALUES ('delete', OLD.id, OLD.name, OLD.link);
+    END
+    ''')
+    connection.execute('''
+    CREATE TRIGGER clients_fts_update AFTER UPDATE OF name, link ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, link) VALUES ('delete', OLD.id, OLD.name, OLD.link);
+        INSERT INTO clients_fts(rowid, name, link) VALUES (NEW.id, NEW.name, NEW.link);
+    END
+    ''')
+    connection.execute("INSERT INTO clients_fts(clients_fts) VALUES ('rebuild')")
+    # Поиск по началу имени (в том числе короче трех символов) идет по обычному индексу
+    connection.execute('CREATE INDEX idx_clients_tenant_name ON clients(tenant_id, name)')
+
+
+def _clients_series_log(connection):
+    # Серии и исключения пишутся в журнал changes, как clients: по нему живут живые обновления,
+    # дельта мини-приложения и кеш inline-поиска. У исключения нет своего tenant_id, он берется у серии;
+    # при удалении серии ее исключения уходят без отдельных записей — хватает события серии
+    series_payload = (
+        "json_object('id', NEW.id, 'name', NEW.name, 'link', NEW.link, 'time', NEW.time, "
+        "'start_date', NEW.start_date, 'end_date', NEW.end_date, 'interval_weeks', NEW.interval_weeks, "
+        "'prepayment', NEW.prepayment)"
+    )
+    for op in ('insert', 'update'):
+        connection.execute(f'''
+        CREATE TRIGGER client_series_log_{op} AFTER {op.upper()} ON client_series BEGIN
+            INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+            VALUES (NEW.tenant_id, 'series', '{op}', NEW.id, {series_payload}, {CHANGES_TIMESTAMP});
+        END
+        ''')
+    connection.execute(f'''
+    CREATE TRIGGER client_series_log_delete AFTER DELETE ON client_series BEGIN
+        INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+        VALUES (OLD.tenant_id, 'series', 'delete', OLD.id, json_object('id', OLD.id), {CHANGES_TIMESTAMP});
+    END
+    ''')
+    exception_payload = (
+        "json_object('series_id', {row}.series_id, 'day', {row}.day, 'cancelled', {row}.cancelled, "
+        "'new_day', {row}.new_day, 'new_time', {row}.new_time)"
+    )
+    for op, row in (('insert', 'NEW'), ('update', 'NEW'), ('delete', 'OLD')):
+        connection.execute(f'''
+        CREATE TRIGGER client_series_exceptions_log_{op} AFTER {op.upper()} ON client_series_exceptions BEGIN
+            INSERT INTO changes(tenant_id, entity, op, row_id, payload, created_at)
+            SELECT tenant_id, 'series_exception', '{op}', id, {exception_payload.format(row=row)}, {CHANGES_TIMESTAMP}
+            FROM client_series WHERE id = {row}.series_id;
+        END
+        ''')
+
+
+# rowid строки в clients_fts: (tenant_id << FTS_TENANT_SHIFT) + clients.id. Строки одного мастера
+# лежат подряд, и MATCH с условием на диапазон rowid читает только их. id клиентов меньше 2**32,
+# tenant_id — меньше 2**31
+FTS_TENANT_SHIFT = 32
+
+
+def _clients_search_tenants(connection):
+    # clients_fts из шага 8 общий: MATCH перебирал совпадения всех мастеров. Индекс пересоздается
+    # без хранения строк (content=''), с rowid по мастеру; имя и ссылка по-прежнему берутся из clients
+    for trigger in ('insert', 'delete', 'update'):
+        connection.execute(f'DROP TRIGGER clients_fts_{trigger}')
+    connection.execute('DROP TABLE clients_fts')
+    connection.execute('''
+    CREATE VIRTUAL TABLE clients_fts USING fts5(name, link, content='', tokenize='trigram')
+    ''')
+    new_rowid = f'(NEW.tenant_id << {FTS_TENANT_SHIFT}) + NEW.id'
+    old_rowid = f'(OLD.tenant_id << {FTS_TENANT_SHIFT}) + OLD.id'
+    connection.execute(f'''
+    CREATE TRIGGER clients_fts_insert AFTER INSERT ON clients BEGIN
+        INSERT INTO clients_fts(rowid, name, link) VALUES ({new_rowid}, NEW.name, NEW.link);
+    END
+    ''')
+    # Из индекса без строк удаляют, передавая те же значения, что были вставлены
+    connection.execute(f'''
+    CREATE TRIGGER clients_fts_delete AFTER DELETE ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, link) VALUES ('delete', {old_rowid}, OLD.name, OLD.link);
+    END
+    ''')
+    connection.execute(f'''
+    CREATE TRIGGER clients_fts_update AFTER UPDATE OF tenant_id, name, link ON clients BEGIN
+        INSERT INTO clients_fts(clients_fts, rowid, name, link) VALUES ('delete', {old_rowid}, OLD.name, OLD.link);
+        INSERT INTO clients_fts(rowid, name, link) VALUES ({new_rowid}, NEW.name, NEW.link);
+    END
+    ''')
+    connection.execute(f'''
+    INSERT INTO clients_fts(rowid, name, link)
+    SELECT (tenant_id << {FTS_TENANT_SHIFT}) + id, name, link FROM clients
+    ''')
+
+
+def _clients_link_base(connection):
+    # Ссылка в виде для сравнения: без схемы, t.me/ или telegram.me/ и @, в нижнем регистре.
+    # Ее пишет код на Python (database._normalize_link_base) при каждой записи, здесь — заполнение
+    # для уже сохраненных строк той же функцией
+    connection.create_function('normalize_link', 1, database._normalize_link_base, deterministic=True)
+    for table in ('clients', 'client_series'):
+        connection.execute(f"ALTER TABLE {table} ADD COLUMN link_base TEXT NOT NULL DEFAULT ''")
+        connection.execute(f'UPDATE {table} SET link_base = normalize_link(link)')
+    connection.execute('DROP INDEX idx_clients_tenant_link')
+    connection.execute('CREATE INDEX idx_clients_tenant_link_base ON clients(tenant_id, link_base)')
+    connection.execute('CREATE INDEX idx_client_series_tenant_link_base ON client_series(tenant_id, link_base)')
+
+
+def _schedule_initial_schema(connection):
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS schedule_days (
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        PRIMARY KEY (year, month, day)
+    )
+    ''')
+    connection.execute('''
+    CREATE TABLE IF NOT EXISTS schedule_slots (
+        weekday INTEGER PRIMARY KEY,
+        slots TEXT NOT NULL
+    )
+    ''')
+
+
+# Шаги применяются по возрастанию версии, номер последнего шага пишется в PRAGMA user_version.
+# Уже выпущенные шаги не меняются — только добавляются новые в конец списка.
+CLIENTS_MIGRATIONS = [
+    (1, 'clients, salary, expenses', _clients_initial_schema),
+    (2, 'индекс clients по дате записи', _clients_day_index),
+    (3, 'журнал изменений changes', _clients_changes_log),
+    (4, 'clients.updated_at для синхронизации', _clients_updated_at),
+    (5, 'changes_state для сжатия журнала', _clients_changes_compaction),
+    (6, 'tenant_id во всех таблицах и индексах', _clients_tenants),
+    (7, 'повторяющиеся записи client_series', _clients_series),
+    (8, 'полнотекстовый поиск clients_fts', _clients_search),
+    (9, 'журнал изменений для client_series', _clients_series_log),
+    (10, 'clients_fts с rowid по мастеру', _clients_search_tenants),
+    (11, 'clients.link_base для сравнения ссылок', _clients_link_base),
+]
+
+SCHEDULE_MIGRATIONS = [
+    (1, 'schedule_days, schedule_slots', _schedule_initial_schema),
+    (2, 'журнал изменений changes', _schedule_changes_log),
+    (3, 'журнал для schedule_slots, changes_state', _schedule_changes_slots),
+    (4, 'tenant_id во всех таблицах и индексах', _schedule_tenants),
+]
+
+
+def get_databases():
+    return [
+        (database.DB_PATH, CLIENTS_MIGRATIONS),
+        (schedule_db.DB_PATH, SCHEDULE_MIGRATIONS),
+    ]
+
+
+_migrated = False
+
+
+def get_user_version(db_path: str) -> int:
+    with sqlite3.connect(db_path) as connection:
+        return connection.execute('PRAGMA user_version').fetchone()[0]
+
+
+def pending_migrations(db_path: str, steps):
+    current = get_user_version(db_path) if os.path.exists(db_path) else 0
+    return [step for step in steps if step[0] > current]
+
+
+def backup_database(db_path: str, version: int) -> str:
+    stamp = datetime.now().strftime('%Y%m%d%H%M%S')
+    backup_path = f"{db_path}.v{version}-{stamp}.bak"
+    with sqlite3.connect(db_path) as source, sqlite3.connect(backup_path) as target:
+        source.backup(target)
+    return backup_path
+
+
+def migrate(db_path: str, steps, dry_run: bool = False, backup: bool = True):
+    pending = pending_migrations(db_path, steps)
+    if not pending or dry_run:
+        return pending
+    if backup and os.path.exists(db_path) and os.path.getsize(db_path) > 0:
+        backup_database(db_path, get_user_version(db_path))
+
+    applied = []
+    connection = sqlite3.connect(db_path, isolation_level=None, timeout=BUSY_TIMEOUT_MS / 1000)
+    try:
+        for step in pending:
+            version, _, apply = step
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                # Другой процесс мог успеть применить шаг, пока мы ждали блокировку
+                if connection.execute('PRAGMA user_version').fetchone()[0] >= version:
+                    connection.execute('ROLLBACK')
+                    continue
+                apply(connection)
+                connection.execute(f'PRAGMA user_version = {int(version)}')
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+            applied.append(step)
+    finally:
+        connection.close()
+    return applied
+
+
+def run_migrations(dry_run: bool = False, backup: bool = True):
+    global _migrated
+    if _migrated and not dry_run:
+        return {}
+    result = {}
+    for db_path, steps in get_databases():
+        result[db_path] = migrate(db_path, steps, dry_run=dry_run, backup=backup)
+        if not dry_run:
+            enable_wal(db_path)
+    if not dry_run:
+        _migrated = True
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Миграции схем SQLite')
+    parser.add_argument('--dry-run', action='store_true', help='показать невыполненные шаги и выйти')
+    parser.add_argument('--no-backup', action='store_true', help='не делать резервную копию перед миграцией')
+    args = parser.parse_args()
+
+    result = run_migrations(dry_run=args.dry_run, backup=not args.no_backup)
+    for db_path, steps in result.items():
+        if not steps:
+            print(f"{db_path}: схема актуальна")
+            continue
+        verb = 'будут применены' if args.dry_run else 'применены'
+        print(f"{db_path}: {verb} шаги")
+        for version, description, _ in steps:
+            print(f"  v{version}: {description}")
+
+
+if __name__ == '__main__':
+    main()
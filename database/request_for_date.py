@@ -1,18 +1,27 @@
 import sqlite3
+from datetime import date, timedelta
 
-def get_clients_by_date_range(start_date, end_date):
+from database.database import _normalize_link_base, get_db_connection
+from database.series import expand_series, series_delta, series_month_days, with_series_day, with_series_range
+
+# Насколько вперед разворачиваются повторяющиеся записи при поиске ближайших визитов
+UPCOMING_SERIES_DAYS = 8 * 7
+
+def get_clients_by_date_range(tenant_id: int, start_date, end_date):
     try:
-        with sqlite3.connect('database_client.db') as connection:
+        with get_db_connection() as connection:
             cursor = connection.cursor()
 
             cursor.execute('''
-            SELECT * FROM clients
-            WHERE DATE(day_rec) BETWEEN ? AND ?
+            SELECT id, name, link, time, day_rec, prepayment
+            FROM clients
+            WHERE tenant_id = ? AND DATE(day_rec) BETWEEN ? AND ?
             ORDER BY day_rec ASC
-            ''', (start_date, end_date))
+            ''', (tenant_id, start_date, end_date))
 
             rows = cursor.fetchall()
-            return rows
+            # Повторяющиеся записи разворачиваются только на этот диапазон и вливаются по дате
+            return with_series_range(rows, cursor, tenant_id, start_date, end_date)
     except sqlite3.OperationalError as e:
         print(f"Ошибка при выполнении запроса: {e}")
         return []
@@ -21,35 +30,124 @@ def get_clients_by_date_range(start_date, end_date):
         return []
 
 
-def get_clients_by_day(day_iso: str):
+def get_clients_by_day(tenant_id: int, day_iso: str):
     try:
-        with sqlite3.connect('database_client.db') as connection:
+        with get_db_connection() as connection:
             cursor = connection.cursor()
             cursor.execute('''
             SELECT id, name, link, time, day_rec, prepayment
             FROM clients
-            WHERE DATE(day_rec) = DATE(?)
+            WHERE tenant_id = ? AND DATE(day_rec) = DATE(?)
             ORDER BY time ASC
-            ''', (day_iso,))
-            return cursor.fetchall()
+            ''', (tenant_id, day_iso))
+            return with_series_day(cursor.fetchall(), cursor, tenant_id, day_iso)
     except sqlite3.Error as e:
         print(f"Ошибка при получении клиентов за день: {e}")
         return []
 
-def get_marked_days_for_month(year: int, month: int):
+def get_marked_days_for_month(tenant_id: int, year: int, month: int):
     try:
-        with sqlite3.connect('database_client.db') as connection:
+        with get_db_connection() as connection:
             cursor = connection.cursor()
             start = f"{year:04d}-{month:02d}-01"
             cursor.execute('''
             SELECT strftime('%d', day_rec) as d
             FROM clients
-            WHERE DATE(day_rec) BETWEEN DATE(?) AND DATE( DATE(?, '+1 month', '-1 day') )
+            WHERE tenant_id = ? AND DATE(day_rec) BETWEEN DATE(?) AND DATE( DATE(?, '+1 month', '-1 day') )
             GROUP BY d
-            ''', (start, start))
+            ''', (tenant_id, start, start))
             rows = cursor.fetchall()
-            return {int(r[0]) for r in rows if r and r[0] is not None}
+            days = {int(r[0]) for r in rows if r and r[0] is not None}
+            return days | series_month_days(cursor, tenant_id, year, month)
     except sqlite3.Error as e:
         print(f"Ошибка при получении дней с записями: {e}")
         return set()
 
+
+
+def get_upcoming_visits(tenant_id: int, links, start_iso: str, per_link: int = 3):
+    # Ближайшие визиты (день, время) с start_iso по каждой ссылке; ключ — ссылка в виде _normalize_link_base,
+    # записи с любым написанием ссылки находятся по clients.link_base
+    bases = {_normalize_link_base(link) for link in links} - {''}
+    if not bases:
+        return {}
+    end_iso = (date.fromisoformat(start_iso) + timedelta(days=UPCOMING_SERIES_DAYS)).isoformat()
+    visits = {}
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute(f'''
+            SELECT link_base, day_rec, time
+            FROM clients
+            WHERE tenant_id = ? AND link_base IN ({', '.join('?' * len(bases))}) AND DATE(day_rec) >= DATE(?)
+            ''', (tenant_id, *bases, start_iso))
+            rows = cursor.fetchall()
+            # Разворачиваются только серии найденных ссылок, а не все серии мастера
+            occurrences = expand_series(cursor, tenant_id, start_iso, end_iso, bases)
+            rows += [(_normalize_link_base(row[2]), row[4], row[3]) for row in occurrences]
+    except sqlite3.Error as e:
+        print(f"Ошибка при получении ближайших визитов: {e}")
+        return {}
+    for base, day_rec, time in rows:
+        visits.setdefault(base, []).append((day_rec, time))
+    return {base: sorted(items)[:per_link] for base, items in visits.items()}
+
+
+def _delta_seq(updated_since):
+    # Курсор — seq журнала; прежний курсор-время или мусор означает полную выгрузку
+    try:
+        return int(updated_since)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_clients_delta(tenant_id: int, updated_since=None):
+    # Изменившиеся и удаленные записи и серии по журналу changes. Курсор — seq, до которого журнал просмотрен:
+    # записи журнала нумеруются в порядке коммитов, поэтому правки с одинаковым updated_at не теряются
+    since = _delta_seq(updated_since)
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('BEGIN')
+            cursor.execute('SELECT COALESCE(MAX(seq), 0) FROM changes')
+            last_seq = cursor.fetchone()[0]
+            if since is not None:
+                # Удаления из сжатой части журнала уже не восстановить: отдаем все записи заново
+                cursor.execute("SELECT value FROM changes_state WHERE name = 'compacted_seq'")
+                compacted = cursor.fetchone()
+                if compacted and since < int(compacted[0]):
+                    since = None
+            deleted = []
+            if since is None:
+                cursor.execute('''
+                SELECT id, name, link, time, day_rec, prepayment
+                FROM clients
+                WHERE tenant_id = ?
+                ORDER BY id ASC
+                ''', (tenant_id,))
+                rows = cursor.fetchall()
+            else:
+                cursor.execute('''
+                SELECT id, name, link, time, day_rec, prepayment
+                FROM clients
+                WHERE tenant_id = ? AND id IN (
+                    SELECT row_id FROM changes
+                    WHERE tenant_id = ? AND seq > ? AND seq <= ? AND entity = 'client' AND op != 'delete'
+                )
+                ORDER BY id ASC
+                ''', (tenant_id, tenant_id, since, last_seq))
+                rows = cursor.fetchall()
+                present = {row[0] for row in rows}
+                cursor.execute('''
+                SELECT row_id
+                FROM changes
+                WHERE tenant_id = ? AND seq > ? AND seq <= ? AND entity = 'client' AND op = 'delete'
+                ORDER BY seq ASC
+                ''', (tenant_id, since, last_seq))
+                deleted = list(dict.fromkeys(row_id for row_id, in cursor.fetchall() if row_id not in present))
+            series = series_delta(cursor, tenant_id, since, last_seq)
+            connection.commit()
+        return rows, deleted, series, str(last_seq), since is None
+    except sqlite3.Error as e:
+        print(f"Ошибка при получении изменений клиентов: {e}")
+        return None
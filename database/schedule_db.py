@@ -1,65 +1,157 @@
+import calendar
+import os
 import sqlite3
 
-DB_PATH = 'shedule.db'
+from database.connection import connect
+from database.write_queue import batching_enabled, submit_write
 
-
-def get_connection():
-    return sqlite3.connect(DB_PATH)
+DB_PATH = os.getenv('SCHEDULE_DB_PATH', 'shedule.db')
 
 
-def create_tables():
-    with get_connection() as conn:
-        cur = conn.cursor()
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS schedule_days (
-            year INTEGER NOT NULL,
-            month INTEGER NOT NULL,
-            day INTEGER NOT NULL,
-            PRIMARY KEY (year, month, day)
-        )
-        ''')
-        cur.execute('''
-        CREATE TABLE IF NOT EXISTS schedule_slots (
-            weekday INTEGER PRIMARY KEY,
-            slots TEXT NOT NULL
-        )
-        ''')
-        conn.commit()
+def get_connection():
+    return connect(DB_PATH)
 
 
-def get_selected_days(year: int, month: int):
+def get_selected_days(tenant_id: int, year: int, month: int):
     try:
         with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute('SELECT day FROM schedule_days WHERE year=? AND month=? ORDER BY day ASC', (year, month))
+            cur.execute(
+                'SELECT day FROM schedule_days WHERE tenant_id=? AND year=? AND month=? ORDER BY day ASC',
+                (tenant_id, year, month),
+            )
             rows = cur.fetchall()
             return {int(r[0]) for r in rows}
     except sqlite3.Error:
         return set()
 
 
-def set_day_selected(year: int, month: int, day: int, selected: bool):
+def set_day_selected(tenant_id: int, year: int, month: int, day: int, selected: bool):
+    if batching_enabled():
+        if selected:
+            return submit_write(DB_PATH, 'INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)',
+                                (tenant_id, year, month, day))
+        return submit_write(DB_PATH, 'DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=? AND day=?',
+                            (tenant_id, year, month, day))
+    with get_connection() as conn:
+        cur = conn.cursor()
+        if selected:
+            cur.execute(
+                'INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)',
+                (tenant_id, year, month, day),
+            )
+        else:
+            cur.execute(
+                'DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=? AND day=?',
+                (tenant_id, year, month, day),
+            )
+        conn.commit()
+
+
+def _month_days(cur, tenant_id: int, year: int, month: int):
+    cur.execute(
+        'SELECT day FROM schedule_days WHERE tenant_id=? AND year=? AND month=? ORDER BY day ASC',
+        (tenant_id, year, month),
+    )
+    return {int(r[0]) for r in cur.fetchall()}
+
+
+def toggle_day(tenant_id: int, year: int, month: int, day: int):
+    # Одна транзакция на одном соединении: DELETE сразу берет блокировку записи, поэтому
+    # одновременный тоггл того же дня из другого процесса ждет и видит результат этого.
+    # Возвращает новое состояние дня и выбранные дни месяца для перерисовки календаря
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(
+            'DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=? AND day=?',
+            (tenant_id, year, month, day),
+        )
+        selected = cur.rowcount == 0
+        if selected:
+            cur.execute(
+                'INSERT INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)',
+                (tenant_id, year, month, day),
+            )
+        days = _month_days(cur, tenant_id, year, month)
+        conn.commit()
+    return selected, days
+
+
+def set_days_selected(tenant_id: int, year: int, month: int, days, selected: bool = True):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        params = [(tenant_id, year, month, int(day)) for day in days]
+        if selected:
+            cur.executemany('INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)', params)
+        else:
+            cur.executemany('DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=? AND day=?', params)
+        result = _month_days(cur, tenant_id, year, month)
+        conn.commit()
+    return result
+
+
+def toggle_days(tenant_id: int, year: int, month: int, days):
+    # Группа дней (неделя, столбец календаря) как один день: все выбраны — снимаются, иначе выбираются все
+    params = [(tenant_id, year, month, int(day)) for day in days]
     with get_connection() as conn:
         cur = conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        current = _month_days(cur, tenant_id, year, month)
+        selected = not all(day in current for _, _, _, day in params)
         if selected:
-            cur.execute('INSERT OR IGNORE INTO schedule_days(year, month, day) VALUES (?, ?, ?)', (year, month, day))
+            cur.executemany('INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)', params)
+            current.update(day for _, _, _, day in params)
         else:
-            cur.execute('DELETE FROM schedule_days WHERE year=? AND month=? AND day=?', (year, month, day))
+            cur.executemany('DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=? AND day=?', params)
+            current.difference_update(day for _, _, _, day in params)
+        conn.commit()
+    return selected, current
+
+
+def copy_previous_month(tenant_id: int, year: int, month: int):
+    # Шаблон прошлого месяца — дни недели, выбранные хотя бы в половине своих дат
+    # (разовый выходной или рабочая суббота шаблоном не становятся)
+    prev_year, prev_month = (year, month - 1) if month > 1 else (year - 1, 12)
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute('BEGIN IMMEDIATE')
+        previous = _month_days(cur, tenant_id, prev_year, prev_month)
+        weekdays = set()
+        for weekday in range(7):
+            dates = weekday_days(prev_year, prev_month, {weekday})
+            chosen = sum(1 for day in dates if day in previous)
+            if chosen and chosen * 2 >= len(dates):
+                weekdays.add(weekday)
+        params = [(tenant_id, year, month, day) for day in weekday_days(year, month, weekdays)]
+        cur.executemany('INSERT OR IGNORE INTO schedule_days(tenant_id, year, month, day) VALUES (?, ?, ?, ?)', params)
+        result = _month_days(cur, tenant_id, year, month)
+        conn.commit()
+    return result
+
+
+def clear_month(tenant_id: int, year: int, month: int):
+    with get_connection() as conn:
+        cur = conn.cursor()
+        cur.execute('DELETE FROM schedule_days WHERE tenant_id=? AND year=? AND month=?', (tenant_id, year, month))
         conn.commit()
+    return set()
+
 
+def weekday_days(year: int, month: int, weekdays):
+    # weekdays — номера дней недели как в date.weekday(): 0 — понедельник
+    first_weekday, days_in_month = calendar.monthrange(year, month)
+    return [day for day in range(1, days_in_month + 1) if (first_weekday + day - 1) % 7 in weekdays]
 
-def toggle_day(year: int, month: int, day: int) -> bool:
-    selected_now = get_selected_days(year, month)
-    will_select = day not in selected_now
-    set_day_selected(year, month, day, will_select)
-    return will_select
 
+def select_weekdays(tenant_id: int, year: int, month: int, weekdays=(0, 1, 2, 3, 4)):
+    return set_days_selected(tenant_id, year, month, weekday_days(year, month, set(weekdays)))
 
-def get_schedule_slots():
+
+def get_schedule_slots(tenant_id: int):
     try:
         with get_connection() as conn:
             cur = conn.cursor()
-            cur.execute('SELECT weekday, slots FROM schedule_slots ORDER BY weekday ASC')
+            cur.execute('SELECT weekday, slots FROM schedule_slots WHERE tenant_id=? ORDER BY weekday ASC', (tenant_id,))
             rows = cur.fetchall()
             result = {}
             for weekday, slots_text in rows:
@@ -71,26 +163,21 @@ def get_schedule_slots():
         return {}
 
 
-def save_schedule_slots(slots: dict):
+def save_schedule_slots(tenant_id: int, slots: dict):
     with get_connection() as conn:
         cur = conn.cursor()
         for weekday, values in slots.items():
             text = ", ".join(values) if values else ""
             cur.execute(
-                'INSERT INTO schedule_slots(weekday, slots) VALUES (?, ?) '
-                'ON CONFLICT(weekday) DO UPDATE SET slots=excluded.slots',
-                (int(weekday), text),
+                'INSERT INTO schedule_slots(tenant_id, weekday, slots) VALUES (?, ?, ?) '
+                'ON CONFLICT(tenant_id, weekday) DO UPDATE SET slots=excluded.slots',
+                (tenant_id, int(weekday), text),
             )
         conn.commit()
 
 
-def clear_schedule_slots():
+def clear_schedule_slots(tenant_id: int):
     with get_connection() as conn:
         cur = conn.cursor()
-        cur.execute('DELETE FROM schedule_slots')
+        cur.execute('DELETE FROM schedule_slots WHERE tenant_id=?', (tenant_id,))
         conn.commit()
-
-
-create_tables()
-
-
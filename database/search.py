@@ -0,0 +1,125 @@
+import sqlite3
+
+from database.database import _normalize_link_base, get_db_connection
+from database.migrations import FTS_TENANT_SHIFT
+
+# Поиск клиента по имени или ссылке. Сначала — начало имени/ссылки по индексам clients(tenant_id, name)
+# и clients(tenant_id, link_base), затем подстрока через триграммный индекс clients_fts, затем похожие
+# варианты с опечаткой. Каждый шаг берет не больше SEARCH_CANDIDATES строк и выполняется, только если
+# предыдущие не набрали limit клиентов. Все шаги читают только строки мастера: в clients_fts
+# rowid начинается с tenant_id, и MATCH ограничен диапазоном rowid мастера
+SEARCH_CANDIDATES = 200
+# Похожие: запрос без одного или двух соседних символов (опечатка, лишняя или пропущенная буква,
+# перестановка) — части слева и справа от пропуска должны найтись обе
+FUZZY_MIN_LENGTH = 6
+FUZZY_MIN_SHARE = 0.5
+_CLIENT_COLUMNS = 'c.id, c.name, c.link, c.time, c.day_rec, c.prepayment'
+
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _fuzzy_expression(term: str) -> str:
+    clauses = {}
+    for gap in (1, 2):
+        for i in range(len(term) - gap + 1):
+            parts = [part for part in (term[:i], term[i + gap:]) if len(part) >= 3]
+            if parts:
+                clauses[' AND '.join(_phrase(part) for part in parts)] = None
+    return ' OR '.join(f'({clause})' for clause in clauses)
+
+
+def _prefix_candidates(cursor, tenant_id: int, term: str):
+    # Имена хранятся как введены, поэтому проверяются варианты регистра; ссылки — по link_base,
+    # где любое написание уже приведено к одному виду
+    ranges = [('name', prefix) for prefix in dict.fromkeys((term, term.capitalize(), term.upper()))]
+    ranges.append(('link_base', term))
+    rows = []
+    for column, prefix in ranges:
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        cursor.execute(f'''
+        SELECT {_CLIENT_COLUMNS}
+        FROM clients c
+        WHERE c.tenant_id = ? AND c.{column} >= ? AND c.{column} < ?
+        LIMIT ?
+        ''', (tenant_id, prefix, upper, SEARCH_CANDIDATES))
+        rows += cursor.fetchall()
+    return rows
+
+
+def _fts_candidates(cursor, tenant_id: int, match: str):
+    # Совпадения идут от новых записей к старым (rowid = (tenant_id << FTS_TENANT_SHIFT) + clients.id)
+    base = tenant_id << FTS_TENANT_SHIFT
+    cursor.execute(f'''
+    SELECT {_CLIENT_COLUMNS}
+    FROM clients_fts f
+    JOIN clients c ON c.id = f.rowid - ?
+    WHERE clients_fts MATCH ? AND f.rowid BETWEEN ? AND ?
+    ORDER BY f.rowid DESC
+    LIMIT ?
+    ''', (base, match, base, base + (1 << FTS_TENANT_SHIFT) - 1, SEARCH_CANDIDATES))
+    return cursor.fetchall()
+
+
+def _score(term: str, row):
+    # Меньше — выше в выдаче; None — строка не подходит
+    name = (row[1] or '').lower()
+    base = _normalize_link_base(row[2])
+    length = len(base) if term in base else len(name)
+    if term == name or term == base:
+        return 0, 0.0, length
+    if name.startswith(term) or base.startswith(term) or any(word.startswith(term) for word in name.split()):
+        return 1, 0.0, length
+    if term in name or term in base:
+        return 2, 0.0, length
+    wanted = _trigrams(term)
+    if not wanted:
+        return None
+    share, field = max((len(wanted & _trigrams(field)) / len(wanted), field) for field in (name, base))
+    if share < FUZZY_MIN_SHARE:
+        return None
+    return 3, -share, abs(len(field) - len(term))
+
+
+def _client_key(row):
+    return _normalize_link_base(row[2]) or (row[1] or '').lower()
+
+
+def _rank(term: str, rows, limit: int):
+    # Одна строка на клиента — с лучшей оценкой, при равенстве последняя по id.
+    # Клиенты с равной оценкой идут в порядке, в котором их нашли
+    best = {}
+    for position, row in enumerate(rows):
+        score = _score(term, row)
+        if score is None:
+            continue
+        key = _client_key(row)
+        found = best.get(key)
+        if found is None or (score, -row[0]) < (found[0], -found[2][0]):
+            best[key] = (score, found[1] if found else position, row)
+    return [row for _, _, row in sorted(best.values(), key=lambda item: item[:2])][:limit]
+
+
+def search_clients(tenant_id: int, query: str, limit: int = 20):
+    # Строки в формате get_clients_by_date_range, по одной на клиента
+    term = _normalize_link_base(query)
+    if not term:
+        return []
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            rows = _prefix_candidates(cursor, tenant_id, term)
+            # Триграммы находят подстроки от трех символов
+            if len(term) >= 3 and len(_rank(term, rows, limit)) < limit:
+                rows += _fts_candidates(cursor, tenant_id, _phrase(term))
+            if len(term) >= FUZZY_MIN_LENGTH and len(_rank(term, rows, limit)) < limit:
+                rows += _fts_candidates(cursor, tenant_id, _fuzzy_expression(term))
+    except sqlite3.Error as e:
+        print(f"Ошибка при поиске клиентов: {e}")
+        return []
+    return _rank(term, rows, limit)
@@ -0,0 +1,269 @@
+import calendar
+import heapq
+import sqlite3
+from datetime import date, timedelta
+
+from database.database import _normalize_link_base, get_db_connection
+
+# Вхождение серии возвращается той же строкой, что и запись из clients:
+# (id, name, link, time, day_rec, prepayment), только id = -series_id.
+# По отрицательному id вызывающий код отличает вхождение от разовой записи
+
+
+def occurrence_id(series_id: int) -> int:
+    return -series_id
+
+
+def series_id_of(row_id: int):
+    return -row_id if row_id < 0 else None
+
+
+def _load(cursor, tenant_id: int, start: str, end: str, link_bases=None):
+    # link_bases — только серии с этими ссылками в виде _normalize_link_base
+    link_filter, link_params = '', ()
+    if link_bases is not None:
+        link_params = tuple(link_bases)
+        link_filter = f"AND s.link_base IN ({', '.join('?' * len(link_params))})"
+    cursor.execute(f'''
+    SELECT id, name, link, time, start_date, end_date, interval_weeks, prepayment
+    FROM client_series s
+    WHERE tenant_id = ? {link_filter} AND (start_date <= ? AND (end_date IS NULL OR end_date >= ?)
+        OR id IN (SELECT series_id FROM client_series_exceptions WHERE new_day BETWEEN ? AND ?))
+    ''', (tenant_id, *link_params, end, start, start, end))
+    series = cursor.fetchall()
+    if not series:
+        return series, {}
+    cursor.execute(f'''
+    SELECT e.series_id, e.day, e.cancelled, e.new_day, e.new_time
+    FROM client_series_exceptions e
+    JOIN client_series s ON s.id = e.series_id
+    WHERE s.tenant_id = ? {link_filter} AND (e.day BETWEEN ? AND ? OR e.new_day BETWEEN ? AND ?)
+    ''', (tenant_id, *link_params, start, end, start, end))
+    exceptions = {(row[0], row[1]): row for row in cursor.fetchall()}
+    return series, exceptions
+
+
+def _occurrences(series, exceptions, first: date, last: date):
+    # Даты одной серии по порядку, от первой >= first: стоимость — число вхождений в диапазоне
+    series_id, name, link, time, start_date, end_date, interval_weeks, prepayment = series
+    step = 7 * interval_weeks
+    start = date.fromisoformat(start_date)
+    if end_date:
+        last = min(last, date.fromisoformat(end_date))
+    skip = max(0, -(-(first - start).days // step))
+    day = start + timedelta(days=skip * step)
+    while day <= last:
+        day_iso = day.isoformat()
+        if (series_id, day_iso) not in exceptions:
+            yield occurrence_id(series_id), name, link, time, day_iso, prepayment
+        day += timedelta(days=step)
+
+
+def expand_series(cursor, tenant_id: int, start: str, end: str, link_bases=None):
+    # Вхождения всех серий мастера (или только серий с link_bases) в [start, end] по возрастанию даты,
+    # с учетом отмен и переносов
+    start, end = str(start), str(end)
+    try:
+        first, last = date.fromisoformat(start), date.fromisoformat(end)
+    except ValueError:
+        return iter(())
+    series, exceptions = _load(cursor, tenant_id, start, end, link_bases)
+    if not series:
+        return iter(())
+    by_id = {row[0]: row for row in series}
+    moved = []
+    for series_id, day_iso, cancelled, new_day, new_time in exceptions.values():
+        row = by_id.get(series_id)
+        if cancelled or not new_day or row is None or not start <= new_day <= end:
+            continue
+        # Перенесенное вхождение ограничено сроком серии так же, как обычное:
+        # после stop_series не остается ни исходной, ни новой даты за концом серии
+        start_date, end_date = row[4], row[5]
+        if min(day_iso, new_day) < start_date or end_date and max(day_iso, new_day) > end_date:
+            continue
+        moved.append((occurrence_id(series_id), row[1], row[2], new_time or row[3], new_day, row[7]))
+    moved.sort(key=lambda row: row[4])
+    streams = [_occurrences(row, exceptions, first, last) for row in series]
+    return heapq.merge(*streams, moved, key=lambda row: row[4])
+
+
+def with_series_range(rows, cursor, tenant_id: int, start: str, end: str):
+    # rows отсортированы по дате записи; вхождения вливаются без пересортировки всего списка
+    occurrences = list(expand_series(cursor, tenant_id, start, end))
+    if not occurrences:
+        return rows
+    return list(heapq.merge(rows, occurrences, key=lambda row: row[4]))
+
+
+def with_series_day(rows, cursor, tenant_id: int, day_iso: str):
+    # rows одного дня отсортированы по времени
+    occurrences = sorted(expand_series(cursor, tenant_id, day_iso, day_iso), key=lambda row: row[3])
+    if not occurrences:
+        return rows
+    return list(heapq.merge(rows, occurrences, key=lambda row: row[3]))
+
+
+def series_month_days(cursor, tenant_id: int, year: int, month: int):
+    start = f"{year:04d}-{month:02d}-01"
+    end = f"{year:04d}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+    return {int(row[4][8:10]) for row in expand_series(cursor, tenant_id, start, end)}
+
+
+def get_occurrences(tenant_id: int, start: str, end: str):
+    try:
+        with get_db_connection() as connection:
+            return list(expand_series(connection.cursor(), tenant_id, start, end))
+    except sqlite3.Error as e:
+        print(f"Ошибка при получении вхождений серий: {e}")
+        return []
+
+
+def create_series(tenant_id: int, name, link, time, start_date: str, interval_weeks: int = 1,
+                  end_date: str = None, prepayment=0):
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('''
+            INSERT INTO client_series(tenant_id, name, link, link_base, time, start_date, end_date, interval_weeks, prepayment)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (tenant_id, name, link, _normalize_link_base(link), time, start_date, end_date, interval_weeks, prepayment))
+            connection.commit()
+            return cursor.lastrowid
+    except sqlite3.Error as e:
+        print(f"Ошибка при создании серии: {e}")
+        return None
+
+
+def get_series(tenant_id: int):
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('''
+            SELECT id, name, link, time, start_date, end_date, interval_weeks, prepayment
+            FROM client_series
+            WHERE tenant_id = ?
+            ORDER BY start_date ASC, id ASC
+            ''', (tenant_id,))
+            return cursor.fetchall()
+    except sqlite3.Error as e:
+        print(f"Ошибка при получении серий: {e}")
+        return []
+
+
+def delete_series(tenant_id: int, series_id: int) -> bool:
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('DELETE FROM client_series WHERE id = ? AND tenant_id = ?', (series_id, tenant_id))
+            connection.commit()
+            return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f"Ошибка при удалении серии: {e}")
+        return False
+
+
+def _original_day(cursor, tenant_id: int, series_id: int, day_iso: str):
+    # Дата вхождения по правилу серии; для перенесенного визита — его исходная дата
+    cursor.execute(
+        'SELECT start_date, end_date, interval_weeks FROM client_series WHERE id = ? AND tenant_id = ?',
+        (series_id, tenant_id),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None
+    start_date, end_date, interval_weeks = row
+    if start_date <= day_iso and (not end_date or day_iso <= end_date):
+        if (date.fromisoformat(day_iso) - date.fromisoformat(start_date)).days % (7 * interval_weeks) == 0:
+            return day_iso
+    cursor.execute(
+        'SELECT day FROM client_series_exceptions WHERE series_id = ? AND new_day = ? AND cancelled = 0',
+        (series_id, day_iso),
+    )
+    moved = cursor.fetchone()
+    return moved[0] if moved else None
+
+
+def _set_exception(tenant_id: int, series_id: int, day_iso: str, cancelled: bool, new_day=None, new_time=None) -> bool:
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            day_iso = _original_day(cursor, tenant_id, series_id, day_iso)
+            if day_iso is None:
+                connection.rollback()
+                return False
+            cursor.execute('''
+            INSERT INTO client_series_exceptions(series_id, day, cancelled, new_day, new_time)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(series_id, day) DO UPDATE
+            SET cancelled = excluded.cancelled, new_day = excluded.new_day, new_time = excluded.new_time
+            ''', (series_id, day_iso, int(cancelled), new_day, new_time))
+            connection.commit()
+            return True
+    except sqlite3.Error as e:
+        print(f"Ошибка при изменении вхождения серии: {e}")
+        return False
+
+
+def cancel_occurrence(tenant_id: int, series_id: int, day_iso: str) -> bool:
+    return _set_exception(tenant_id, series_id, day_iso, True)
+
+
+def move_occurrence(tenant_id: int, series_id: int, day_iso: str, new_day: str, new_time: str = None) -> bool:
+    return _set_exception(tenant_id, series_id, day_iso, False, new_day, new_time)
+
+
+def stop_series(tenant_id: int, series_id: int, day_iso: str) -> bool:
+    # Серия заканчивается перед day_iso: это и следующие вхождения пропадают, прошлые остаются
+    end_date = (date.fromisoformat(day_iso) - timedelta(days=1)).isoformat()
+    try:
+        with get_db_connection() as connection:
+            cursor = connection.cursor()
+            cursor.execute('''
+            UPDATE client_series SET end_date = ?
+            WHERE id = ? AND tenant_id = ? AND (end_date IS NULL OR end_date > ?)
+            ''', (end_date, series_id, tenant_id, end_date))
+            connection.commit()
+            return cursor.rowcount > 0
+    except sqlite3.Error as e:
+        print(f"Ошибка при завершении серии: {e}")
+        return False
+
+
+# Серии, у которых между двумя seq журнала менялось правило или исключения
+_CHANGED_SERIES = '''
+SELECT row_id FROM changes
+WHERE tenant_id = ? AND seq > ? AND seq <= ?
+    AND (entity = 'series_exception' OR entity = 'series' AND op != 'delete')
+'''
+
+
+def series_delta(cursor, tenant_id: int, since=None, until=None):
+    # Для дельты клиентов: измененные серии с их исключениями и id удаленных. since=None — все серии мастера
+    columns = 'SELECT id, name, link, time, start_date, end_date, interval_weeks, prepayment FROM client_series'
+    exception_columns = '''
+    SELECT e.series_id, e.day, e.cancelled, e.new_day, e.new_time
+    FROM client_series_exceptions e
+    JOIN client_series s ON s.id = e.series_id
+    '''
+    if since is None:
+        cursor.execute(f'{columns} WHERE tenant_id = ? ORDER BY id ASC', (tenant_id,))
+        series = cursor.fetchall()
+        cursor.execute(f'{exception_columns} WHERE s.tenant_id = ? ORDER BY e.series_id, e.day', (tenant_id,))
+        return series, cursor.fetchall(), []
+    changed = (tenant_id, since, until)
+    cursor.execute(f'{columns} WHERE tenant_id = ? AND id IN ({_CHANGED_SERIES}) ORDER BY id ASC', (tenant_id, *changed))
+    series = cursor.fetchall()
+    cursor.execute(
+        f'{exception_columns} WHERE s.tenant_id = ? AND s.id IN ({_CHANGED_SERIES}) ORDER BY e.series_id, e.day',
+        (tenant_id, *changed),
+    )
+    exceptions = cursor.fetchall()
+    present = {row[0] for row in series}
+    cursor.execute('''
+    SELECT row_id FROM changes
+    WHERE tenant_id = ? AND seq > ? AND seq <= ? AND entity = 'series' AND op = 'delete'
+    ORDER BY seq ASC
+    ''', changed)
+    deleted = list(dict.fromkeys(row_id for row_id, in cursor.fetchall() if row_id not in present))
+    return series, exceptions, deleted
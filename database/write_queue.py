@@ -0,0 +1,191 @@
+import atexit
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from database.connection import connect
+
+# Отложенная запись с групповым коммитом. Одиночные INSERT из save_client, add_salary_to_db и т.п.
+# копятся WRITE_BATCH_WINDOW_MS и выполняются одной транзакцией в фоновом потоке: один fsync
+# на пачку вместо одного на каждую запись. Future каждого вызова выполняется после COMMIT.
+#
+# WRITE_BATCH_MODE:
+#   off      — как раньше, каждая запись коммитится сразу (по умолчанию);
+#   commit   — вызов ждет коммита своей пачки: запись видна сразу после возврата, задержка
+#              вырастает на длину окна;
+#   deferred — вызов возвращается сразу: запись видна другим запросам только после коммита,
+#              при падении процесса теряются записи последнего окна.
+# WRITE_BATCH_SYNCHRONOUS — PRAGMA synchronous соединения-писателя: FULL (fsync на каждый коммит)
+# или NORMAL (в WAL коммит переживает падение процесса, но не отключение питания).
+WRITE_BATCH_MODE = os.getenv('WRITE_BATCH_MODE', 'off')
+WRITE_BATCH_WINDOW_MS = float(os.getenv('WRITE_BATCH_WINDOW_MS', '5'))
+WRITE_BATCH_MAX = int(os.getenv('WRITE_BATCH_MAX', '500'))
+WRITE_BATCH_SYNCHRONOUS = os.getenv('WRITE_BATCH_SYNCHRONOUS', 'FULL')
+# Сколько секунд вызов в режиме commit ждет коммита своей записи, прежде чем считать ее неудачной
+WRITE_BATCH_TIMEOUT = float(os.getenv('WRITE_BATCH_TIMEOUT', '30'))
+
+_SYNCHRONOUS_LEVELS = ('OFF', 'NORMAL', 'FULL', 'EXTRA')
+_STOP = object()
+
+
+class WriteQueue:
+    def __init__(self, db_path: str, window_ms: float = None, max_batch: int = None, synchronous: str = None):
+        self.db_path = db_path
+        self.window = (WRITE_BATCH_WINDOW_MS if window_ms is None else window_ms) / 1000
+        self.max_batch = max_batch or WRITE_BATCH_MAX
+        self.synchronous = (synchronous or WRITE_BATCH_SYNCHRONOUS).upper()
+        if self.synchronous not in _SYNCHRONOUS_LEVELS:
+            raise ValueError(f"Неизвестный режим synchronous: {self.synchronous}")
+        self._queue = queue.SimpleQueue()
+        # Ошибка, остановившая поток: все ждущие и новые записи завершаются ею, а не висят вечно
+        self._error = None
+        self._lock = threading.Lock()
+        self._batch = []
+        self._thread = threading.Thread(target=self._run, name=f'write-queue-{os.path.basename(db_path)}',
+                                        daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, parameters=()) -> Future:
+        future = Future()
+        with self._lock:
+            if self._error is None:
+                self._queue.put((sql, parameters, future))
+                return future
+        future.set_exception(self._error)
+        return future
+
+    def _fail(self, error: Exception):
+        with self._lock:
+            self._error = error
+        pending = [future for _, _, future in self._batch]
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                pending.append(item[2])
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
+
+    def close(self):
+        # Уже поставленные записи дописываются до выхода потока
+        self._queue.put(_STOP)
+        self._thread.join()
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        connection = None
+        try:
+            connection = connect(self.db_path)
+            connection.execute(f'PRAGMA synchronous={self.synchronous}')
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                if item is _STOP:
+                    break
+                self._batch, stopping = self._collect(item)
+                self._commit(connection, self._batch)
+                self._batch = []
+        except Exception as e:
+            print(f"Ошибка потока записи {self.db_path}: {e}")
+            self._fail(e)
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def _commit(self, connection, batch):
+        results = []
+        try:
+            cursor = connection.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            for sql, parameters, future in batch:
+                # Точка сохранения на каждую запись: ошибка одной не откатывает остальные
+                cursor.execute('SAVEPOINT write')
+                try:
+                    cursor.execute(sql, parameters)
+                except sqlite3.Error as e:
+                    cursor.execute('ROLLBACK TO write')
+                    results.append((future, None, e))
+                else:
+                    results.append((future, cursor.lastrowid, None))
+                cursor.execute('RELEASE write')
+            connection.commit()
+        except sqlite3.Error as e:
+            if connection.in_transaction:
+                connection.rollback()
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in results:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(db_path: str) -> WriteQueue:
+    write_queue = _queues.get(db_path)
+    if write_queue is None:
+        with _queues_lock:
+            write_queue = _queues.get(db_path)
+            if write_queue is None:
+                write_queue = _queues[db_path] = WriteQueue(db_path)
+    return write_queue
+
+
+def batching_enabled() -> bool:
+    return WRITE_BATCH_MODE in ('commit', 'deferred')
+
+
+def submit_write(db_path: str, sql: str, parameters=(), error_message: str = None, wait: bool = False) -> Future:
+    # error_message задан — ошибка печатается, как в синхронных функциях; иначе в режиме commit
+    # исключение получает вызывающий код. wait=True — вызов ждет коммита и в режиме deferred:
+    # так пишут те, кто сразу читает свою запись обратно (итог месяца после добавления суммы)
+    future = get_write_queue(db_path).submit(sql, parameters)
+    if WRITE_BATCH_MODE == 'deferred' and not wait:
+        if error_message:
+            future.add_done_callback(lambda done: done.exception() and print(f"{error_message}: {done.exception()}"))
+        return future
+    try:
+        future.result(timeout=WRITE_BATCH_TIMEOUT)
+    except TimeoutError:
+        error = sqlite3.OperationalError(f"запись не закоммичена за {WRITE_BATCH_TIMEOUT} с")
+        if not error_message:
+            raise error
+        print(f"{error_message}: {error}")
+    except Exception as e:
+        if not error_message:
+            raise
+        print(f"{error_message}: {e}")
+    return future
+
+
+@atexit.register
+def close_write_queues():
+    with _queues_lock:
+        queues = list(_queues.values())
+        _queues.clear()
+    for write_queue in queues:
+        write_queue.close()
@@ -0,0 +1,69 @@
+import io
+
+from aiogram import types
+from aiogram.dispatcher import Dispatcher
+
+from bot.tenants import is_admin
+from monitoring.db import format_query_stats, is_tracing, reset_query_stats, set_tracing
+from monitoring.profiler import MAX_PROFILE_SECONDS, ProfilerBusy, run_profile
+
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+
+async def db_stats(message: types.Message):
+    if not is_admin(message.from_user.id):
+        return
+    text = format_query_stats(limit=10)
+    await message.answer(text[:TELEGRAM_MESSAGE_LIMIT])
+
+
+async def db_trace(message: types.Message):
+    if not is_admin(message.from_user.id):
+        return
+    args = message.get_args().split()
+    if not args:
+        await message.answer(f"Трассировка запросов {'включена' if is_tracing() else 'выключена'}.\n"
+                             "Использование: /dbtrace on [порог_мс] | off | reset")
+        return
+    command = args[0].lower()
+    if command == 'on':
+        try:
+            threshold = float(args[1]) if len(args) > 1 else None
+        except ValueError:
+            await message.answer('Порог укажите числом в миллисекундах, например: /dbtrace on 50')
+            return
+        set_tracing(True, threshold)
+        await message.answer('Трассировка запросов включена.')
+    elif command == 'off':
+        set_tracing(False)
+        await message.answer('Трассировка запросов выключена.')
+    elif command == 'reset':
+        reset_query_stats()
+        await message.answer('Статистика запросов сброшена.')
+    else:
+        await message.answer('Использование: /dbtrace on [порог_мс] | off | reset')
+
+
+async def profile(message: types.Message):
+    if not is_admin(message.from_user.id):
+        return
+    args = message.get_args().split()
+    try:
+        seconds = float(args[0]) if args else 10
+    except ValueError:
+        await message.answer(f"Использование: /profile [секунд, до {MAX_PROFILE_SECONDS}] [pstats]")
+        return
+    fmt = 'pstats' if 'pstats' in args[1:] else 'collapsed'
+    await message.answer(f"Профилирую {min(seconds, MAX_PROFILE_SECONDS):g} с...")
+    try:
+        data, filename = await run_profile(seconds, fmt)
+    except ProfilerBusy:
+        await message.answer('Профилирование уже запущено.')
+        return
+    await message.answer_document(types.InputFile(io.BytesIO(data), filename=filename))
+
+
+def register_admin(dp: Dispatcher):
+    dp.register_message_handler(db_stats, commands='dbstats', state='*')
+    dp.register_message_handler(db_trace, commands='dbtrace', state='*')
+    dp.register_message_handler(profile, commands='profile', state='*')
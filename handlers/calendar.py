@@ -1,39 +1,47 @@
 from aiogram import types
 from aiogram.dispatcher import Dispatcher
-from datetime import date, datetime
+from datetime import date
 import calendar as pycal
 
-from keyboards.keyboards import get_calendar_keyboard, months_ru
+from keyboards.keyboards import get_calendar_keyboard, get_occurrences_keyboard, months_ru
 from database.request_for_date import get_marked_days_for_month, get_clients_by_day
+from database.series import cancel_occurrence, series_id_of, stop_series
+from utils.common import format_date_display, format_prepayment, shift_month
 
-def _format_prepayment(value):
-    if value is None:
-        return "✗"
-    try:
-        num = float(value)
-    except Exception:
-        return "✗"
-    if num == 0:
-        return "✗"
-    if num == 1:
-        return "✓"
-    return f"{num:.2f}".rstrip('0').rstrip('.')
 
-def _month_shift(year: int, month: int, delta: int):
-    m = month + delta
-    y = year + (m - 1) // 12
-    m = ((m - 1) % 12) + 1
-    return y, m
+def _day_listing(tenant_id: int, ymd: str):
+    clients = get_clients_by_day(tenant_id, ymd)
+    if not clients:
+        return f"Записей на {format_date_display(ymd)} нет.", None
+    lines = [f"Записи на {format_date_display(ymd)}:"]
+    occurrences = []
+    for c in clients:
+        name = c[1] or ""
+        link = c[2] or ""
+        tm = c[3] or ""
+        prepay_value = c[5] if len(c) > 5 else None
+        prepay_str = format_prepayment(prepay_value)
+        # Вхождения повторяющихся записей помечены ↻, под ними кнопки пропуска и завершения серии
+        series_id = series_id_of(c[0])
+        mark = " ↻" if series_id else ""
+        if series_id:
+            occurrences.append((series_id, ymd, f"{tm} {name}".strip()))
+        if link:
+            lines.append(f"{tm} — {name} ({link}), предоплата: {prepay_str}{mark}")
+        else:
+            lines.append(f"{tm} — {name}, предоплата: {prepay_str}{mark}")
+    kb = get_occurrences_keyboard(occurrences) if occurrences else None
+    return "\n".join(lines), kb
 
 
-async def open_calendar(message: types.Message):
+async def open_calendar(message: types.Message, tenant_id: int):
     today = date.today()
-    marked = get_marked_days_for_month(today.year, today.month)
+    marked = get_marked_days_for_month(tenant_id, today.year, today.month)
     kb = get_calendar_keyboard(today.year, today.month, marked)
     await message.answer(f"Календарь: {months_ru[today.month - 1]} {today.year}", reply_markup=kb)
 
 
-async def calendar_nav(callback_query: types.CallbackQuery):
+async def calendar_nav(callback_query: types.CallbackQuery, tenant_id: int):
     try:
         data = callback_query.data
         if data.startswith("cal_today_"):
@@ -45,65 +53,56 @@ async def calendar_nav(callback_query: types.CallbackQuery):
             year = int(y)
             month = int(m)
             delta = -1 if kind == "prev" else 1
-            year, month = _month_shift(year, month, delta)
+            year, month = shift_month(year, month, delta)
 
-        marked = get_marked_days_for_month(year, month)
+        marked = get_marked_days_for_month(tenant_id, year, month)
         kb = get_calendar_keyboard(year, month, marked)
         await callback_query.message.edit_text(f"Календарь: {months_ru[month - 1]} {year}")
         await callback_query.message.edit_reply_markup(reply_markup=kb)
         if data.startswith("cal_today_"):
             ymd = date.today().isoformat()
-            clients = get_clients_by_day(ymd)
-            if not clients:
-                await callback_query.message.answer(f"Записей на {datetime.strptime(ymd, '%Y-%m-%d').strftime('%d.%m.%Y')} нет.")
-            else:
-                lines = [f"Записи на {datetime.strptime(ymd, '%Y-%m-%d').strftime('%d.%m.%Y')}:"]
-                for c in clients:
-                    name = c[1] or ""
-                    link = c[2] or ""
-                    tm = c[3] or ""
-                    prepay_value = c[5] if len(c) > 5 else None
-                    prepay_str = _format_prepayment(prepay_value)
-                    if link:
-                        lines.append(f"{tm} — {name} ({link}), предоплата: {prepay_str}")
-                    else:
-                        lines.append(f"{tm} — {name}, предоплата: {prepay_str}")
-                await callback_query.message.answer("\n".join(lines))
+            text, kb = _day_listing(tenant_id, ymd)
+            await callback_query.message.answer(text, reply_markup=kb)
         await callback_query.answer()
     except Exception as e:
         await callback_query.answer("Ошибка обновления календаря")
 
 
-async def calendar_day(callback_query: types.CallbackQuery):
+async def calendar_day(callback_query: types.CallbackQuery, tenant_id: int):
     try:
         _, _, ymd = callback_query.data.split("_", 2)
-        clients = get_clients_by_day(ymd)
-        if not clients:
-            await callback_query.message.answer(f"Записей на {datetime.strptime(ymd, '%Y-%m-%d').strftime('%d.%m.%Y')} нет.")
-            await callback_query.answer()
-            return
-        lines = [f"Записи на {datetime.strptime(ymd, '%Y-%m-%d').strftime('%d.%m.%Y')}:" ]
-        for c in clients:
-            name = c[1] or ""
-            link = c[2] or ""
-            tm = c[3] or ""
-            prepay_value = c[5] if len(c) > 5 else None
-            prepay_str = _format_prepayment(prepay_value)
-            if link:
-                lines.append(f"{tm} — {name} ({link}), предоплата: {prepay_str}")
-            else:
-                lines.append(f"{tm} — {name}, предоплата: {prepay_str}")
-        await callback_query.message.answer("\n".join(lines))
+        text, kb = _day_listing(tenant_id, ymd)
+        await callback_query.message.answer(text, reply_markup=kb)
         await callback_query.answer()
     except Exception:
         await callback_query.answer("Ошибка загрузки записей за день")
 
 
+async def series_action(callback_query: types.CallbackQuery, tenant_id: int):
+    try:
+        _, action, series_id, ymd = callback_query.data.split("_", 3)
+        if action == "skip":
+            done = cancel_occurrence(tenant_id, int(series_id), ymd)
+            notice = f"Визит {format_date_display(ymd)} пропущен"
+        else:
+            done = stop_series(tenant_id, int(series_id), ymd)
+            notice = f"Повтор завершен с {format_date_display(ymd)}"
+        if not done:
+            await callback_query.answer("Запись уже изменена")
+            return
+        text, kb = _day_listing(tenant_id, ymd)
+        await callback_query.message.edit_text(text, reply_markup=kb)
+        await callback_query.answer(notice)
+    except Exception:
+        await callback_query.answer("Не удалось изменить повторяющуюся запись")
+
+
 def register_calendar(dp: Dispatcher):
     dp.register_message_handler(open_calendar, text='Календарь')
     dp.register_callback_query_handler(calendar_nav, text_startswith='cal_prev_')
     dp.register_callback_query_handler(calendar_nav, text_startswith='cal_next_')
     dp.register_callback_query_handler(calendar_nav, text_startswith='cal_today_')
     dp.register_callback_query_handler(calendar_day, text_startswith='cal_day_')
+    dp.register_callback_query_handler(series_action, text_startswith=['ser_skip_', 'ser_stop_'])
 
 
@@ -1,6 +1,7 @@
 from aiogram.types import Message
 from aiogram.dispatcher import Dispatcher
 from database.delete_client import delete_client
+from database.search import search_clients
 from states.states import DeleteForm
 from keyboards.keyboards import kb_exit_delete
 
@@ -8,16 +9,20 @@ async def delete_client_text(message: Message):
     await message.answer('Какого клиента вы хотите удалить?\nВведите ссылку на него:', reply_markup=kb_exit_delete)
     await DeleteForm.waiting_for_delete.set()
 
-async def handle_delete_client_link(message: Message, state):
+async def handle_delete_client_link(message: Message, state, tenant_id: int):
     client_link = message.text.strip()
     try:
 
-        result = delete_client(client_link)
+        result = delete_client(tenant_id, client_link)
 
         if result:
             await message.answer('Клиент удален.')
         else:
-            await message.answer('Клиент с такой ссылкой не найден или не был удален.')
+            similar = [row[2] for row in search_clients(tenant_id, client_link, 5) if row[2]]
+            if similar:
+                await message.answer('Клиент с такой ссылкой не найден. Похожие ссылки:\n' + '\n'.join(similar))
+            else:
+                await message.answer('Клиент с такой ссылкой не найден или не был удален.')
 
     except Exception as e:
         await message.answer(f'Произошла ошибка: {e}')
@@ -5,11 +5,8 @@ from datetime import datetime
 from keyboards.keyboards import kb_expenses, get_months_keyboard1, get_continue_keyboard1
 from states.states import ExpensesForm
 from database.database import add_expenses_to_db, get_total_expenses_for_month, remove_last_expenses_from_db
+from utils.common import MONTHS_RU_GEN as months
 
-months = [
-    "январь", "февраль", "март", "апрель", "май", "июнь",
-    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь"
-]
 
 async def expenses(message: Message):
     await message.answer('Выберите пункт меню: ', reply_markup=kb_expenses)
@@ -18,7 +15,7 @@ async def expenses_month_selection(callback_query: CallbackQuery):
     await callback_query.message.answer("За какой месяц?", reply_markup=get_months_keyboard1())
     await callback_query.answer()
 
-async def expenses_for_selected_month(callback_query: CallbackQuery):
+async def expenses_for_selected_month(callback_query: CallbackQuery, tenant_id: int):
     try:
         data = callback_query.data
         month_index = int(data.split("-")[1])
@@ -27,7 +24,7 @@ async def expenses_for_selected_month(callback_query: CallbackQuery):
         year = today.year
 
         month_year = f"{year}-{month_index:02d}"
-        total_expenses = get_total_expenses_for_month(month_year)
+        total_expenses = get_total_expenses_for_month(tenant_id, month_year)
 
         month_name = months[month_index - 1]
         await callback_query.message.answer(
@@ -62,7 +59,7 @@ async def process_expenses(message: Message, state):
         print(f"Ошибка при обработке трат: {e}")
         await message.answer("Произошла ошибка при добавлении трат.")
 
-async def process_selected_month_for_add_expenses(callback_query: CallbackQuery, state):
+async def process_selected_month_for_add_expenses(callback_query: CallbackQuery, state, tenant_id: int):
     try:
         data = await state.get_data()
         expenses_amount = data.get("expenses_amount")
@@ -76,9 +73,9 @@ async def process_selected_month_for_add_expenses(callback_query: CallbackQuery,
         year = today.year
         month_year = f"{year}-{month_index:02d}"
 
-        add_expenses_to_db(expenses_amount, month_year)
+        add_expenses_to_db(tenant_id, expenses_amount, month_year, wait=True)
 
-        total_expenses = get_total_expenses_for_month(month_year)
+        total_expenses = get_total_expenses_for_month(tenant_id, month_year)
         month_name = months[month_index - 1]
 
         await callback_query.message.answer(f"Траты за {month_name}: {total_expenses} руб.", reply_markup=get_continue_keyboard1())
@@ -99,13 +96,13 @@ async def handle_cancel_add_expenses(callback_query: CallbackQuery):
     await callback_query.message.answer("Добавление трат отменено.")
     await callback_query.answer()
 
-async def handle_remove_last_expenses(callback_query: CallbackQuery):
+async def handle_remove_last_expenses(callback_query: CallbackQuery, tenant_id: int):
     today = datetime.today()
     month_year = today.strftime("%Y-%m")
 
     try:
-        remove_last_expenses_from_db(month_year)
-        total_expenses = get_total_expenses_for_month(month_year)
+        remove_last_expenses_from_db(tenant_id, month_year)
+        total_expenses = get_total_expenses_for_month(tenant_id, month_year)
         month_name = months[today.month - 1]
         await callback_query.message.answer(
             f"Последняя трата удалена. Текущие траты за {month_name}: {total_expenses} руб.")
@@ -0,0 +1,92 @@
+import time
+from collections import OrderedDict, namedtuple
+from datetime import date
+
+from aiogram import types
+from aiogram.dispatcher import Dispatcher
+
+from bot.config import inline_cache_time, inline_results_cache_size, inline_results_ttl
+from database.changes import get_last_seq
+from database.database import _normalize_link_base
+from database.request_for_date import get_upcoming_visits
+from database.search import search_clients
+from monitoring.metrics import register_cache
+from utils.common import format_date_display, format_prepayment
+
+INLINE_RESULTS = 20
+UPCOMING_PER_CLIENT = 3
+
+# Ответы кешируются по мастеру и набранной строке: каждый префикс, который проходит пользователь
+# при наборе (а, ан, анн...), — отдельная запись, повторный набор и стирание отвечают из памяти.
+# Запись устаревает по INLINE_RESULTS_TTL, при смене дня и при любой правке клиентов или серий
+# (seq журнала changes)
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+_results = OrderedDict()
+_stats = {'hits': 0, 'misses': 0}
+
+
+def _visit_text(visit) -> str:
+    day_rec, tm = visit
+    return f"{format_date_display(day_rec)} {tm}"
+
+
+def _result(row, visits) -> types.InlineQueryResultArticle:
+    client_id, name, link, _, _, prepayment = row
+    who = f"{name} ({link})" if link else name
+    if visits:
+        description = "Ближайшие: " + ", ".join(_visit_text(visit) for visit in visits)
+        lines = [who, "Ближайшие записи:"] + [_visit_text(visit) for visit in visits]
+    else:
+        description = "Будущих записей нет"
+        lines = [who, description]
+    lines.append(f"Предоплата: {format_prepayment(prepayment)}")
+    return types.InlineQueryResultArticle(
+        id=str(client_id),
+        title=who or "Без имени",
+        description=description,
+        input_message_content=types.InputTextMessageContent("\n".join(lines)),
+    )
+
+
+def build_results(tenant_id: int, term: str, today_iso: str):
+    rows = search_clients(tenant_id, term, INLINE_RESULTS)
+    upcoming = get_upcoming_visits(tenant_id, [row[2] for row in rows], today_iso, UPCOMING_PER_CLIENT)
+    return [_result(row, upcoming.get(_normalize_link_base(row[2]), [])) for row in rows]
+
+
+def cached_results(tenant_id: int, query: str):
+    term = _normalize_link_base(query)
+    if not term:
+        return []
+    key = (tenant_id, term)
+    version = (get_last_seq('clients'), date.today().isoformat())
+    entry = _results.get(key)
+    if entry is not None and entry[0] > time.monotonic() and entry[1] == version:
+        _results.move_to_end(key)
+        _stats['hits'] += 1
+        return entry[2]
+    _stats['misses'] += 1
+    results = build_results(tenant_id, term, version[1])
+    _results[key] = (time.monotonic() + inline_results_ttl, version, results)
+    _results.move_to_end(key)
+    while len(_results) > inline_results_cache_size:
+        _results.popitem(last=False)
+    return results
+
+
+def cache_info() -> CacheInfo:
+    return CacheInfo(_stats['hits'], _stats['misses'], inline_results_cache_size, len(_results))
+
+
+register_cache('inline_results', cache_info)
+
+
+async def inline_search(inline_query: types.InlineQuery, tenant_id: int):
+    results = cached_results(tenant_id, inline_query.query)
+    # is_personal всегда: клиенты видны только своему мастеру, а без него Telegram отдал бы
+    # закешированный ответ любому, кто наберет ту же строку
+    await inline_query.answer(results, cache_time=inline_cache_time, is_personal=True)
+
+
+def register_inline_search(dp: Dispatcher):
+    dp.register_inline_handler(inline_search, state='*')
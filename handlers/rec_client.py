@@ -2,14 +2,23 @@ import re
 from aiogram import types
 from aiogram.dispatcher import Dispatcher
 from aiogram.dispatcher.filters import Text
-from datetime import date
+from datetime import date, timedelta
 from states.states import Form
-from keyboards.keyboards import kb_back_inline, get_calendar_keyboard, months_ru, get_prepayment_keyboard
-from database.database import save_client
+from keyboards.keyboards import kb_back_inline, get_calendar_keyboard, months_ru, get_prepayment_keyboard, get_repeat_keyboard
+from database.database import get_client_by_id, save_client
 from database.request_for_date import get_marked_days_for_month
+from database.series import create_series
+from utils.common import shift_month
 
 DATE_REGEX = r'^\d{2}\.\d{2}\.\d{4}$'
 
+async def _answer_saved(message: types.Message, client_id):
+    # Повтор предлагается, только если известен id записи: по нему кнопки находят клиента
+    if client_id:
+        await message.answer('Клиент успешно записан! Повторять запись?', reply_markup=get_repeat_keyboard(client_id))
+    else:
+        await message.answer('Клиент успешно записан!')
+
 async def rec_client(message: types.Message):
     await message.answer('Введите имя клиента:', reply_markup=kb_back_inline)
     await Form.waiting_for_name.set()
@@ -26,11 +35,11 @@ async def process_link(message: types.Message, state):
     await state.update_data(link=client_link)
     await Form.waiting_for_time.set()
 
-async def process_time(message: types.Message, state):
+async def process_time(message: types.Message, state, tenant_id: int):
     client_time = message.text.strip()
     await state.update_data(time=client_time)
     today = date.today()
-    marked = get_marked_days_for_month(today.year, today.month)
+    marked = get_marked_days_for_month(tenant_id, today.year, today.month)
     calendar_kb = get_calendar_keyboard(today.year, today.month, marked)
     await message.answer(f"Выберите дату: {months_ru[today.month - 1]} {today.year}", reply_markup=calendar_kb)
     await Form.waiting_for_date.set()
@@ -49,7 +58,7 @@ async def process_request_for_data(message: types.Message, state):
     await message.answer('Введите предоплату: ', reply_markup=kb_back_inline)
     await Form.waiting_for_prepayment.set()
 
-async def rec_calendar_nav(callback_query: types.CallbackQuery, state):
+async def rec_calendar_nav(callback_query: types.CallbackQuery, state, tenant_id: int):
     try:
         data = callback_query.data
         if data.startswith("cal_today_"):
@@ -64,10 +73,8 @@ async def rec_calendar_nav(callback_query: types.CallbackQuery, state):
             year = int(y)
             month = int(m)
             delta = -1 if kind == "prev" else 1
-            m2 = month + delta
-            year = year + (m2 - 1) // 12
-            month = ((m2 - 1) % 12) + 1
-        marked = get_marked_days_for_month(year, month)
+            year, month = shift_month(year, month, delta)
+        marked = get_marked_days_for_month(tenant_id, year, month)
         kb = get_calendar_keyboard(year, month, marked)
         await callback_query.message.edit_text(f"Выберите дату: {months_ru[month - 1]} {year}")
         await callback_query.message.edit_reply_markup(reply_markup=kb)
@@ -85,7 +92,7 @@ async def rec_calendar_day(callback_query: types.CallbackQuery, state):
     except Exception:
         await callback_query.answer("Не удалось выбрать дату")
 
-async def process_prepayment(message: types.Message, state):
+async def process_prepayment(message: types.Message, state, tenant_id: int):
     text = message.text.strip().replace(' ', '').replace(',', '.')
     try:
         prepayment = float(text)
@@ -102,32 +109,60 @@ async def process_prepayment(message: types.Message, state):
     client_date = user_data['day_rec']
 
     try:
-        save_client(client_name, client_link, client_time, client_date, prepayment)
-        await message.answer('Клиент успешно записан!')
+        client_id = save_client(tenant_id, client_name, client_link, client_time, client_date, prepayment, wait=True)
+        await _answer_saved(message, client_id)
     except Exception as e:
         await message.answer(f"Произошла ошибка при записи клиента: {e}")
 
     await state.finish()
 
-async def _finalize_client(callback_query: types.CallbackQuery, state, prepayment_value: float):
+async def _finalize_client(callback_query: types.CallbackQuery, state, tenant_id: int, prepayment_value: float):
     user_data = await state.get_data()
     client_name = user_data['name']
     client_link = user_data['link']
     client_time = user_data['time']
     client_date = user_data['day_rec']
     try:
-        save_client(client_name, client_link, client_time, client_date, prepayment_value)
-        await callback_query.message.answer('Клиент успешно записан!')
+        client_id = save_client(tenant_id, client_name, client_link, client_time, client_date, prepayment_value,
+                                wait=True)
+        await _answer_saved(callback_query.message, client_id)
     except Exception as e:
         await callback_query.message.answer(f"Произошла ошибка при записи клиента: {e}")
     await state.finish()
     await callback_query.answer()
 
-async def set_prepayment_yes(callback_query: types.CallbackQuery, state):
-    await _finalize_client(callback_query, state, 1.0)
+async def set_prepayment_yes(callback_query: types.CallbackQuery, state, tenant_id: int):
+    await _finalize_client(callback_query, state, tenant_id, 1.0)
 
-async def set_prepayment_no(callback_query: types.CallbackQuery, state):
-    await _finalize_client(callback_query, state, 0.0)
+async def set_prepayment_no(callback_query: types.CallbackQuery, state, tenant_id: int):
+    await _finalize_client(callback_query, state, tenant_id, 0.0)
+
+async def repeat_client(callback_query: types.CallbackQuery, tenant_id: int):
+    try:
+        _, _, weeks, client_id = callback_query.data.split("_")
+        interval_weeks = int(weeks)
+        client = get_client_by_id(tenant_id, int(client_id))
+    except ValueError:
+        client = None
+    # Кнопки старого формата или запись уже удалена
+    if client is None:
+        await callback_query.answer("Предложение устарело")
+        return
+    _, name, link, time, day_rec, _ = client
+    # Сама запись уже сохранена разово, серия начинается со следующего визита.
+    # Предоплата внесена за этот визит, будущие вхождения идут без нее.
+    # Дата старых записей может быть в произвольном формате
+    try:
+        start = date.fromisoformat(day_rec) + timedelta(weeks=interval_weeks)
+        series_id = create_series(tenant_id, name, link, time, start.isoformat(), interval_weeks, prepayment=0)
+    except (TypeError, ValueError, OverflowError):
+        series_id = None
+    if series_id is None:
+        await callback_query.answer("Не удалось создать повтор")
+        return
+    period = "каждую неделю" if interval_weeks == 1 else f"раз в {interval_weeks} недели"
+    await callback_query.message.edit_text(f"Клиент успешно записан! Повтор {period}.")
+    await callback_query.answer()
 
 def register_handlers(dp: Dispatcher):
     dp.register_message_handler(rec_client, Text(equals='Записать клиента'))
@@ -144,3 +179,4 @@ def register_handlers(dp: Dispatcher):
     dp.register_message_handler(process_prepayment, state=Form.waiting_for_prepayment)
     dp.register_callback_query_handler(set_prepayment_yes, state=Form.waiting_for_prepayment, text='prepay_yes')
     dp.register_callback_query_handler(set_prepayment_no, state=Form.waiting_for_prepayment, text='prepay_no')
+    dp.register_callback_query_handler(repeat_client, state='*', text_startswith='series_repeat_')
@@ -5,11 +5,7 @@ from datetime import datetime
 from keyboards.keyboards import kb_salary, get_continue_keyboard, get_months_keyboard
 from states.states import SalaryForm
 from database.database import add_salary_to_db, get_total_salary_for_month, remove_last_salary_from_db
-
-months = [
-    "январь", "февраль", "март", "апрель", "май", "июнь",
-    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь"
-]
+from utils.common import MONTHS_RU_GEN as months
 
 
 async def salary(message: Message):
@@ -21,7 +17,7 @@ async def salary_month_selection(callback_query: CallbackQuery):
     await callback_query.answer()
 
 
-async def salary_for_selected_month(callback_query: CallbackQuery):
+async def salary_for_selected_month(callback_query: CallbackQuery, tenant_id: int):
     try:
         data = callback_query.data
         month_index = int(data.split("_")[1])
@@ -30,7 +26,7 @@ async def salary_for_selected_month(callback_query: CallbackQuery):
         year = today.year
 
         month_year = f"{year}-{month_index:02d}"
-        total_salary = get_total_salary_for_month(month_year)
+        total_salary = get_total_salary_for_month(tenant_id, month_year)
 
         month_name = months[month_index - 1]
         await callback_query.message.answer(
@@ -68,7 +64,7 @@ async def process_salary(message: Message, state):
         await message.answer("Произошла ошибка при добавлении зарплаты.")
 
 
-async def process_selected_month_for_add_salary(callback_query: CallbackQuery, state):
+async def process_selected_month_for_add_salary(callback_query: CallbackQuery, state, tenant_id: int):
     try:
         data = await state.get_data()
         salary_amount = data.get("salary_amount")
@@ -82,9 +78,9 @@ async def process_selected_month_for_add_salary(callback_query: CallbackQuery, s
         year = today.year
         month_year = f"{year}-{month_index:02d}"
 
-        add_salary_to_db(salary_amount, month_year)
+        add_salary_to_db(tenant_id, salary_amount, month_year, wait=True)
 
-        total_salary = get_total_salary_for_month(month_year)
+        total_salary = get_total_salary_for_month(tenant_id, month_year)
         month_name = months[month_index - 1]
 
         await callback_query.message.answer(f"Зарплата за {month_name}: {total_salary} руб.")
@@ -110,13 +106,13 @@ async def handle_cancel_add(callback_query: CallbackQuery):
     await callback_query.answer()
 
 
-async def handle_remove_last_add(callback_query: CallbackQuery):
+async def handle_remove_last_add(callback_query: CallbackQuery, tenant_id: int):
     today = datetime.today()
     month_year = today.strftime("%Y-%m")
 
     try:
-        remove_last_salary_from_db(month_year)
-        total_salary = get_total_salary_for_month(month_year)
+        remove_last_salary_from_db(tenant_id, month_year)
+        total_salary = get_total_salary_for_month(tenant_id, month_year)
         month_name = months[today.month - 1]
         await callback_query.message.answer(
             f"Последняя сумма удалена. Текущая зарплата за {month_name}: {total_salary} руб.")
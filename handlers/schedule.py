@@ -1,76 +1,71 @@
+import asyncio
+import calendar
+
 from aiogram import types
 from aiogram.dispatcher import Dispatcher
-from datetime import date, datetime
+from aiogram.utils.exceptions import MessageNotModified
+from datetime import date
+from functools import partial
 
 from keyboards.keyboards import get_schedule_calendar_keyboard, months_ru
 from states.states import ScheduleForm
 from database.request_for_date import get_marked_days_for_month, get_clients_by_day
-from database.schedule_db import get_selected_days as db_get_selected_days, toggle_day as db_toggle_day
-
-
-def _shift_month(year: int, month: int, delta: int):
-    m = month + delta
-    y = year + (m - 1) // 12
-    m = ((m - 1) % 12) + 1
-    return y, m
-
-
-def _normalize_time_to_hhmm(value: str) -> str:
-    if not value:
-        return ""
-    t = value.strip().replace(' ', '').replace('.', ':').replace('-', ':').replace('/', ':')
-    if ':' not in t:
-        t = f"{t}:00"
-    parts = t.split(':')
+from database.schedule_db import (
+    clear_month as db_clear_month,
+    copy_previous_month as db_copy_previous_month,
+    get_selected_days as db_get_selected_days,
+    select_weekdays as db_select_weekdays,
+    toggle_day as db_toggle_day,
+    toggle_days as db_toggle_days,
+    weekday_days,
+)
+from utils.common import DEFAULT_SLOTS, shift_month
+from utils.schedule import build_schedule_lines
+
+# Быстрые нажатия подряд сводятся к одному edit_reply_markup: запись в БД идет сразу,
+# а клавиатура перерисуется, когда после последнего нажатия пройдет KEYBOARD_DEBOUNCE секунд
+KEYBOARD_DEBOUNCE = 0.4
+_pending_edits = {}
+
+
+def _cancel_keyboard_edit(message: types.Message):
+    task = _pending_edits.pop((message.chat.id, message.message_id), None)
+    if task is not None:
+        task.cancel()
+
+
+async def _edit_keyboard_later(key, message: types.Message, tenant_id: int, year: int, month: int, selected):
+    await asyncio.sleep(KEYBOARD_DEBOUNCE)
+    # Начатую правку новое нажатие уже не отменяет, а планирует следующую
+    if _pending_edits.get(key) is asyncio.current_task():
+        del _pending_edits[key]
+    marked = get_marked_days_for_month(tenant_id, year, month)
+    kb = get_schedule_calendar_keyboard(year, month, marked_days=marked, selected_days=selected)
     try:
-        hh = int(parts[0])
-    except Exception:
-        return ""
-    mm = int(parts[1]) if len(parts) > 1 and parts[1] != '' else 0
-    hh = max(0, min(23, hh))
-    mm = 0 if mm < 0 or mm > 59 else mm
-    return f"{hh:02d}:{mm:02d}"
-
-
-def _format_hhmm_with_dot(hhmm: str) -> str:
-    if not hhmm:
-        return ""
-    hh, mm = hhmm.split(':')
-    return f"{hh}.{mm}"
+        await message.edit_reply_markup(reply_markup=kb)
+    except MessageNotModified:
+        pass
+    except Exception as e:
+        print(f"Ошибка при обновлении календаря расписания: {e}")
 
-def _hhmm_to_minutes(hhmm: str) -> int:
-    try:
-        hh, mm = hhmm.split(':')
-        return int(hh) * 60 + int(mm)
-    except Exception:
-        return -1
 
+def _schedule_keyboard_edit(message: types.Message, tenant_id: int, year: int, month: int, selected):
+    _cancel_keyboard_edit(message)
+    key = (message.chat.id, message.message_id)
+    _pending_edits[key] = asyncio.create_task(_edit_keyboard_later(key, message, tenant_id, year, month, selected))
 
-DEFAULT_SLOTS = {
-    0: ["11:00", "14:00", "17:00", "19:00"],
-    1: ["11:00", "14:00", "17:00", "19:00"],
-    2: ["11:00", "14:00", "17:00", "19:00"],
-    3: ["11:00", "14:00", "17:00", "19:00"],
-    4: ["11:00", "14:00", "17:00", "19:00"],
-    5: ["10:00", "13:00", "16:00", "18:00"],
-    6: ["10:00", "13:00", "16:00", "18:00"],
-}
 
-WEEKDAYS_RU_SHORT = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
-MONTHS_RU_GEN = ["январь","февраль","март","апрель","май","июнь","июль","август","сентябрь","октябрь","ноябрь","декабрь"]
-
-
-async def open_schedule(message: types.Message, state):
+async def open_schedule(message: types.Message, state, tenant_id: int):
     today = date.today()
-    marked = get_marked_days_for_month(today.year, today.month)
-    selected_days = db_get_selected_days(today.year, today.month)
+    marked = get_marked_days_for_month(tenant_id, today.year, today.month)
+    selected_days = db_get_selected_days(tenant_id, today.year, today.month)
     kb = get_schedule_calendar_keyboard(today.year, today.month, marked_days=marked, selected_days=selected_days)
     await state.update_data(schedule_year=today.year, schedule_month=today.month)
     await message.answer(f"Выберите дни для расписания: {months_ru[today.month - 1]} {today.year}", reply_markup=kb)
     await ScheduleForm.selecting_days.set()
 
 
-async def schedule_nav(callback_query: types.CallbackQuery, state):
+async def schedule_nav(callback_query: types.CallbackQuery, state, tenant_id: int):
     data = await state.get_data()
     year = int(data.get("schedule_year"))
     month = int(data.get("schedule_month"))
@@ -79,11 +74,12 @@ async def schedule_nav(callback_query: types.CallbackQuery, state):
         _, kind, y, m = callback_query.data.split("_")
         y = int(y); m = int(m)
         delta = -1 if kind == "prev" else 1
-        year, month = _shift_month(y, m, delta)
+        year, month = shift_month(y, m, delta)
         # Получаем выбранные дни из БД для нового месяца
-        selected = db_get_selected_days(year, month)
-        marked = get_marked_days_for_month(year, month)
+        selected = db_get_selected_days(tenant_id, year, month)
+        marked = get_marked_days_for_month(tenant_id, year, month)
         kb = get_schedule_calendar_keyboard(year, month, marked_days=marked, selected_days=selected)
+        _cancel_keyboard_edit(callback_query.message)
         await callback_query.message.edit_text(f"Выберите дни для расписания: {months_ru[month - 1]} {year}")
         await callback_query.message.edit_reply_markup(reply_markup=kb)
         await state.update_data(schedule_year=year, schedule_month=month)
@@ -92,7 +88,7 @@ async def schedule_nav(callback_query: types.CallbackQuery, state):
         await callback_query.answer("Не удалось листать календарь")
 
 
-async def toggle_day(callback_query: types.CallbackQuery, state):
+async def toggle_day(callback_query: types.CallbackQuery, state, tenant_id: int):
     data = await state.get_data()
     year = int(data.get("schedule_year"))
     month = int(data.get("schedule_month"))
@@ -101,57 +97,55 @@ async def toggle_day(callback_query: types.CallbackQuery, state):
         y, m, d = ymd.split("-")
         year = int(y); month = int(m)
         d_int = int(d)
-        # Тоггл в БД
-        selected_now = db_toggle_day(year, month, d_int)
-        selected = db_get_selected_days(year, month)
-        marked = get_marked_days_for_month(year, month)
-        kb = get_schedule_calendar_keyboard(year, month, marked_days=marked, selected_days=selected)
-        await callback_query.message.edit_reply_markup(reply_markup=kb)
+        # Тоггл в БД сразу возвращает выбранные дни месяца
+        selected_now, selected = db_toggle_day(tenant_id, year, month, d_int)
+        _schedule_keyboard_edit(callback_query.message, tenant_id, year, month, selected)
         await state.update_data(schedule_year=year, schedule_month=month)
         await callback_query.answer("Выбрано" if selected_now else "Снято")
     except Exception:
         await callback_query.answer("Ошибка выбора дня")
 
 
-async def generate_schedule(callback_query: types.CallbackQuery, state):
+async def bulk_select(callback_query: types.CallbackQuery, state, tenant_id: int):
+    # Строка, столбец, будни, шаблон прошлого месяца, очистка — одна транзакция и одна правка клавиатуры
+    try:
+        parts = callback_query.data.split("_")
+        kind = parts[1]
+        year = int(parts[2]); month = int(parts[3])
+        if kind == "col":
+            selected_now, selected = db_toggle_days(tenant_id, year, month, weekday_days(year, month, {int(parts[4])}))
+            text = "Выбрано" if selected_now else "Снято"
+        elif kind == "week":
+            week = [day for day in calendar.Calendar(firstweekday=0).monthdayscalendar(year, month)[int(parts[4])] if day]
+            selected_now, selected = db_toggle_days(tenant_id, year, month, week)
+            text = "Неделя выбрана" if selected_now else "Неделя снята"
+        elif kind == "wdays":
+            selected = db_select_weekdays(tenant_id, year, month)
+            text = "Выбраны будни"
+        elif kind == "copy":
+            selected = db_copy_previous_month(tenant_id, year, month)
+            text = "Дни недели как в прошлом месяце" if selected else "В прошлом месяце дней не выбрано"
+        else:
+            selected = db_clear_month(tenant_id, year, month)
+            text = "Месяц очищен"
+        _schedule_keyboard_edit(callback_query.message, tenant_id, year, month, selected)
+        await state.update_data(schedule_year=year, schedule_month=month)
+        await callback_query.answer(text)
+    except Exception:
+        await callback_query.answer("Ошибка выбора дней")
+
+
+async def generate_schedule(callback_query: types.CallbackQuery, state, tenant_id: int):
     data = await state.get_data()
     year = int(data.get("schedule_year"))
     month = int(data.get("schedule_month"))
-    selected = sorted(db_get_selected_days(year, month))
+    selected = sorted(db_get_selected_days(tenant_id, year, month))
 
     if not selected:
         await callback_query.answer("Не выбраны дни")
         return
 
-    lines = [f"Расписание за {MONTHS_RU_GEN[month - 1]}:" , "" ]
-    for day in selected:
-        ymd = f"{year}-{month:02d}-{day:02d}"
-        dt = datetime.strptime(ymd, "%Y-%m-%d")
-        wd = dt.weekday()
-        slots = DEFAULT_SLOTS.get(wd, [])
-        if not slots:
-            continue
-        booked = { _normalize_time_to_hhmm(row[3]) for row in get_clients_by_day(ymd) }
-        human_date = dt.strftime("%d.%m")
-        wd_short = WEEKDAYS_RU_SHORT[wd]
-        booked_norm = {_normalize_time_to_hhmm(t) for t in booked if _normalize_time_to_hhmm(t)}
-        booked_minutes = {_hhmm_to_minutes(t) for t in booked_norm if _hhmm_to_minutes(t) >= 0}
-
-        candidate_times = set(slots) | set(booked_norm)
-        candidate_sorted = sorted(candidate_times, key=lambda t: _hhmm_to_minutes(t))
-
-        slot_texts = []
-        for hhmm in candidate_sorted:
-            disp = _format_hhmm_with_dot(hhmm)
-            tmin = _hhmm_to_minutes(hhmm)
-            if hhmm in booked_norm:
-                slot_texts.append(f"<s>{disp}</s>")
-                continue
-            too_close = any(abs(tmin - bm) <= 90 for bm in booked_minutes)
-            if not too_close:
-                slot_texts.append(disp)
-        lines.append(f"{human_date} ({wd_short}) " + " ".join(slot_texts))
-        lines.append("")
+    lines = build_schedule_lines(year, month, selected, DEFAULT_SLOTS, partial(get_clients_by_day, tenant_id))
 
     await callback_query.message.answer("\n".join(lines).rstrip(), parse_mode="HTML")
     await callback_query.answer("Готово")
@@ -172,6 +166,8 @@ def register_schedule(dp: Dispatcher):
     dp.register_callback_query_handler(schedule_nav, text_startswith='sch_prev_', state=ScheduleForm.selecting_days)
     dp.register_callback_query_handler(schedule_nav, text_startswith='sch_next_', state=ScheduleForm.selecting_days)
     dp.register_callback_query_handler(toggle_day, text_startswith='sch_day_', state=ScheduleForm.selecting_days)
+    dp.register_callback_query_handler(bulk_select, text_startswith=['sch_col_', 'sch_week_', 'sch_wdays_', 'sch_copy_', 'sch_clear_'],
+                                       state=ScheduleForm.selecting_days)
     dp.register_callback_query_handler(generate_schedule, text_startswith='sch_generate_', state=ScheduleForm.selecting_days)
     dp.register_callback_query_handler(schedule_exit, text='sch_exit', state=ScheduleForm.selecting_days)
 
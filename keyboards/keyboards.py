@@ -89,6 +89,23 @@ def get_prepayment_keyboard():
         [InlineKeyboardButton(text="Назад", callback_data="back")]
     ])
 
+def get_repeat_keyboard(client_id: int):
+    # В callback_data шаг и id сохраненной записи: предложение переживает перезапуск бота
+    return InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="Каждую неделю", callback_data=f"series_repeat_1_{client_id}"),
+         InlineKeyboardButton(text="Раз в 2 недели", callback_data=f"series_repeat_2_{client_id}")]
+    ])
+
+def get_occurrences_keyboard(occurrences):
+    # occurrences: (series_id, день, подпись) повторяющихся записей дня
+    kb = InlineKeyboardMarkup(row_width=2)
+    for series_id, ymd, label in occurrences:
+        kb.row(
+            InlineKeyboardButton(text=f"Пропустить {label}", callback_data=f"ser_skip_{series_id}_{ymd}"),
+            InlineKeyboardButton(text="Завершить серию", callback_data=f"ser_stop_{series_id}_{ymd}"),
+        )
+    return kb
+
 def get_calendar_keyboard(year: int, month: int, marked_days=None) -> InlineKeyboardMarkup:
     if marked_days is None:
         marked_days = set()
@@ -134,12 +151,14 @@ def get_schedule_calendar_keyboard(year: int, month: int, marked_days=None, sele
     next_cb = InlineKeyboardButton(text="›", callback_data=f"sch_next_{year}_{month}")
     cal.row(prev_cb, header, next_cb)
 
-    wd_buttons = [InlineKeyboardButton(text=wd, callback_data="sch_nop")
-                  for wd in ["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"]]
+    # Заголовок дня недели выбирает/снимает весь столбец, последняя кнопка строки — всю неделю
+    wd_buttons = [InlineKeyboardButton(text=wd, callback_data=f"sch_col_{year}_{month}_{index}")
+                  for index, wd in enumerate(["Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс"])]
+    wd_buttons.append(InlineKeyboardButton(text=" ", callback_data="sch_nop"))
     cal.row(*wd_buttons)
 
     month_calendar = calendar.Calendar(firstweekday=0).monthdayscalendar(year, month)
-    for week in month_calendar:
+    for week_index, week in enumerate(month_calendar):
         buttons = []
         for day_num in week:
             if day_num == 0:
@@ -149,8 +168,14 @@ def get_schedule_calendar_keyboard(year: int, month: int, marked_days=None, sele
                 checked = "✓" if day_num in selected_days else ""
                 label = f"{day_num}{marker}{checked}"
                 buttons.append(InlineKeyboardButton(text=label, callback_data=f"sch_day_{year}-{month:02d}-{day_num:02d}"))
+        buttons.append(InlineKeyboardButton(text="»", callback_data=f"sch_week_{year}_{month}_{week_index}"))
         cal.row(*buttons)
 
+    cal.row(
+        InlineKeyboardButton(text="Будни", callback_data=f"sch_wdays_{year}_{month}"),
+        InlineKeyboardButton(text="Как в прошлом", callback_data=f"sch_copy_{year}_{month}"),
+        InlineKeyboardButton(text="Очистить", callback_data=f"sch_clear_{year}_{month}"),
+    )
     cal.row(InlineKeyboardButton(text="Сгенерировать расписание", callback_data=f"sch_generate_{year}_{month}"))
     cal.row(InlineKeyboardButton(text="Выйти", callback_data="sch_exit"))
     return cal
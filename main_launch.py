@@ -1,11 +1,29 @@
+import asyncio
+
 from aiogram import executor
 
-from bot.bot import *
-from bot.register_dp import *
+from bot.bot import bot, dp
+from bot.config import bot_workers, metrics_port
+from bot.register_dp import register
+from database.changes import start_compaction
+from database.migrations import run_migrations
+from monitoring.loop_monitor import start_loop_monitor
+
+
+async def on_startup(dp):
+    run_migrations()
+    start_loop_monitor('bot')
+    start_compaction()
+    if metrics_port:
+        from monitoring.exporter import start_metrics_server
+        await start_metrics_server(metrics_port)
+    await bot.delete_webhook(drop_pending_updates=True)
 
 
 if __name__ == '__main__':
-    register(dp)
-    async def on_startup(dp):
-        await bot.delete_webhook(drop_pending_updates=True)
-    executor.start_polling(dp, skip_updates=True, on_startup=on_startup)
\ No newline at end of file
+    if bot_workers > 1:
+        from bot.sharding import run_sharded
+        asyncio.run(run_sharded(bot_workers))
+    else:
+        register(dp)
+        executor.start_polling(dp, skip_updates=True, on_startup=on_startup)
@@ -0,0 +1,41 @@
+import time
+
+from aiogram import Bot
+from aiogram.dispatcher.handler import current_handler
+from aiogram.dispatcher.middlewares import BaseMiddleware
+
+from monitoring.metrics import HANDLER_ERRORS, HANDLER_SECONDS, TELEGRAM_API_SECONDS
+
+
+def _handler_name(handler) -> str:
+    return f"{handler.__module__}.{handler.__qualname__}" if handler else 'unhandled'
+
+
+class MetricsMiddleware(BaseMiddleware):
+    # Один обработчик на все типы апдейтов: process_message, process_callback_query и т.д.
+    async def trigger(self, action, args):
+        if action == 'pre_process_error':
+            HANDLER_ERRORS.inc(exception=type(args[1]).__name__)
+            return
+        if action.endswith(('_update', '_error')):
+            return
+        data = args[-1]
+        if action.startswith('process_'):
+            data['metrics_handler'] = _handler_name(current_handler.get(None))
+            data['metrics_started'] = time.perf_counter()
+        elif action.startswith('post_process_') and 'metrics_started' in data:
+            elapsed = time.perf_counter() - data.pop('metrics_started')
+            HANDLER_SECONDS.observe(elapsed, handler=data.pop('metrics_handler'), update_type=action[len('post_process_'):])
+
+
+class InstrumentedBot(Bot):
+    async def request(self, method, data=None, files=None, **kwargs):
+        started = time.perf_counter()
+        status = 'ok'
+        try:
+            return await super().request(method, data, files, **kwargs)
+        except Exception:
+            status = 'error'
+            raise
+        finally:
+            TELEGRAM_API_SECONDS.observe(time.perf_counter() - started, method=method, status=status)
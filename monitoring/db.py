@@ -0,0 +1,167 @@
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from monitoring.metrics import DB_QUERY_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Трассировка включается явно: DB_TRACE=1, порог медленного запроса — DB_SLOW_QUERY_MS
+_tracing = os.getenv('DB_TRACE', '') not in ('', '0')
+slow_query_ms = float(os.getenv('DB_SLOW_QUERY_MS', '100'))
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH', 'REPLACE')
+
+_stats_lock = threading.Lock()
+# sql -> [количество, суммарное время, максимальное время, медленных]
+_stats = {}
+
+
+def _operation(sql: str) -> str:
+    parts = sql.split(None, 1)
+    return parts[0].upper() if parts else ''
+
+
+def set_tracing(enabled: bool, threshold_ms: float = None):
+    global _tracing, slow_query_ms
+    _tracing = enabled
+    if threshold_ms is not None:
+        slow_query_ms = threshold_ms
+
+
+def is_tracing() -> bool:
+    return _tracing
+
+
+def get_query_stats(limit: int = 10):
+    with _stats_lock:
+        items = [(sql, count, total, worst, slow) for sql, (count, total, worst, slow) in _stats.items()]
+    items.sort(key=lambda item: item[2], reverse=True)
+    return items[:limit]
+
+
+def reset_query_stats():
+    with _stats_lock:
+        _stats.clear()
+
+
+def format_query_stats(limit: int = 10) -> str:
+    items = get_query_stats(limit)
+    if not items:
+        return 'Статистики запросов нет (трассировка ' + ('включена' if _tracing else 'выключена') + ').'
+    lines = []
+    for sql, count, total, worst, slow in items:
+        lines.append(
+            f"{total * 1000:.1f} мс всего, {count} раз, среднее {total / count * 1000:.2f} мс, "
+            f"макс {worst * 1000:.2f} мс, медленных {slow}\n{sql}"
+        )
+    return '\n\n'.join(lines)
+
+
+def _query_plan(connection, sql: str, parameters) -> str:
+    if _operation(sql) not in _EXPLAINABLE:
+        return ''
+    try:
+        # Обычный курсор, чтобы EXPLAIN сам не попадал в статистику
+        rows = sqlite3.Cursor(connection).execute('EXPLAIN QUERY PLAN ' + sql, parameters).fetchall()
+    except sqlite3.Error as e:
+        return f"недоступен: {e}"
+    return '; '.join(row[-1] for row in rows)
+
+
+def _trace(connection, sql: str, parameters, elapsed: float):
+    key = _WHITESPACE_RE.sub(' ', sql).strip()
+    is_slow = elapsed * 1000 >= slow_query_ms
+    with _stats_lock:
+        entry = _stats.get(key)
+        if entry is None:
+            entry = _stats[key] = [0, 0.0, 0.0, 0]
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] = max(entry[2], elapsed)
+        entry[3] += is_slow
+    if is_slow:
+        plan = _query_plan(connection, sql, parameters) if parameters is not None else ''
+        logger.warning(
+            'Медленный запрос %.1f мс [%s]: %s | параметры: %r | план: %s',
+            elapsed * 1000, connection.db_label, key, parameters, plan,
+        )
+
+
+def _record(connection, sql: str, parameters, elapsed: float):
+    DB_QUERY_SECONDS.observe(elapsed, db=connection.db_label, operation=_operation(sql))
+    if _tracing:
+        _trace(connection, sql, parameters, elapsed)
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    # SELECT в sqlite3 выполняется лениво: execute() читает только первую строку,
+    # остальное — fetch*(). Поэтому время запроса с результатом фиксируется после выборки.
+    _pending = None
+
+    def _flush(self, extra: float = 0.0):
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, parameters, elapsed = pending
+            _record(self.connection, sql, parameters, elapsed + extra)
+
+    def execute(self, sql, parameters=()):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            result = super().execute(sql, parameters)
+        except Exception:
+            self._pending = (sql, parameters, time.perf_counter() - started)
+            self._flush()
+            raise
+        self._pending = (sql, parameters, time.perf_counter() - started)
+        if self.description is None:
+            self._flush()
+        return result
+
+    def executemany(self, sql, seq_of_parameters):
+        self._flush()
+        started = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._pending = (sql, None, time.perf_counter() - started)
+            self._flush()
+
+    def _timed_fetch(self, fetch, *args):
+        started = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            self._flush(time.perf_counter() - started)
+
+    def fetchone(self):
+        return self._timed_fetch(super().fetchone)
+
+    def fetchmany(self, *args):
+        return self._timed_fetch(super().fetchmany, *args)
+
+    def fetchall(self):
+        return self._timed_fetch(super().fetchall)
+
+    def close(self):
+        self._flush()
+        super().close()
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    # Connection.execute() внутри вызывает self.cursor(), поэтому достаточно подменить фабрику курсора
+    def __init__(self, database, *args, **kwargs):
+        super().__init__(database, *args, **kwargs)
+        self.db_label = os.path.basename(os.fspath(database))
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+
+def connect(db_path: str, **kwargs) -> sqlite3.Connection:
+    return sqlite3.connect(db_path, factory=InstrumentedConnection, **kwargs)
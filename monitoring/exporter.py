@@ -0,0 +1,17 @@
+from aiohttp import web
+
+from monitoring.metrics import CONTENT_TYPE, render
+
+
+async def _metrics(request):
+    return web.Response(body=render().encode(), headers={'Content-Type': CONTENT_TYPE})
+
+
+async def start_metrics_server(port: int, host: str = '0.0.0.0') -> web.AppRunner:
+    # Процесс бота не поднимает HTTP-сервер, поэтому /metrics отдается отдельным aiohttp-приложением
+    app = web.Application()
+    app.router.add_get('/metrics', _metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
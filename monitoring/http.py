@@ -0,0 +1,19 @@
+import time
+
+from monitoring.metrics import HTTP_REQUEST_SECONDS
+
+
+async def metrics_middleware(request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Шаблон маршрута (/api/clients/{client_id}), а не сырой путь — иначе метки не ограничены
+        route = request.scope.get('route')
+        route_path = getattr(route, 'path', None) or 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started, method=request.method, route=route_path, status=str(status),
+        )
@@ -0,0 +1,83 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+from monitoring.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG_SECONDS = Histogram(
+    'event_loop_lag_seconds', 'Задержка пробуждения контрольной корутины event loop', ['process'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_LAG_LAST = Gauge('event_loop_lag_last_seconds', 'Последняя измеренная задержка event loop', ['process'])
+LOOP_BLOCKED = Counter('event_loop_blocked_total', 'Сколько раз event loop был заблокирован дольше порога', ['process'])
+
+enabled = os.getenv('LOOP_MONITOR', '1') not in ('', '0')
+block_threshold_ms = float(os.getenv('LOOP_BLOCK_THRESHOLD_MS', '100'))
+
+
+class LoopMonitor:
+    # Контрольная корутина засыпает на interval и меряет, насколько позже проснулась.
+    # Отдельный поток-сторож смотрит на время последнего пробуждения: если loop молчит
+    # дольше порога, он снимает стек потока loop — это и есть блокирующий вызов.
+    def __init__(self, process: str, interval: float = 0.1, threshold: float = None):
+        self.process = process
+        self.interval = interval
+        self.threshold = (block_threshold_ms / 1000) if threshold is None else threshold
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        self._loop_thread_id = None
+        self._last_beat = time.monotonic()
+        self._reported_beat = None
+
+    async def _heartbeat(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - expected)
+            self._last_beat = now
+            LOOP_LAG_SECONDS.observe(lag, process=self.process)
+            LOOP_LAG_LAST.set(lag, process=self.process)
+
+    def _watch(self):
+        while not self._stopped.wait(self.threshold / 2):
+            beat = self._last_beat
+            blocked_for = time.monotonic() - beat - self.interval
+            if blocked_for < self.threshold or self._reported_beat == beat:
+                continue
+            self._reported_beat = beat
+            LOOP_BLOCKED.inc(process=self.process)
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = ''.join(traceback.format_stack(frame)) if frame is not None else '<стек недоступен>'
+            logger.warning('Event loop (%s) заблокирован уже %.0f мс, стек потока loop:\n%s',
+                           self.process, blocked_for * 1000, stack)
+
+    def start(self):
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._heartbeat())
+        self._watchdog = threading.Thread(target=self._watch, name=f'loop-monitor-{self.process}', daemon=True)
+        self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+def start_loop_monitor(process: str):
+    # Вызывать из корутины, работающей в отслеживаемом event loop
+    if not enabled:
+        return None
+    monitor = LoopMonitor(process)
+    monitor.start()
+    return monitor
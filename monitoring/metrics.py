@@ -0,0 +1,178 @@
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Метрики в текстовом формате Prometheus, без внешних зависимостей
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = []
+_caches = {}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # [счетчики по бакетам (+Inf последним), количество, сумма]
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+            state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def get_count(self, **labels):
+        state = self._values.get(self._key(labels))
+        return state[1] if state else 0
+
+    def _render_sample(self, key, value):
+        counts, total_count, total_sum = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_count{labels} {total_count}")
+        lines.append(f"{self.name}_sum{labels} {_format_value(total_sum)}")
+        return lines
+
+
+def register_cache(name: str, cache_info):
+    # cache_info — функция без аргументов, как у functools.lru_cache: (hits, misses, maxsize, currsize)
+    _caches[name] = cache_info
+
+
+def _render_caches():
+    if not _caches:
+        return []
+    lines = []
+    samples = [(name, info()) for name, info in sorted(_caches.items())]
+    for metric, kind, doc, field in [
+        ('cache_hits_total', 'counter', 'Попадания в кеш', 'hits'),
+        ('cache_misses_total', 'counter', 'Промахи кеша', 'misses'),
+        ('cache_size', 'gauge', 'Текущий размер кеша', 'currsize'),
+    ]:
+        lines.append(f"# HELP {metric} {doc}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, info in samples:
+            lines.append(f'{metric}{{cache="{_escape(name)}"}} {getattr(info, field)}')
+    lines.append('# HELP cache_hit_ratio Доля попаданий в кеш')
+    lines.append('# TYPE cache_hit_ratio gauge')
+    for name, info in samples:
+        requests = info.hits + info.misses
+        ratio = info.hits / requests if requests else 0.0
+        lines.append(f'cache_hit_ratio{{cache="{_escape(name)}"}} {_format_value(ratio)}')
+    return lines
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    lines.extend(_render_caches())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+HANDLER_SECONDS = Histogram('bot_handler_seconds', 'Время обработки апдейта хендлером бота', ['handler', 'update_type'])
+HANDLER_ERRORS = Counter('bot_handler_errors_total', 'Необработанные исключения в хендлерах бота', ['exception'])
+TELEGRAM_API_SECONDS = Histogram('telegram_api_seconds', 'Время запросов к Telegram Bot API', ['method', 'status'])
+HTTP_REQUEST_SECONDS = Histogram('http_request_seconds', 'Время обработки HTTP-запроса', ['method', 'route', 'status'])
+DB_QUERY_SECONDS = Histogram('db_query_seconds', 'Время выполнения SQL-запроса', ['db', 'operation'])
+SHARD_WORKER_UP = Gauge('bot_shard_worker_up', 'Процесс-обработчик шарда бота работает (1) или нет (0)', ['shard'])
+SHARD_WORKER_RESTARTS = Counter('bot_shard_worker_restarts_total', 'Перезапуски обработчика шарда', ['shard', 'reason'])
+SHARD_UPDATES_PENDING = Gauge('bot_shard_updates_pending', 'Апдейты шарда, отданные обработчику и еще не обработанные', ['shard'])
+SHARD_UPDATES_REPLAYED = Counter('bot_shard_updates_replayed_total', 'Апдейты, повторно отданные после падения обработчика', ['shard'])
+SHARD_UPDATES_DROPPED = Counter('bot_shard_updates_dropped_total', 'Апдейты, отброшенные после SHARD_REPLAY_LIMIT падений', ['shard'])
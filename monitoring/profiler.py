@@ -0,0 +1,90 @@
+import asyncio
+import cProfile
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+MAX_PROFILE_SECONDS = 120
+DEFAULT_INTERVAL = 0.005
+
+_profile_lock = threading.Lock()
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        stack.append(_frame_label(frame))
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+def sample_stacks(seconds: float, interval: float = DEFAULT_INTERVAL) -> str:
+    # Стековый сэмплер по всем потокам процесса: и event loop, и пул потоков, где
+    # выполняются синхронные маршруты FastAPI. Результат — collapsed stacks для flamegraph.pl/speedscope.
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    try:
+        own_id = threading.get_ident()
+        names = {}
+        samples = Counter()
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            frames = sys._current_frames()
+            if len(names) != len(frames):
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in frames.items():
+                if thread_id == own_id:
+                    continue
+                samples[f"{names.get(thread_id, thread_id)};{_collapse(frame)}"] += 1
+            time.sleep(interval)
+    finally:
+        _profile_lock.release()
+    return ''.join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+async def sample_stacks_async(seconds: float, interval: float = DEFAULT_INTERVAL) -> str:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, sample_stacks, seconds, interval)
+
+
+async def profile_event_loop(seconds: float) -> bytes:
+    # cProfile в потоке event loop: все корутины и колбэки за время профилирования.
+    # Возвращает содержимое файла .pstats (pstats.Stats / snakeviz).
+    seconds = min(max(seconds, 0.1), MAX_PROFILE_SECONDS)
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy()
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+    finally:
+        _profile_lock.release()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'profile.pstats')
+        profiler.dump_stats(path)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+async def run_profile(seconds: float, fmt: str = 'collapsed'):
+    # -> (содержимое, имя файла)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    if fmt == 'pstats':
+        return await profile_event_loop(seconds), f"profile-{stamp}.pstats"
+    return (await sample_stacks_async(seconds)).encode(), f"profile-{stamp}.collapsed.txt"
@@ -0,0 +1,112 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from typing import NamedTuple, Optional
+
+from fastapi.responses import HTMLResponse, Response
+from starlette.datastructures import Headers
+from starlette.staticfiles import StaticFiles
+
+# Ассеты с хешем содержимого в имени никогда не меняются, браузер и Telegram WebView берут их из кеша.
+# index.html отдается с no-cache и ETag: при повторном открытии это один короткий 304
+ASSET_PREFIX = "/assets/"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+INDEX_CACHE_CONTROL = "no-cache"
+HASH_LENGTH = 12
+GZIP_LEVEL = 9
+GZIP_MIN_SIZE = 1024
+TEXT_EXTENSIONS = (".css", ".js")
+
+_ASSET_REF_RE = re.compile(r"/assets/([\w./-]+)")
+
+
+class Asset(NamedTuple):
+    content: bytes
+    gzipped: Optional[bytes]
+    media_type: str
+    etag: str
+
+
+def _etag(content: bytes) -> str:
+    return '"' + hashlib.sha256(content).hexdigest()[:HASH_LENGTH] + '"'
+
+
+def _accepts_gzip(headers: Headers) -> bool:
+    return "gzip" in headers.get("accept-encoding", "")
+
+
+class AssetBundle:
+    def __init__(self, assets_dir: str, index_path: str):
+        self.assets_dir = assets_dir
+        self.index_path = index_path
+        self.hashed_names = {}
+        self._assets = {}
+        self._index = None
+
+    def build(self):
+        hashed_names = {}
+        assets = {}
+        paths = []
+        for root, _dirs, files in os.walk(self.assets_dir):
+            for filename in files:
+                paths.append(os.path.relpath(os.path.join(root, filename), self.assets_dir).replace(os.sep, "/"))
+        # Сначала картинки и прочее, затем css/js: в них подставляются уже хешированные имена
+        paths.sort(key=lambda path: (path.endswith(TEXT_EXTENSIONS), path))
+        for path in paths:
+            with open(os.path.join(self.assets_dir, path), "rb") as f:
+                content = f.read()
+            if path.endswith(TEXT_EXTENSIONS):
+                content = self._rewrite(content.decode("utf-8"), hashed_names).encode("utf-8")
+            stem, ext = os.path.splitext(path)
+            digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+            hashed = f"{stem}.{digest}{ext}"
+            media_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            gzipped = None
+            if path.endswith(TEXT_EXTENSIONS) and len(content) >= GZIP_MIN_SIZE:
+                gzipped = gzip.compress(content, GZIP_LEVEL)
+            hashed_names[path] = hashed
+            assets[hashed] = Asset(content, gzipped, media_type, f'"{digest}"')
+
+        with open(self.index_path, encoding="utf-8") as f:
+            index = self._rewrite(f.read(), hashed_names).encode("utf-8")
+        self.hashed_names = hashed_names
+        self._assets = assets
+        self._index = Asset(index, None, "text/html", _etag(index))
+
+    def _rewrite(self, text: str, hashed_names: dict) -> str:
+        return _ASSET_REF_RE.sub(lambda m: ASSET_PREFIX + hashed_names.get(m.group(1), m.group(1)), text)
+
+    def get(self, path: str) -> Optional[Asset]:
+        if self._index is None:
+            self.build()
+        return self._assets.get(path)
+
+    def index_response(self, headers: Headers) -> Response:
+        if self._index is None:
+            self.build()
+        response_headers = {"Cache-Control": INDEX_CACHE_CONTROL, "ETag": self._index.etag}
+        if headers.get("if-none-match") == self._index.etag:
+            return Response(status_code=304, headers=response_headers)
+        return HTMLResponse(self._index.content, headers=response_headers)
+
+
+class HashedStaticFiles(StaticFiles):
+    def __init__(self, bundle: AssetBundle, **kwargs):
+        super().__init__(directory=bundle.assets_dir, **kwargs)
+        self.bundle = bundle
+
+    async def get_response(self, path: str, scope) -> Response:
+        asset = self.bundle.get(path)
+        if asset is None:
+            # Старые ссылки без хеша (закешированный index.html) обслуживаются как раньше
+            return await super().get_response(path, scope)
+        request_headers = Headers(scope=scope)
+        headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": asset.etag, "Vary": "Accept-Encoding"}
+        if request_headers.get("if-none-match") == asset.etag:
+            return Response(status_code=304, headers=headers)
+        if asset.gzipped is not None and _accepts_gzip(request_headers):
+            headers["Content-Encoding"] = "gzip"
+            return Response(asset.gzipped, media_type=asset.media_type, headers=headers)
+        return Response(asset.content, media_type=asset.media_type, headers=headers)
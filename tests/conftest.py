@@ -0,0 +1,13 @@
+import pytest
+
+import database.database
+from database.migrations import CLIENTS_MIGRATIONS, migrate
+
+
+@pytest.fixture
+def clients_db(tmp_path, monkeypatch):
+    # Пустая база клиентов со всеми миграциями вместо database_client.db
+    db_path = str(tmp_path / 'clients.db')
+    migrate(db_path, CLIENTS_MIGRATIONS, backup=False)
+    monkeypatch.setattr(database.database, 'DB_PATH', db_path)
+    return db_path
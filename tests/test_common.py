@@ -0,0 +1,130 @@
+from datetime import date
+
+import pytest
+
+from utils.common import (
+    format_date_display,
+    format_hhmm_with_dot,
+    format_prepayment,
+    hhmm_to_minutes,
+    normalize_date,
+    normalize_time_to_hhmm,
+    parse_iso_date,
+    parse_time_to_minutes,
+    shift_month,
+)
+
+UNPARSED = 24 * 60 + 1
+
+
+@pytest.mark.parametrize('year, month, delta, expected', [
+    (2025, 5, 0, (2025, 5)),
+    (2025, 5, 1, (2025, 6)),
+    (2025, 12, 1, (2026, 1)),
+    (2026, 1, -1, (2025, 12)),
+    (2025, 11, 14, (2027, 1)),
+    (2025, 2, -14, (2023, 12)),
+    (2025, 1, -12, (2024, 1)),
+])
+def test_shift_month(year, month, delta, expected):
+    assert shift_month(year, month, delta) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    (None, '✗'),
+    (0, '✗'),
+    (0.0, '✗'),
+    ('abc', '✗'),
+    (1, '✓'),
+    ('1', '✓'),
+    (1500, '1500'),
+    (12.5, '12.5'),
+    ('2000.10', '2000.1'),
+])
+def test_format_prepayment(value, expected):
+    assert format_prepayment(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('11:00', '11:00'),
+    ('11.30', '11:30'),
+    ('11-30', '11:30'),
+    ('11/30', '11:30'),
+    (' 9 - 05 ', '09:05'),
+    ('7', '07:00'),
+    ('11:', '11:00'),
+    ('1:2:3', '01:02'),
+    # Часы прижимаются к 0..23, недопустимые минуты становятся нулем
+    ('25:70', '23:00'),
+    ('', ''),
+    (None, ''),
+    ('aa', ''),
+    ('11:ab', ''),
+    ('-1', ''),
+])
+def test_normalize_time_to_hhmm(value, expected):
+    assert normalize_time_to_hhmm(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('00:00', 0),
+    ('09:05', 545),
+    ('23:59', 1439),
+    ('', -1),
+    ('9', -1),
+    ('ab:cd', -1),
+])
+def test_hhmm_to_minutes(value, expected):
+    assert hhmm_to_minutes(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('10:30', 630),
+    ('10.30', 630),
+    ('10', 600),
+    ('0:00', 0),
+    # Нераспознанное и выходящее за сутки время сортируется в конец дня
+    ('24:00', UNPARSED),
+    ('10:60', UNPARSED),
+    ('11:ab', UNPARSED),
+    ('', UNPARSED),
+    (None, UNPARSED),
+])
+def test_parse_time_to_minutes(value, expected):
+    assert parse_time_to_minutes(value) == expected
+
+
+def test_format_hhmm_with_dot():
+    assert format_hhmm_with_dot('09:05') == '09.05'
+    assert format_hhmm_with_dot('') == ''
+
+
+def test_parse_iso_date():
+    assert parse_iso_date('2024-02-29') == date(2024, 2, 29)
+    # Неполная запись разбирается через strptime
+    assert parse_iso_date('2024-2-5') == date(2024, 2, 5)
+    for value in ('2023-02-29', '29.02.2024', '2024/02/29', ''):
+        with pytest.raises(ValueError):
+            parse_iso_date(value)
+
+
+def test_format_date_display():
+    assert format_date_display('2025-01-07') == '07.01.2025'
+    with pytest.raises(ValueError):
+        format_date_display('2025-13-01')
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('2025-03-05', '2025-03-05'),
+    (' 2025-03-05 ', '2025-03-05'),
+    ('05.03.2025', '2025-03-05'),
+    ('5.3.2025', '2025-03-05'),
+])
+def test_normalize_date(value, expected):
+    assert normalize_date(value) == expected
+
+
+@pytest.mark.parametrize('value', ['', None, '2025-02-30', '30.02.2025', 'завтра'])
+def test_normalize_date_invalid(value):
+    with pytest.raises(ValueError):
+        normalize_date(value)
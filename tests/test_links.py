@@ -0,0 +1,49 @@
+import pytest
+
+from database.database import _normalize_link_base, count_visits_by_link, save_client
+from database.delete_client import delete_client
+from database.request_for_date import get_upcoming_visits
+from database.series import create_series
+
+TENANT = 1
+SPELLINGS = ['@anna', 'anna', 't.me/anna', 'https://t.me/anna', 'http://t.me/Anna', 'telegram.me/anna',
+             'https://telegram.me/ANNA', '@Anna', ' @anna ']
+
+
+@pytest.mark.parametrize('link', SPELLINGS)
+def test_normalize_link_base(link):
+    assert _normalize_link_base(link) == 'anna'
+
+
+@pytest.mark.parametrize('link', ['', None, '   ', '@'])
+def test_normalize_link_base_empty(link):
+    assert _normalize_link_base(link) == ''
+
+
+def test_any_spelling_finds_all_visits(clients_db):
+    for day, link in enumerate(SPELLINGS, start=10):
+        save_client(TENANT, 'Анна', link, '10:00', f'2025-03-{day}', 0)
+    save_client(TENANT, 'Другая', '@annabel', '10:00', '2025-03-10', 0)
+
+    visits = get_upcoming_visits(TENANT, ['http://telegram.me/Anna'], '2025-03-01', per_link=20)
+    assert visits == {'anna': [(f'2025-03-{day}', '10:00') for day in range(10, 10 + len(SPELLINGS))]}
+    assert count_visits_by_link(TENANT, 'T.ME/anna') == (len(SPELLINGS), '@anna')
+
+
+def test_upcoming_visits_include_series_with_other_spelling(clients_db):
+    create_series(TENANT, 'Анна', 'https://t.me/Anna', '12:00', '2025-03-03')
+    visits = get_upcoming_visits(TENANT, ['@anna'], '2025-03-01', per_link=2)
+    assert visits == {'anna': [('2025-03-03', '12:00'), ('2025-03-10', '12:00')]}
+
+
+def test_delete_client_removes_every_spelling(clients_db):
+    for link in SPELLINGS:
+        save_client(TENANT, 'Анна', link, '10:00', '2025-03-10', 0)
+    create_series(TENANT, 'Анна', 'telegram.me/anna', '12:00', '2025-03-03')
+    save_client(TENANT, 'Другая', '@annabel', '10:00', '2025-03-10', 0)
+
+    assert delete_client(TENANT, 'https://t.me/ANNA')
+    assert count_visits_by_link(TENANT, '@anna') == (0, '@anna')
+    assert get_upcoming_visits(TENANT, ['@anna'], '2025-03-01') == {}
+    assert count_visits_by_link(TENANT, '@annabel') == (1, '@annabel')
+    assert not delete_client(TENANT, '@anna')
@@ -0,0 +1,35 @@
+from database.series import create_series, get_occurrences, move_occurrence, stop_series
+
+TENANT = 1
+
+
+def _days(start, end):
+    return [row[4] for row in get_occurrences(TENANT, start, end)]
+
+
+def test_stop_series_hides_occurrence_moved_past_stop(clients_db):
+    series_id = create_series(TENANT, 'Анна', '@anna', '10:00', '2025-03-03')
+    assert move_occurrence(TENANT, series_id, '2025-03-10', '2025-03-26')
+    assert _days('2025-03-01', '2025-03-31') == ['2025-03-03', '2025-03-17', '2025-03-24', '2025-03-26', '2025-03-31']
+
+    assert stop_series(TENANT, series_id, '2025-03-20')
+    assert _days('2025-03-01', '2025-03-31') == ['2025-03-03', '2025-03-17']
+
+
+def test_stop_series_hides_later_occurrence_moved_before_stop(clients_db):
+    series_id = create_series(TENANT, 'Анна', '@anna', '10:00', '2025-03-03')
+    assert move_occurrence(TENANT, series_id, '2025-03-24', '2025-03-12')
+
+    assert stop_series(TENANT, series_id, '2025-03-20')
+    assert _days('2025-03-01', '2025-03-31') == ['2025-03-03', '2025-03-10', '2025-03-17']
+
+
+def test_moved_occurrence_before_stop_is_kept(clients_db):
+    series_id = create_series(TENANT, 'Анна', '@anna', '10:00', '2025-03-03')
+    assert move_occurrence(TENANT, series_id, '2025-03-10', '2025-03-12', '12:00')
+
+    assert stop_series(TENANT, series_id, '2025-03-20')
+    occurrences = get_occurrences(TENANT, '2025-03-01', '2025-03-31')
+    assert [(row[3], row[4]) for row in occurrences] == [
+        ('10:00', '2025-03-03'), ('12:00', '2025-03-12'), ('10:00', '2025-03-17'),
+    ]
@@ -0,0 +1,91 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from functools import partial
+
+from bot import sharding
+from bot.sharding import ShardedDispatcher, fake_updates
+from monitoring.metrics import SHARD_UPDATES_REPLAYED, SHARD_WORKER_RESTARTS, SHARD_WORKER_UP
+
+UPDATES = 200
+CHATS = 10
+
+
+@asynccontextmanager
+async def crashing_worker(directory: str, crash_on: int):
+    # Записывает update_id обработанных апдейтов; на апдейте crash_on процесс один раз падает
+    marker = os.path.join(directory, 'crashed')
+
+    async def handle(update: dict):
+        if update['update_id'] == crash_on and not os.path.exists(marker):
+            open(marker, 'w').close()
+            os._exit(1)
+        with open(os.path.join(directory, f'handled-{os.getpid()}'), 'a') as f:
+            f.write(f"{update['update_id']}\n")
+
+    yield handle
+
+
+def _handled(directory):
+    ids = []
+    for name in os.listdir(directory):
+        if name.startswith('handled-'):
+            with open(os.path.join(directory, name)) as f:
+                ids += [int(line) for line in f]
+    return ids
+
+
+def test_crashed_worker_updates_are_replayed(tmp_path, monkeypatch):
+    monkeypatch.setattr(sharding, 'WATCH_INTERVAL', 0.1)
+    crash_on = UPDATES // 2
+    replayed = SHARD_UPDATES_REPLAYED.get(shard=0)
+
+    async def run():
+        dispatcher = ShardedDispatcher(1, partial(crashing_worker, str(tmp_path), crash_on))
+        dispatcher.start()
+        async for update in fake_updates(UPDATES, CHATS):
+            dispatcher.dispatch(update)
+        for _ in range(100):
+            await asyncio.sleep(0.1)
+            if not dispatcher.pending[0]:
+                break
+        await dispatcher.stop()
+        return dispatcher
+
+    restarts = SHARD_WORKER_RESTARTS.get(shard=0, reason='crash')
+    dispatcher = asyncio.run(run())
+    assert os.path.exists(tmp_path / 'crashed')
+    # Каждый апдейт обработан, включая тот, на котором процесс упал, и все, что стояли за ним
+    assert set(_handled(str(tmp_path))) == set(range(1, UPDATES + 1))
+    assert not dispatcher.pending[0]
+    assert SHARD_WORKER_RESTARTS.get(shard=0, reason='crash') == restarts + 1
+    assert SHARD_UPDATES_REPLAYED.get(shard=0) > replayed
+    assert SHARD_WORKER_UP.get(shard=0) == 0
+
+
+@asynccontextmanager
+async def always_crashing_worker(crash_on: int):
+    async def handle(update: dict):
+        if update['update_id'] == crash_on:
+            os._exit(1)
+
+    yield handle
+
+
+def test_update_crashing_every_worker_is_dropped(monkeypatch):
+    monkeypatch.setattr(sharding, 'WATCH_INTERVAL', 0.1)
+
+    async def run():
+        dispatcher = ShardedDispatcher(1, partial(always_crashing_worker, 5))
+        dispatcher.start()
+        async for update in fake_updates(10, 1):
+            dispatcher.dispatch(update)
+        for _ in range(100):
+            await asyncio.sleep(0.1)
+            if not dispatcher.pending[0]:
+                break
+        await dispatcher.stop()
+        return dispatcher
+
+    dispatcher = asyncio.run(run())
+    assert not dispatcher.pending[0]
@@ -0,0 +1,133 @@
+import re
+from datetime import date, datetime
+from functools import lru_cache
+
+from monitoring.metrics import register_cache
+
+DEFAULT_SLOTS = {
+    0: ["11:00", "14:00", "17:00", "19:00"],
+    1: ["11:00", "14:00", "17:00", "19:00"],
+    2: ["11:00", "14:00", "17:00", "19:00"],
+    3: ["11:00", "14:00", "17:00", "19:00"],
+    4: ["11:00", "14:00", "17:00", "19:00"],
+    5: ["10:00", "13:00", "16:00", "18:00"],
+    6: ["10:00", "13:00", "16:00", "18:00"],
+}
+
+WEEKDAYS_RU_SHORT = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
+MONTHS_RU_GEN = [
+    "январь", "февраль", "март", "апрель", "май", "июнь",
+    "июль", "август", "сентябрь", "октябрь", "ноябрь", "декабрь",
+]
+
+# Время вводится как 11:00, 11.00, 11-00, 11/00 или просто 11
+_TIME_SEP_RE = re.compile(r"[.\-/]")
+_UNPARSED_TIME_MINUTES = 24 * 60 + 1
+
+
+def shift_month(year: int, month: int, delta: int):
+    m = month + delta
+    y = year + (m - 1) // 12
+    m = ((m - 1) % 12) + 1
+    return y, m
+
+
+@lru_cache(maxsize=256)
+def format_prepayment(value) -> str:
+    if value is None:
+        return "✗"
+    try:
+        num = float(value)
+    except Exception:
+        return "✗"
+    if num == 0:
+        return "✗"
+    if num == 1:
+        return "✓"
+    return f"{num:.2f}".rstrip("0").rstrip(".")
+
+
+@lru_cache(maxsize=1024)
+def normalize_time_to_hhmm(value: str) -> str:
+    if not value:
+        return ""
+    t = _TIME_SEP_RE.sub(":", value.strip().replace(" ", ""))
+    if ":" not in t:
+        t = f"{t}:00"
+    parts = t.split(":")
+    try:
+        hh = int(parts[0])
+        mm = int(parts[1]) if len(parts) > 1 and parts[1] != "" else 0
+    except Exception:
+        return ""
+    hh = max(0, min(23, hh))
+    mm = 0 if mm < 0 or mm > 59 else mm
+    return f"{hh:02d}:{mm:02d}"
+
+
+@lru_cache(maxsize=1024)
+def hhmm_to_minutes(hhmm: str) -> int:
+    try:
+        hh, mm = hhmm.split(":")
+        return int(hh) * 60 + int(mm)
+    except Exception:
+        return -1
+
+
+@lru_cache(maxsize=1024)
+def parse_time_to_minutes(value: str) -> int:
+    # Ключ сортировки записей: нераспознанное время уходит в конец дня
+    try:
+        if not value:
+            return _UNPARSED_TIME_MINUTES
+        cleaned = _TIME_SEP_RE.sub(":", value.strip().replace(" ", ""))
+        if ":" in cleaned:
+            parts = cleaned.split(":")
+            hour = int(parts[0])
+            minute = int(parts[1]) if len(parts) > 1 and parts[1] != "" else 0
+        else:
+            hour = int(cleaned)
+            minute = 0
+        if hour < 0 or hour > 23 or minute < 0 or minute > 59:
+            return _UNPARSED_TIME_MINUTES
+        return hour * 60 + minute
+    except Exception:
+        return _UNPARSED_TIME_MINUTES
+
+
+def format_hhmm_with_dot(hhmm: str) -> str:
+    if not hhmm:
+        return ""
+    hh, mm = hhmm.split(":")
+    return f"{hh}.{mm}"
+
+
+@lru_cache(maxsize=4096)
+def parse_iso_date(value: str) -> date:
+    # Даты в базе хранятся как YYYY-MM-DD, strptime оставляем для прочих вариантов
+    if len(value) == 10 and value[4] == "-" and value[7] == "-":
+        return date.fromisoformat(value)
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+@lru_cache(maxsize=4096)
+def format_date_display(value: str) -> str:
+    return parse_iso_date(value).strftime("%d.%m.%Y")
+
+
+@lru_cache(maxsize=1024)
+def normalize_date(value: str) -> str:
+    if not value:
+        raise ValueError("empty date")
+    value = value.strip()
+    try:
+        if "." in value:
+            return datetime.strptime(value, "%d.%m.%Y").strftime("%Y-%m-%d")
+        return parse_iso_date(value).isoformat()
+    except Exception as exc:
+        raise ValueError("invalid date") from exc
+
+
+for _cached in (format_prepayment, normalize_time_to_hhmm, hhmm_to_minutes, parse_time_to_minutes,
+                parse_iso_date, format_date_display, normalize_date):
+    register_cache(_cached.__name__, _cached.cache_info)
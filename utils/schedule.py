@@ -0,0 +1,39 @@
+from datetime import date
+
+from utils.common import (
+    MONTHS_RU_GEN,
+    WEEKDAYS_RU_SHORT,
+    format_hhmm_with_dot,
+    hhmm_to_minutes,
+    normalize_time_to_hhmm,
+)
+
+
+def build_schedule_lines(year: int, month: int, selected_days, slots_by_weekday: dict, get_day_clients):
+    lines = [f"Расписание за {MONTHS_RU_GEN[month - 1]}:", ""]
+    for day in selected_days:
+        day_date = date(year, month, day)
+        wd = day_date.weekday()
+        slots = slots_by_weekday.get(wd, [])
+        if not slots:
+            continue
+        booked = {normalize_time_to_hhmm(row[3]) for row in get_day_clients(day_date.isoformat())}
+        booked_norm = {t for t in booked if t}
+        booked_minutes = {hhmm_to_minutes(t) for t in booked_norm if hhmm_to_minutes(t) >= 0}
+
+        candidate_times = set(slots) | booked_norm
+        candidate_sorted = sorted(candidate_times, key=hhmm_to_minutes)
+
+        slot_texts = []
+        for hhmm in candidate_sorted:
+            disp = format_hhmm_with_dot(hhmm)
+            tmin = hhmm_to_minutes(hhmm)
+            if hhmm in booked_norm:
+                slot_texts.append(f"<s>{disp}</s>")
+                continue
+            too_close = any(abs(tmin - bm) <= 90 for bm in booked_minutes)
+            if not too_close:
+                slot_texts.append(disp)
+        lines.append(f"{day:02d}.{month:02d} ({WEEKDAYS_RU_SHORT[wd]}) " + " ".join(slot_texts))
+        lines.append("")
+    return lines
@@ -1,5 +1,10 @@
 const API_BASE = "/api";
 
+// Подписанные Telegram данные запуска мини-приложения, по ним сервер определяет пользователя и мастера
+const telegramApp = window.Telegram && window.Telegram.WebApp;
+const INIT_DATA = telegramApp ? telegramApp.initData : "";
+const TELEGRAM_USER_ID = telegramApp && telegramApp.initDataUnsafe.user ? telegramApp.initDataUnsafe.user.id : "";
+
 const toast = document.getElementById("toast");
 const showToast = (message, isError = false) => {
   toast.textContent = message;
@@ -10,7 +15,7 @@ const showToast = (message, isError = false) => {
 
 const apiFetch = async (path, options = {}) => {
   const response = await fetch(`${API_BASE}${path}`, {
-    headers: { "Content-Type": "application/json" },
+    headers: { "Content-Type": "application/json", Authorization: `tma ${INIT_DATA}` },
     ...options,
   });
   if (!response.ok) {
@@ -59,6 +64,250 @@ const DEFAULT_SLOTS = {
   6: "10:00,13:00,16:00,18:00",
 };
 
+// Данные первого экрана одним запросом вместо отдельных вызовов каждой вкладки
+const loadDashboard = () => {
+  const now = new Date();
+  const params = `year=${now.getFullYear()}&month=${now.getMonth() + 1}&date=${formatDateISO(now)}`;
+  return apiFetch(`/dashboard?${params}`).catch(() => null);
+};
+
+const isDashboardMonth = (dashboard, year, month) =>
+  Boolean(dashboard) && dashboard.year === year && dashboard.month === month;
+
+// Живые обновления: сервер шлет изменения из журнала, вкладки правят свое состояние без перезапроса списков
+const liveListeners = [];
+const onLiveChange = (listener) => liveListeners.push(listener);
+const startLiveUpdates = () => {
+  if (!window.EventSource) return;
+  const source = new EventSource(`${API_BASE}/events?init_data=${encodeURIComponent(INIT_DATA)}`);
+  source.addEventListener("change", (event) => {
+    let change;
+    try {
+      change = JSON.parse(event.data);
+    } catch (error) {
+      return;
+    }
+    liveListeners.forEach((listener) => listener(change));
+  });
+};
+
+const sortClients = (clients) =>
+  clients.sort((a, b) => `${a.date} ${a.time}`.localeCompare(`${b.date} ${b.time}`));
+
+const isClientChangeFor = (clients, change, inScope) =>
+  clients.some((client) => client.id === change.id) ||
+  (change.op !== "delete" && inScope(change.data.date));
+
+const applyClientChange = (clients, change, inScope) => {
+  const next = clients.filter((client) => client.id !== change.id);
+  if (change.op !== "delete" && inScope(change.data.date)) {
+    next.push(change.data);
+  }
+  return sortClients(next);
+};
+
+const monthDayOf = (iso, year, month) => {
+  if (!iso || !iso.startsWith(`${toMonthValue(year, month)}-`)) return null;
+  return Number(iso.slice(8, 10));
+};
+
+// Какой день месяца получил запись и какой, возможно, ее лишился
+const clientDayChange = (change, year, month) => {
+  const data = change.data;
+  const removedIso = change.op === "delete" ? data.date : data.old_date;
+  return {
+    addedDay: change.op === "delete" ? null : monthDayOf(data.date, year, month),
+    removedIso,
+    removedDay: removedIso === data.date && change.op !== "delete"
+      ? null
+      : monthDayOf(removedIso, year, month),
+  };
+};
+
+// Локальное зеркало клиентов и выбранных дней в IndexedDB: экраны рисуются из него сразу,
+// с сервера догружается только дельта /clients/delta
+const mirror = (() => {
+  // У каждого пользователя Telegram своя база: на общем устройстве данные мастеров не смешиваются
+  const DB_NAME = `manik-bot-${TELEGRAM_USER_ID}`;
+  const DB_VERSION = 1;
+  const CURSOR_KEY = "clientsCursor";
+  let dbPromise = null;
+  let syncPromise = null;
+
+  const request = (req) =>
+    new Promise((resolve, reject) => {
+      req.onsuccess = () => resolve(req.result);
+      req.onerror = () => reject(req.error);
+    });
+
+  const done = (tx) =>
+    new Promise((resolve, reject) => {
+      tx.oncomplete = () => resolve();
+      tx.onerror = () => reject(tx.error);
+      tx.onabort = () => reject(tx.error);
+    });
+
+  const open = () => {
+    if (!window.indexedDB) return Promise.resolve(null);
+    if (!dbPromise) {
+      dbPromise = new Promise((resolve) => {
+        const req = indexedDB.open(DB_NAME, DB_VERSION);
+        req.onupgradeneeded = () => {
+          const db = req.result;
+          db.createObjectStore("clients", { keyPath: "id" }).createIndex("date", "date");
+          db.createObjectStore("schedule");
+          db.createObjectStore("meta");
+        };
+        req.onsuccess = () => resolve(req.result);
+        req.onerror = () => resolve(null);
+        req.onblocked = () => resolve(null);
+      });
+    }
+    return dbPromise;
+  };
+
+  // База, если клиенты хотя бы раз полностью загружены, иначе null
+  const ready = async () => {
+    const db = await open();
+    if (!db) return null;
+    const cursor = await request(db.transaction("meta").objectStore("meta").get(CURSOR_KEY));
+    return cursor === undefined ? null : db;
+  };
+
+  const runSync = async () => {
+    const db = await open();
+    if (!db) return false;
+    const cursor = await request(db.transaction("meta").objectStore("meta").get(CURSOR_KEY));
+    const query = cursor ? `?updated_since=${encodeURIComponent(cursor)}` : "";
+    const delta = await apiFetch(`/clients/delta${query}`);
+    const tx = db.transaction(["clients", "meta"], "readwrite");
+    const store = tx.objectStore("clients");
+    if (delta.full) store.clear();
+    delta.deleted.forEach((id) => store.delete(id));
+    delta.clients.forEach((client) => store.put(client));
+    tx.objectStore("meta").put(delta.cursor || "", CURSOR_KEY);
+    await done(tx);
+    return delta.clients.length > 0 || delta.deleted.length > 0;
+  };
+
+  // true, если зеркало изменилось; параллельные вызовы ждут одну синхронизацию
+  const sync = () => {
+    if (!syncPromise) {
+      syncPromise = runSync().finally(() => {
+        syncPromise = null;
+      });
+    }
+    return syncPromise;
+  };
+
+  const clientsBetween = async (start, end) => {
+    const db = await ready();
+    if (!db) return null;
+    const index = db.transaction("clients").objectStore("clients").index("date");
+    return sortClients(await request(index.getAll(IDBKeyRange.bound(start, end))));
+  };
+
+  const markedDays = async (year, month) => {
+    const monthValue = toMonthValue(year, month);
+    const clients = await clientsBetween(`${monthValue}-01`, `${monthValue}-31`);
+    if (!clients) return null;
+    return [...new Set(clients.map((client) => Number(client.date.slice(8, 10))))];
+  };
+
+  const selectedDays = async (year, month) => {
+    const db = await open();
+    if (!db) return null;
+    const days = await request(db.transaction("schedule").objectStore("schedule").get(toMonthValue(year, month)));
+    return days || null;
+  };
+
+  const saveSelectedDays = async (year, month, days) => {
+    const db = await open();
+    if (!db) return;
+    const tx = db.transaction("schedule", "readwrite");
+    tx.objectStore("schedule").put([...days], toMonthValue(year, month));
+    await done(tx);
+  };
+
+  // События живых обновлений сразу попадают в зеркало, следующая дельта их только повторит
+  const applyChange = async (change) => {
+    if (change.entity === "client") {
+      const db = await ready();
+      if (!db) return;
+      const tx = db.transaction("clients", "readwrite");
+      if (change.op === "delete") {
+        tx.objectStore("clients").delete(change.id);
+      } else {
+        const { old_date: _oldDate, ...client } = change.data;
+        tx.objectStore("clients").put(client);
+      }
+      await done(tx);
+    } else if (change.entity === "schedule_day") {
+      const { year, month, day } = change.data;
+      const days = new Set((await selectedDays(year, month)) || []);
+      if (change.op === "insert") {
+        days.add(day);
+      } else {
+        days.delete(day);
+      }
+      await saveSelectedDays(year, month, [...days].sort((a, b) => a - b));
+    }
+  };
+
+  return { sync, clientsBetween, markedDays, selectedDays, saveSelectedDays, applyChange };
+})();
+
+// Повторяющиеся записи в зеркало не попадают (их вхождения не хранятся), сервер разворачивает
+// их на запрошенный диапазон. У вхождения нет id, есть series_id и ключ occurrence "<серия>:<дата>"
+const isOccurrence = (client) => client.series_id != null;
+
+const clientKey = (client) => (isOccurrence(client) ? client.occurrence : String(client.id));
+
+// Правка серии меняет сразу много вхождений: открытые списки перезапрашиваются целиком
+const isSeriesChange = (change) => change.entity === "series" || change.entity === "series_exception";
+
+const loadOccurrences = (start, end) =>
+  apiFetch(`/series/occurrences?start=${start}&end=${end}`).catch(() => []);
+
+// Сначала из зеркала, затем дельта с сервера и перерисовка, если что-то изменилось.
+// Без IndexedDB или до первой синхронизации — обычный запрос к API
+const loadClients = async (start, end, render) => {
+  const cached = await mirror.clientsBetween(start, end).catch(() => null);
+  if (!cached) {
+    const path = start === end ? `/clients/day?date_iso=${start}` : `/clients?start=${start}&end=${end}`;
+    render(await apiFetch(path));
+    return;
+  }
+  render(cached);
+  const occurrences = await loadOccurrences(start, end);
+  if (occurrences.length) {
+    render(sortClients([...cached, ...occurrences]));
+  }
+  if (await mirror.sync().catch(() => false)) {
+    render(sortClients([...(await mirror.clientsBetween(start, end)), ...occurrences]));
+  }
+};
+
+const loadMarkedDays = async (year, month, render) => {
+  const cached = await mirror.markedDays(year, month).catch(() => null);
+  if (!cached) {
+    const data = await apiFetch(`/clients/marked-days?year=${year}&month=${month}`);
+    render(data.days || []);
+    return;
+  }
+  render(cached);
+  const monthValue = toMonthValue(year, month);
+  const lastDay = String(new Date(year, month, 0).getDate()).padStart(2, "0");
+  const occurrences = await loadOccurrences(`${monthValue}-01`, `${monthValue}-${lastDay}`);
+  const withOccurrences = (days) => [...new Set([...days, ...occurrences.map((c) => Number(c.date.slice(8, 10)))])];
+  if (occurrences.length) {
+    render(withOccurrences(cached));
+  }
+  if (await mirror.sync().catch(() => false)) {
+    render(withOccurrences(await mirror.markedDays(year, month)));
+  }
+};
+
 const renderClients = (container, clients) => {
   if (!clients.length) {
     container.textContent = "Нет записей.";
@@ -119,7 +368,7 @@ const renderDayClients = (container, clients, onEdit, onDelete) => {
   container.innerHTML = clients
     .map(
       (client) => `
-        <div class="list-item" data-client-id="${client.id}">
+        <div class="list-item" data-client-key="${clientKey(client)}">
           <div class="list-title">${client.name}</div>
           <div class="list-meta">Дата: ${formatDateDisplay(client.date)} • Время: ${client.time}</div>
           <div class="list-meta">Ссылка: ${client.link || "-"}</div>
@@ -139,8 +388,7 @@ const renderDayClients = (container, clients, onEdit, onDelete) => {
     .join("");
 
   container.querySelectorAll(".list-item").forEach((item) => {
-    const clientId = Number(item.dataset.clientId);
-    const client = clients.find((c) => c.id === clientId);
+    const client = clients.find((c) => clientKey(c) === item.dataset.clientKey);
     if (!client) return;
     item.querySelector("[data-action='edit']").addEventListener("click", () => onEdit(client));
     item.querySelector("[data-action='delete']").addEventListener("click", () => onDelete(client));
@@ -272,8 +520,13 @@ const setupClients = () => {
       date: formData.get("date"),
       prepayment,
     };
+    const repeat = Number(formData.get("repeat") || 0);
     try {
-      await apiFetch("/clients", { method: "POST", body: JSON.stringify(payload) });
+      if (repeat) {
+        await apiFetch("/series", { method: "POST", body: JSON.stringify({ ...payload, interval_weeks: repeat }) });
+      } else {
+        await apiFetch("/clients", { method: "POST", body: JSON.stringify(payload) });
+      }
       showToast("Клиент записан");
       form.reset();
       prepaymentAmountField.classList.add("hidden");
@@ -282,15 +535,35 @@ const setupClients = () => {
     }
   });
 
+  let currentRange = null;
+  let currentClients = [];
+
   const loadRange = async (start, end) => {
+    const range = { start, end };
+    currentRange = range;
     try {
-      const clients = await apiFetch(`/clients?start=${start}&end=${end}`);
-      renderClients(list, clients);
+      await loadClients(start, end, (clients) => {
+        if (currentRange !== range) return;
+        currentClients = clients;
+        renderClients(list, clients);
+      });
     } catch (error) {
       showToast(error.message, true);
     }
   };
 
+  onLiveChange((change) => {
+    if (isSeriesChange(change) && currentRange) {
+      loadRange(currentRange.start, currentRange.end);
+      return;
+    }
+    if (change.entity !== "client" || !currentRange) return;
+    const inRange = (date) => Boolean(date) && date >= currentRange.start && date <= currentRange.end;
+    if (!isClientChangeFor(currentClients, change, inRange)) return;
+    currentClients = applyClientChange(currentClients, change, inRange);
+    renderClients(list, currentClients);
+  });
+
   document.getElementById("clients-today").addEventListener("click", () => {
     const today = formatDateISO(new Date());
     loadRange(today, today);
@@ -340,7 +613,7 @@ const setupClients = () => {
   document.addEventListener("mousedown", blurActiveClientInput);
 };
 
-const setupCalendar = () => {
+const setupCalendar = (initialData) => {
   const monthInput = document.getElementById("calendar-month");
   const loadButton = document.getElementById("calendar-load");
   const prevButton = document.getElementById("calendar-prev");
@@ -354,6 +627,8 @@ const setupCalendar = () => {
   const editPrepaymentAmountField = document.getElementById("edit-prepayment-amount-field");
   let activeClient = null;
   let activeDayIso = null;
+  let activeDayClients = [];
+  let calendarState = null;
 
   const closeModal = () => {
     modal.classList.add("hidden");
@@ -410,15 +685,22 @@ const setupCalendar = () => {
       prepayment,
     };
     try {
-      await apiFetch(`/clients/${activeClient.id}`, {
-        method: "PUT",
-        body: JSON.stringify(payload),
-      });
+      if (isOccurrence(activeClient)) {
+        // У вхождения серии меняются только дата и время этого визита
+        await apiFetch(`/series/${activeClient.series_id}/move`, {
+          method: "POST",
+          body: JSON.stringify({ date: activeClient.date, new_date: payload.date, new_time: payload.time }),
+        });
+      } else {
+        await apiFetch(`/clients/${activeClient.id}`, {
+          method: "PUT",
+          body: JSON.stringify(payload),
+        });
+      }
       showToast("Запись обновлена");
       closeModal();
       if (activeDayIso) {
-        const clients = await apiFetch(`/clients/day?date_iso=${activeDayIso}`);
-        renderDayClients(dayClients, clients, openModal, handleDelete);
+        await loadActiveDay();
       }
     } catch (error) {
       showToast(error.message, true);
@@ -426,48 +708,156 @@ const setupCalendar = () => {
   });
 
   const handleDelete = async (client) => {
+    if (isOccurrence(client)) {
+      if (!confirm("Отменить этот визит повторяющейся записи?")) return;
+      try {
+        await apiFetch(`/series/${client.series_id}/cancel`, { method: "POST", body: JSON.stringify({ date: client.date }) });
+        showToast("Визит отменен");
+        if (activeDayIso) {
+          await loadActiveDay();
+        }
+      } catch (error) {
+        showToast(error.message, true);
+      }
+      return;
+    }
     if (!confirm("Удалить запись?")) return;
     try {
       await apiFetch(`/clients/${client.id}`, { method: "DELETE" });
       showToast("Запись удалена");
       if (activeDayIso) {
-        const clients = await apiFetch(`/clients/day?date_iso=${activeDayIso}`);
-        renderDayClients(dayClients, clients, openModal, handleDelete);
+        await loadActiveDay();
       }
     } catch (error) {
       showToast(error.message, true);
     }
   };
 
+  const showDayClients = (clients) => {
+    activeDayClients = clients;
+    renderDayClients(dayClients, clients, openModal, handleDelete);
+  };
+
+  const loadActiveDay = () => {
+    const iso = activeDayIso;
+    return loadClients(iso, iso, (clients) => {
+      if (activeDayIso === iso) showDayClients(clients);
+    });
+  };
+
+  const renderMonth = () => {
+    const { year, month, marked } = calendarState;
+    renderCalendar(
+      grid,
+      year,
+      month,
+      [...marked],
+      async (_day, iso) => {
+        try {
+          activeDayIso = iso;
+          await loadActiveDay();
+        } catch (error) {
+          showToast(error.message, true);
+        }
+      }
+    );
+  };
+
   const loadMonth = async () => {
     if (!monthInput.value) {
       showToast("Выберите месяц", true);
       return;
     }
     const { year, month } = parseMonthInput(monthInput.value);
+    activeDayIso = null;
+    activeDayClients = [];
+    const monthValue = monthInput.value;
+    try {
+      let first = true;
+      await loadMarkedDays(year, month, (days) => {
+        if (monthInput.value !== monthValue) return;
+        calendarState = { year, month, marked: new Set(days) };
+        renderMonth();
+        if (first) dayClients.textContent = "Выберите день.";
+        first = false;
+      });
+    } catch (error) {
+      showToast(error.message, true);
+    }
+  };
+
+  const loadInitialMonth = async () => {
+    const { year, month } = parseMonthInput(monthInput.value);
+    const monthValue = monthInput.value;
+    const today = formatDateISO(new Date());
+    const [cachedMarked, cachedDay] = await Promise.all([
+      mirror.markedDays(year, month).catch(() => null),
+      mirror.clientsBetween(today, today).catch(() => null),
+    ]);
+    if (cachedMarked && cachedDay) {
+      calendarState = { year, month, marked: new Set(cachedMarked) };
+      renderMonth();
+      activeDayIso = today;
+      showDayClients(cachedDay);
+    }
+    const dashboard = await initialData;
+    if (monthInput.value !== monthValue) return;
+    if (!isDashboardMonth(dashboard, year, month)) {
+      loadMonth();
+      return;
+    }
+    calendarState = { year, month, marked: new Set(dashboard.marked_days) };
+    renderMonth();
+    activeDayIso = dashboard.date;
+    showDayClients(dashboard.day_clients);
+  };
+
+  const refreshMarked = async () => {
+    const { year, month } = calendarState;
     try {
       const data = await apiFetch(`/clients/marked-days?year=${year}&month=${month}`);
-      renderCalendar(
-        grid,
-        year,
-        month,
-        data.days,
-        async (_day, iso) => {
-          try {
-            activeDayIso = iso;
-            const clients = await apiFetch(`/clients/day?date_iso=${iso}`);
-            renderDayClients(dayClients, clients, openModal, handleDelete);
-          } catch (error) {
-            showToast(error.message, true);
-          }
-        }
-      );
-      dayClients.textContent = "Выберите день.";
+      if (!calendarState || calendarState.year !== year || calendarState.month !== month) return;
+      calendarState.marked = new Set(data.days);
+      renderMonth();
     } catch (error) {
       showToast(error.message, true);
     }
   };
 
+  onLiveChange((change) => {
+    if (isSeriesChange(change) && calendarState) {
+      refreshMarked();
+      if (activeDayIso) loadActiveDay().catch((error) => showToast(error.message, true));
+      return;
+    }
+    if (change.entity !== "client" || !calendarState) return;
+    const { year, month, marked } = calendarState;
+    if (activeDayIso) {
+      const isActiveDay = (date) => date === activeDayIso;
+      if (isClientChangeFor(activeDayClients, change, isActiveDay)) {
+        showDayClients(applyClientChange(activeDayClients, change, isActiveDay));
+      }
+    }
+    const { addedDay, removedIso, removedDay } = clientDayChange(change, year, month);
+    let changed = false;
+    if (addedDay && !marked.has(addedDay)) {
+      marked.add(addedDay);
+      changed = true;
+    }
+    if (removedDay && removedDay !== addedDay && marked.has(removedDay)) {
+      // Остались ли записи в этот день, известно только для открытого дня
+      if (removedIso !== activeDayIso) {
+        refreshMarked();
+        return;
+      }
+      if (!activeDayClients.length) {
+        marked.delete(removedDay);
+        changed = true;
+      }
+    }
+    if (changed) renderMonth();
+  });
+
   loadButton.addEventListener("click", loadMonth);
   if (prevButton) {
     prevButton.addEventListener("click", () => {
@@ -494,10 +884,10 @@ const setupCalendar = () => {
     const now = new Date();
     monthInput.value = toMonthValue(now.getFullYear(), now.getMonth() + 1);
   }
-  loadMonth();
+  loadInitialMonth();
 };
 
-const setupSchedule = () => {
+const setupSchedule = (initialData) => {
   const monthInput = document.getElementById("schedule-month");
   const prevButton = document.getElementById("schedule-prev");
   const nextButton = document.getElementById("schedule-next");
@@ -522,6 +912,14 @@ const setupSchedule = () => {
   };
   const slotInputElements = Object.values(slotInputs).filter(Boolean);
 
+  const fillSlots = (saved) => {
+    Object.entries(slotInputs).forEach(([weekday, input]) => {
+      if (!input) return;
+      input.value = saved[weekday] || DEFAULT_SLOTS[weekday] || "";
+      input.classList.remove("invalid");
+    });
+  };
+
   const loadSlots = async () => {
     let saved = {};
     try {
@@ -530,11 +928,7 @@ const setupSchedule = () => {
     } catch (error) {
       saved = {};
     }
-    Object.entries(slotInputs).forEach(([weekday, input]) => {
-      if (!input) return;
-      input.value = saved[weekday] || DEFAULT_SLOTS[weekday] || "";
-      input.classList.remove("invalid");
-    });
+    fillSlots(saved);
   };
 
   const saveSlots = async () => {
@@ -578,23 +972,17 @@ const setupSchedule = () => {
     return slots;
   };
 
-  const loadMonth = async () => {
-    if (!monthInput.value) {
-      const now = new Date();
-      monthInput.value = toMonthValue(now.getFullYear(), now.getMonth() + 1);
-    }
-    const { year, month } = parseMonthInput(monthInput.value);
-    try {
-      const [selected, marked] = await Promise.all([
-        apiFetch(`/schedule/selected?year=${year}&month=${month}`),
-        apiFetch(`/clients/marked-days?year=${year}&month=${month}`),
-      ]);
-      renderCalendar(
-        grid,
-        year,
-        month,
-        marked.days || [],
-        async (day, _iso, cell) => {
+  let scheduleState = null;
+  let activeScheduleClients = [];
+
+  const renderScheduleMonth = () => {
+    const { year, month, selected, marked } = scheduleState;
+    renderCalendar(
+      grid,
+      year,
+      month,
+      [...marked],
+      async (day, _iso, cell) => {
           const dateIso = `${year}-${String(month).padStart(2, "0")}-${String(day).padStart(2, "0")}`;
           try {
             if (cell) {
@@ -606,13 +994,16 @@ const setupSchedule = () => {
             });
             if (toggleResult.selected) {
               activeScheduleDayIso = dateIso;
-              const booked = await apiFetch(`/clients/day?date_iso=${dateIso}`);
               if (dayTitle) {
                 dayTitle.textContent = `Записи на ${formatDateDisplay(dateIso)}`;
               }
-              if (dayClients) {
-                renderClients(dayClients, booked);
-              }
+              await loadClients(dateIso, dateIso, (booked) => {
+                if (activeScheduleDayIso !== dateIso) return;
+                activeScheduleClients = booked;
+                if (dayClients) {
+                  renderClients(dayClients, booked);
+                }
+              });
             } else {
               activeScheduleDayIso = null;
               if (dayTitle) {
@@ -622,7 +1013,11 @@ const setupSchedule = () => {
                 dayClients.textContent = "";
               }
             }
-            loadMonth();
+            mirror.saveSelectedDays(year, month, toggleResult.days || []).catch(() => {});
+            if (scheduleState && scheduleState.year === year && scheduleState.month === month) {
+              scheduleState.selected = new Set(toggleResult.days || []);
+              renderScheduleMonth();
+            }
           } catch (error) {
             showToast(error.message, true);
             if (cell) {
@@ -630,14 +1025,122 @@ const setupSchedule = () => {
             }
           }
         },
-        selected.days
+        [...selected]
       );
+  };
+
+  const loadMonth = async () => {
+    if (!monthInput.value) {
+      const now = new Date();
+      monthInput.value = toMonthValue(now.getFullYear(), now.getMonth() + 1);
+    }
+    const { year, month } = parseMonthInput(monthInput.value);
+    const monthValue = monthInput.value;
+    const showMonth = (selected, marked) => {
+      if (monthInput.value !== monthValue) return;
+      scheduleState = { year, month, selected: new Set(selected), marked: new Set(marked) };
+      renderScheduleMonth();
+    };
+    await showCachedMonth(year, month, monthValue);
+    try {
+      const selected = await apiFetch(`/schedule/selected?year=${year}&month=${month}`);
+      const selectedDays = selected.days || [];
+      mirror.saveSelectedDays(year, month, selectedDays).catch(() => {});
+      await loadMarkedDays(year, month, (markedDays) => showMonth(selectedDays, markedDays));
       result.textContent = "Выберите дни и нажмите «Сгенерировать».";
     } catch (error) {
       showToast(error.message, true);
     }
   };
 
+  const showCachedMonth = async (year, month, monthValue) => {
+    const [selected, marked] = await Promise.all([
+      mirror.selectedDays(year, month).catch(() => null),
+      mirror.markedDays(year, month).catch(() => null),
+    ]);
+    if (!selected || !marked || monthInput.value !== monthValue) return;
+    scheduleState = { year, month, selected: new Set(selected), marked: new Set(marked) };
+    renderScheduleMonth();
+  };
+
+  const loadInitial = async () => {
+    const { year, month } = parseMonthInput(monthInput.value);
+    const monthValue = monthInput.value;
+    await showCachedMonth(year, month, monthValue);
+    const dashboard = await initialData;
+    if (monthInput.value !== monthValue) return;
+    if (!isDashboardMonth(dashboard, year, month)) {
+      loadSlots();
+      loadMonth();
+      return;
+    }
+    mirror.saveSelectedDays(year, month, dashboard.selected_days).catch(() => {});
+    fillSlots(dashboard.slots || {});
+    scheduleState = {
+      year,
+      month,
+      selected: new Set(dashboard.selected_days),
+      marked: new Set(dashboard.marked_days),
+    };
+    renderScheduleMonth();
+    result.textContent = "Выберите дни и нажмите «Сгенерировать».";
+  };
+
+  const refreshScheduleMarked = () => {
+    const { year, month } = scheduleState;
+    apiFetch(`/clients/marked-days?year=${year}&month=${month}`)
+      .then((response) => {
+        if (scheduleState.year !== year || scheduleState.month !== month) return;
+        scheduleState.marked = new Set(response.days || []);
+        renderScheduleMonth();
+      })
+      .catch((error) => showToast(error.message, true));
+  };
+
+  onLiveChange((change) => {
+    if (!scheduleState) return;
+    const { year, month, selected, marked } = scheduleState;
+    const data = change.data;
+    if (isSeriesChange(change)) {
+      refreshScheduleMarked();
+      const dateIso = activeScheduleDayIso;
+      if (dateIso && dayClients) {
+        loadClients(dateIso, dateIso, (booked) => {
+          if (activeScheduleDayIso !== dateIso) return;
+          activeScheduleClients = booked;
+          renderClients(dayClients, booked);
+        }).catch((error) => showToast(error.message, true));
+      }
+      return;
+    }
+    if (change.entity === "schedule_day") {
+      if (data.year !== year || data.month !== month) return;
+      if (change.op === "insert") {
+        selected.add(data.day);
+      } else {
+        selected.delete(data.day);
+      }
+      renderScheduleMonth();
+      return;
+    }
+    if (change.entity !== "client") return;
+    if (activeScheduleDayIso && dayClients) {
+      const isActiveDay = (date) => date === activeScheduleDayIso;
+      if (isClientChangeFor(activeScheduleClients, change, isActiveDay)) {
+        activeScheduleClients = applyClientChange(activeScheduleClients, change, isActiveDay);
+        renderClients(dayClients, activeScheduleClients);
+      }
+    }
+    const { addedDay, removedDay } = clientDayChange(change, year, month);
+    if (addedDay && !marked.has(addedDay)) {
+      marked.add(addedDay);
+      renderScheduleMonth();
+    }
+    if (removedDay && removedDay !== addedDay && marked.has(removedDay)) {
+      refreshScheduleMarked();
+    }
+  });
+
   prevButton.addEventListener("click", () => {
     if (!monthInput.value) {
       const now = new Date();
@@ -758,11 +1261,10 @@ const setupSchedule = () => {
   if (dayClients) {
     dayClients.textContent = "";
   }
-  loadSlots();
-  loadMonth();
+  loadInitial();
 };
 
-const setupVisits = () => {
+const setupVisits = (initialData) => {
   const linkInput = document.getElementById("visits-link");
   const countButton = document.getElementById("visits-count");
   const result = document.getElementById("visits-result");
@@ -806,6 +1308,12 @@ const setupVisits = () => {
     }
   });
 
+  initialData.then((dashboard) => {
+    if (dashboard && !topList.children.length) {
+      renderTop(dashboard.top_visits || []);
+    }
+  });
+
   if (topButton) {
     topButton.addEventListener("click", async () => {
       try {
@@ -819,9 +1327,15 @@ const setupVisits = () => {
 };
 
 document.addEventListener("DOMContentLoaded", () => {
+  const initialData = loadDashboard();
+  mirror.sync().catch(() => {});
+  onLiveChange((change) => {
+    mirror.applyChange(change).catch(() => {});
+  });
   setupTabs();
   setupClients();
-  setupCalendar();
-  setupSchedule();
-  setupVisits();
+  setupCalendar(initialData);
+  setupSchedule(initialData);
+  setupVisits(initialData);
+  startLiveUpdates();
 });
@@ -1,13 +1,19 @@
+import calendar
+import hmac
 import os
-from datetime import date, datetime, timedelta
-from typing import List, Optional
+from functools import partial
+from datetime import date as date_cls
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
+from bot.config import admin_token
+
 from database.database import (
     add_expenses_to_db,
     add_salary_to_db,
@@ -21,22 +27,78 @@ from database.database import (
     save_client,
     update_client_by_id,
 )
+from database.changes import start_compaction
+from database.dashboard import get_dashboard
 from database.delete_client import delete_client
+from database.migrations import run_migrations
 from database.request_for_date import (
     get_clients_by_date_range,
     get_clients_by_day,
+    get_clients_delta,
     get_marked_days_for_month,
 )
 from database.schedule_db import (
+    clear_month,
     clear_schedule_slots,
     get_schedule_slots,
     get_selected_days,
     save_schedule_slots,
+    select_weekdays,
+    set_days_selected,
     toggle_day,
 )
+from database.search import search_clients
+from database.series import (
+    cancel_occurrence,
+    create_series,
+    delete_series,
+    get_occurrences,
+    get_series,
+    move_occurrence,
+    stop_series,
+)
+from monitoring.http import metrics_middleware
+from monitoring.loop_monitor import start_loop_monitor
+from monitoring.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, render as render_metrics
+from monitoring.profiler import MAX_PROFILE_SECONDS, ProfilerBusy, run_profile
+from utils.common import (
+    DEFAULT_SLOTS,
+    normalize_date,
+    normalize_time_to_hhmm,
+)
+from static_assets import AssetBundle, HashedStaticFiles
+from utils.schedule import build_schedule_lines
+from web_auth import current_tenant
+from web_events import (
+    changes_ndjson,
+    current_cursor,
+    event_stream,
+    format_cursor,
+    is_compacted,
+    parse_cursor,
+)
+from web_json import (
+    GZIP_COMPRESS_LEVEL,
+    GZIP_MINIMUM_SIZE,
+    ORJSONResponse,
+    clients_response,
+    serialize_clients,
+)
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    run_migrations()
+    assets.build()
+    loop_monitor = start_loop_monitor("web")
+    compaction = start_compaction()
+    yield
+    compaction.cancel()
+    if loop_monitor is not None:
+        loop_monitor.stop()
 
-app = FastAPI(title="Manik Bot Web API")
+
+app = FastAPI(title="Manik Bot Web API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -45,102 +107,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+app.middleware("http")(metrics_middleware)
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 ASSETS_DIR = os.path.join(BASE_DIR, "web", "assets")
 INDEX_PATH = os.path.join(BASE_DIR, "web", "index.html")
 
-app.mount("/assets", StaticFiles(directory=ASSETS_DIR), name="assets")
-
-
-def _format_prepayment(value) -> str:
-    if value is None:
-        return "✗"
-    try:
-        num = float(value)
-    except Exception:
-        return "✗"
-    if num == 0:
-        return "✗"
-    if num == 1:
-        return "✓"
-    return f"{num:.2f}".rstrip("0").rstrip(".")
-
-
-def _normalize_date(value: str) -> str:
-    if not value:
-        raise ValueError("empty date")
-    value = value.strip()
-    if "." in value:
-        try:
-            dt = datetime.strptime(value, "%d.%m.%Y")
-            return dt.strftime("%Y-%m-%d")
-        except Exception as exc:
-            raise ValueError("invalid date") from exc
-    try:
-        dt = datetime.strptime(value, "%Y-%m-%d")
-        return dt.strftime("%Y-%m-%d")
-    except Exception as exc:
-        raise ValueError("invalid date") from exc
-
-
-def _normalize_time_to_hhmm(value: str) -> str:
-    if not value:
-        return ""
-    t = value.strip().replace(" ", "").replace(".", ":").replace("-", ":").replace("/", ":")
-    if ":" not in t:
-        t = f"{t}:00"
-    parts = t.split(":")
-    try:
-        hh = int(parts[0])
-    except Exception:
-        return ""
-    mm = int(parts[1]) if len(parts) > 1 and parts[1] != "" else 0
-    hh = max(0, min(23, hh))
-    mm = 0 if mm < 0 or mm > 59 else mm
-    return f"{hh:02d}:{mm:02d}"
-
-
-def _hhmm_to_minutes(hhmm: str) -> int:
-    try:
-        hh, mm = hhmm.split(":")
-        return int(hh) * 60 + int(mm)
-    except Exception:
-        return -1
-
-
-def _format_hhmm_with_dot(hhmm: str) -> str:
-    if not hhmm:
-        return ""
-    hh, mm = hhmm.split(":")
-    return f"{hh}.{mm}"
-
-
-DEFAULT_SLOTS = {
-    0: ["11:00", "14:00", "17:00", "19:00"],
-    1: ["11:00", "14:00", "17:00", "19:00"],
-    2: ["11:00", "14:00", "17:00", "19:00"],
-    3: ["11:00", "14:00", "17:00", "19:00"],
-    4: ["11:00", "14:00", "17:00", "19:00"],
-    5: ["10:00", "13:00", "16:00", "18:00"],
-    6: ["10:00", "13:00", "16:00", "18:00"],
-}
-
-WEEKDAYS_RU_SHORT = ["пн", "вт", "ср", "чт", "пт", "сб", "вс"]
-MONTHS_RU_GEN = [
-    "январь",
-    "февраль",
-    "март",
-    "апрель",
-    "май",
-    "июнь",
-    "июль",
-    "август",
-    "сентябрь",
-    "октябрь",
-    "ноябрь",
-    "декабрь",
-]
+assets = AssetBundle(ASSETS_DIR, INDEX_PATH)
+app.mount("/assets", HashedStaticFiles(assets), name="assets")
 
 
 class ClientCreate(BaseModel):
@@ -161,12 +136,46 @@ class ExpensesCreate(BaseModel):
     month: str
 
 
+class SeriesCreate(BaseModel):
+    name: str
+    link: str
+    time: str
+    date: str
+    interval_weeks: int = 1
+    until: Optional[str] = None
+    prepayment: Optional[float] = 0
+
+
+class SeriesOccurrence(BaseModel):
+    date: str
+    new_date: Optional[str] = None
+    new_time: Optional[str] = None
+
+
 class ScheduleToggle(BaseModel):
     year: int
     month: int
     day: int
 
 
+class ScheduleDays(BaseModel):
+    year: int
+    month: int
+    days: list[int]
+    selected: bool = True
+
+
+class ScheduleMonth(BaseModel):
+    year: int
+    month: int
+
+
+class ScheduleWeekdays(BaseModel):
+    year: int
+    month: int
+    weekdays: list[int] = [0, 1, 2, 3, 4]
+
+
 class ScheduleGenerateRequest(BaseModel):
     slots: Optional[dict] = None
 
@@ -176,8 +185,8 @@ class ScheduleSlotsUpdate(BaseModel):
 
 
 @app.get("/")
-def root():
-    return FileResponse(INDEX_PATH)
+def root(request: Request):
+    return assets.index_response(request.headers)
 
 
 @app.get("/api/health")
@@ -185,51 +194,177 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(render_metrics(), media_type=METRICS_CONTENT_TYPE)
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    # Без ADMIN_TOKEN административные маршруты выключены
+    if not admin_token or not hmac.compare_digest(x_admin_token or "", admin_token):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+@app.get("/api/admin/profile", dependencies=[Depends(require_admin)])
+async def admin_profile(
+    seconds: float = Query(10, gt=0, le=MAX_PROFILE_SECONDS),
+    format: str = Query("collapsed", pattern="^(collapsed|pstats)$"),
+):
+    try:
+        data, filename = await run_profile(seconds, format)
+    except ProfilerBusy:
+        raise HTTPException(status_code=409, detail="Profiling already running")
+    return Response(
+        data,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.get("/api/events")
+def events(last_event_id: Optional[str] = Header(None), tenant_id: int = Depends(current_tenant)):
+    return StreamingResponse(
+        event_stream(tenant_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/api/changes")
+def changes(
+    since: str = Query("0.0", description="курсор <seq clients>.<seq schedule>"),
+    tenant_id: int = Depends(current_tenant),
+):
+    cursor = parse_cursor(since)
+    if cursor is None:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if is_compacted(cursor):
+        # Нужна полная выгрузка; курсор взят до нее, повторы после нее безопасны
+        raise HTTPException(
+            status_code=410,
+            detail={"message": "Changes compacted, full resync required", "cursor": format_cursor(current_cursor())},
+        )
+    return StreamingResponse(changes_ndjson(tenant_id, cursor), media_type="application/x-ndjson")
+
+
+@app.get("/api/dashboard")
+def dashboard(
+    year: Optional[int] = Query(None, ge=1970, le=2100),
+    month: Optional[int] = Query(None, ge=1, le=12),
+    date: Optional[str] = Query(None, description="YYYY-MM-DD"),
+    top: int = Query(10, ge=1, le=100),
+    tenant_id: int = Depends(current_tenant),
+):
+    today = date_cls.today()
+    year = year or today.year
+    month = month or today.month
+    try:
+        day_iso = normalize_date(date) if date else today.isoformat()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+    data = get_dashboard(tenant_id, year, month, day_iso, top)
+    if data is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    return {
+        "year": year,
+        "month": month,
+        "date": day_iso,
+        "day_clients": serialize_clients(data["day_clients"]),
+        "marked_days": sorted(data["marked_days"]),
+        "selected_days": sorted(data["selected_days"]),
+        "slots": {k: ", ".join(v) for k, v in data["slots"].items()},
+        "salary": {"month": data["month_key"], "total": data["salary_total"]},
+        "expenses": {"month": data["month_key"], "total": data["expenses_total"]},
+        "top_visits": [{"link": link, "count": count} for link, count in data["top_visits"]],
+    }
+
+
 @app.get("/api/clients")
 def clients_range(
     start: str = Query(..., description="YYYY-MM-DD"),
     end: str = Query(..., description="YYYY-MM-DD"),
+    tenant_id: int = Depends(current_tenant),
+):
+    return clients_response(get_clients_by_date_range(tenant_id, start, end))
+
+
+@app.get("/api/clients/search")
+def clients_search(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    tenant_id: int = Depends(current_tenant),
 ):
-    rows = get_clients_by_date_range(start, end)
-    return [_serialize_client(row) for row in rows]
+    # По одной записи на клиента, лучшие совпадения первыми
+    return clients_response(search_clients(tenant_id, q, limit))
 
 
 @app.get("/api/clients/day")
-def clients_day(date_iso: str = Query(..., description="YYYY-MM-DD")):
-    rows = get_clients_by_day(date_iso)
-    return [_serialize_client(row) for row in rows]
+def clients_day(date_iso: str = Query(..., description="YYYY-MM-DD"), tenant_id: int = Depends(current_tenant)):
+    return clients_response(get_clients_by_day(tenant_id, date_iso))
+
+
+@app.get("/api/clients/delta")
+def clients_delta(
+    updated_since: Optional[str] = Query(None, description="курсор из прошлого ответа"),
+    tenant_id: int = Depends(current_tenant),
+):
+    delta = get_clients_delta(tenant_id, updated_since)
+    if delta is None:
+        raise HTTPException(status_code=503, detail="Database unavailable")
+    rows, deleted, (series, exceptions, deleted_series), cursor, full = delta
+    by_series = {}
+    for series_id, day, cancelled, new_day, new_time in exceptions:
+        by_series.setdefault(series_id, []).append(
+            {"date": day, "cancelled": bool(cancelled), "new_date": new_day, "new_time": new_time}
+        )
+    return ORJSONResponse({
+        "clients": serialize_clients(rows),
+        "deleted": deleted,
+        "series": [dict(_serialize_series(row), exceptions=by_series.get(row[0], [])) for row in series],
+        "deleted_series": deleted_series,
+        "cursor": cursor,
+        "full": full,
+    })
 
 
 @app.get("/api/clients/marked-days")
-def marked_days(year: int, month: int):
-    return {"days": sorted(get_marked_days_for_month(year, month))}
+def marked_days(year: int, month: int, tenant_id: int = Depends(current_tenant)):
+    return {"days": sorted(get_marked_days_for_month(tenant_id, year, month))}
 
 
 @app.post("/api/clients")
-def create_client(payload: ClientCreate):
+def create_client(payload: ClientCreate, tenant_id: int = Depends(current_tenant)):
     try:
-        day_rec = _normalize_date(payload.date)
+        day_rec = normalize_date(payload.date)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
-    time_norm = _normalize_time_to_hhmm(payload.time)
+    time_norm = normalize_time_to_hhmm(payload.time)
     if not time_norm:
         raise HTTPException(status_code=400, detail="Invalid time format")
     prepayment = payload.prepayment if payload.prepayment is not None else 0
-    save_client(payload.name.strip(), payload.link.strip(), time_norm, day_rec, prepayment)
+    save_client(tenant_id, payload.name.strip(), payload.link.strip(), time_norm, day_rec, prepayment)
     return {"status": "ok"}
 
 
+def _require_client_id(client_id: int):
+    # Вхождения серий своих строк не имеют, их визиты меняются через /api/series/{id}/move и /cancel
+    if client_id <= 0:
+        raise HTTPException(status_code=400, detail="Series occurrences are changed via /api/series")
+
+
 @app.put("/api/clients/{client_id}")
-def update_client(client_id: int, payload: ClientCreate):
+def update_client(client_id: int, payload: ClientCreate, tenant_id: int = Depends(current_tenant)):
+    _require_client_id(client_id)
     try:
-        day_rec = _normalize_date(payload.date)
+        day_rec = normalize_date(payload.date)
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format")
-    time_norm = _normalize_time_to_hhmm(payload.time)
+    time_norm = normalize_time_to_hhmm(payload.time)
     if not time_norm:
         raise HTTPException(status_code=400, detail="Invalid time format")
     prepayment = payload.prepayment if payload.prepayment is not None else 0
     updated = update_client_by_id(
+        tenant_id,
         client_id,
         payload.name.strip(),
         payload.link.strip(),
@@ -243,159 +378,249 @@ def update_client(client_id: int, payload: ClientCreate):
 
 
 @app.delete("/api/clients/by-link")
-def delete_client_by_link(link: str = Query(..., min_length=1)):
-    deleted = delete_client(link)
+def delete_client_by_link(link: str = Query(..., min_length=1), tenant_id: int = Depends(current_tenant)):
+    deleted = delete_client(tenant_id, link)
     if not deleted:
         raise HTTPException(status_code=404, detail="Client not found")
     return {"status": "ok"}
 
 
 @app.delete("/api/clients/{client_id}")
-def delete_client_endpoint(client_id: int):
-    deleted = delete_client_by_id(client_id)
+def delete_client_endpoint(client_id: int, tenant_id: int = Depends(current_tenant)):
+    _require_client_id(client_id)
+    deleted = delete_client_by_id(tenant_id, client_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Client not found")
     return {"status": "ok"}
 
 
+def _parse_date(value: str) -> str:
+    try:
+        return normalize_date(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid date format")
+
+
+def _serialize_series(row) -> dict:
+    series_id, name, link, time, start_date, end_date, interval_weeks, prepayment = row
+    return {
+        "id": series_id,
+        "name": name,
+        "link": link,
+        "time": time,
+        "date": start_date,
+        "until": end_date,
+        "interval_weeks": interval_weeks,
+        "prepayment": prepayment,
+    }
+
+
+@app.get("/api/series")
+def series_list(tenant_id: int = Depends(current_tenant)):
+    return [_serialize_series(row) for row in get_series(tenant_id)]
+
+
+@app.get("/api/series/occurrences")
+def series_occurrences(
+    start: str = Query(..., description="YYYY-MM-DD"),
+    end: str = Query(..., description="YYYY-MM-DD"),
+    tenant_id: int = Depends(current_tenant),
+):
+    # Вхождения без разовых записей: мини-приложение добавляет их к клиентам из локального зеркала
+    return clients_response(get_occurrences(tenant_id, _parse_date(start), _parse_date(end)))
+
+
+@app.post("/api/series")
+def series_create(payload: SeriesCreate, tenant_id: int = Depends(current_tenant)):
+    start_date = _parse_date(payload.date)
+    end_date = _parse_date(payload.until) if payload.until else None
+    time_norm = normalize_time_to_hhmm(payload.time)
+    if not time_norm:
+        raise HTTPException(status_code=400, detail="Invalid time format")
+    if payload.interval_weeks < 1 or (end_date and end_date < start_date):
+        raise HTTPException(status_code=400, detail="Invalid recurrence")
+    prepayment = payload.prepayment if payload.prepayment is not None else 0
+    series_id = create_series(tenant_id, payload.name.strip(), payload.link.strip(), time_norm, start_date,
+                              payload.interval_weeks, end_date, prepayment)
+    if series_id is None:
+        raise HTTPException(status_code=500, detail="Series not saved")
+    return {"id": series_id}
+
+
+@app.delete("/api/series/{series_id}")
+def series_delete(series_id: int, tenant_id: int = Depends(current_tenant)):
+    if not delete_series(tenant_id, series_id):
+        raise HTTPException(status_code=404, detail="Series not found")
+    return {"status": "ok"}
+
+
+@app.post("/api/series/{series_id}/cancel")
+def series_cancel(series_id: int, payload: SeriesOccurrence, tenant_id: int = Depends(current_tenant)):
+    if not cancel_occurrence(tenant_id, series_id, _parse_date(payload.date)):
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    return {"status": "ok"}
+
+
+@app.post("/api/series/{series_id}/move")
+def series_move(series_id: int, payload: SeriesOccurrence, tenant_id: int = Depends(current_tenant)):
+    if not payload.new_date and not payload.new_time:
+        raise HTTPException(status_code=400, detail="Nothing to move")
+    day_iso = _parse_date(payload.date)
+    new_day = _parse_date(payload.new_date) if payload.new_date else day_iso
+    new_time = None
+    if payload.new_time:
+        new_time = normalize_time_to_hhmm(payload.new_time)
+        if not new_time:
+            raise HTTPException(status_code=400, detail="Invalid time format")
+    if not move_occurrence(tenant_id, series_id, day_iso, new_day, new_time):
+        raise HTTPException(status_code=404, detail="Occurrence not found")
+    return {"status": "ok"}
+
+
+@app.post("/api/series/{series_id}/stop")
+def series_stop(series_id: int, payload: SeriesOccurrence, tenant_id: int = Depends(current_tenant)):
+    # Серия заканчивается перед указанной датой
+    if not stop_series(tenant_id, series_id, _parse_date(payload.date)):
+        raise HTTPException(status_code=404, detail="Series not found")
+    return {"status": "ok"}
+
+
 @app.get("/api/salary")
-def salary_total(month: str = Query(..., description="YYYY-MM")):
-    return {"month": month, "total": get_total_salary_for_month(month)}
+def salary_total(month: str = Query(..., description="YYYY-MM"), tenant_id: int = Depends(current_tenant)):
+    return {"month": month, "total": get_total_salary_for_month(tenant_id, month)}
 
 
 @app.post("/api/salary")
-def salary_add(payload: SalaryCreate):
-    add_salary_to_db(payload.amount, payload.month)
-    return {"status": "ok", "total": get_total_salary_for_month(payload.month)}
+def salary_add(payload: SalaryCreate, tenant_id: int = Depends(current_tenant)):
+    # Итог читается сразу после записи, поэтому ждем ее коммита и в режиме deferred
+    add_salary_to_db(tenant_id, payload.amount, payload.month, wait=True)
+    return {"status": "ok", "total": get_total_salary_for_month(tenant_id, payload.month)}
 
 
 @app.delete("/api/salary/last")
-def salary_remove_last(month: str = Query(..., description="YYYY-MM")):
-    remove_last_salary_from_db(month)
-    return {"status": "ok", "total": get_total_salary_for_month(month)}
+def salary_remove_last(month: str = Query(..., description="YYYY-MM"), tenant_id: int = Depends(current_tenant)):
+    remove_last_salary_from_db(tenant_id, month)
+    return {"status": "ok", "total": get_total_salary_for_month(tenant_id, month)}
 
 
 @app.get("/api/expenses")
-def expenses_total(month: str = Query(..., description="YYYY-MM")):
-    return {"month": month, "total": get_total_expenses_for_month(month)}
+def expenses_total(month: str = Query(..., description="YYYY-MM"), tenant_id: int = Depends(current_tenant)):
+    return {"month": month, "total": get_total_expenses_for_month(tenant_id, month)}
 
 
 @app.post("/api/expenses")
-def expenses_add(payload: ExpensesCreate):
-    add_expenses_to_db(payload.amount, payload.month)
-    return {"status": "ok", "total": get_total_expenses_for_month(payload.month)}
+def expenses_add(payload: ExpensesCreate, tenant_id: int = Depends(current_tenant)):
+    add_expenses_to_db(tenant_id, payload.amount, payload.month, wait=True)
+    return {"status": "ok", "total": get_total_expenses_for_month(tenant_id, payload.month)}
 
 
 @app.delete("/api/expenses/last")
-def expenses_remove_last(month: str = Query(..., description="YYYY-MM")):
-    remove_last_expenses_from_db(month)
-    return {"status": "ok", "total": get_total_expenses_for_month(month)}
+def expenses_remove_last(month: str = Query(..., description="YYYY-MM"), tenant_id: int = Depends(current_tenant)):
+    remove_last_expenses_from_db(tenant_id, month)
+    return {"status": "ok", "total": get_total_expenses_for_month(tenant_id, month)}
 
 
 @app.get("/api/visits")
-def visits_count(link: str = Query(..., min_length=1)):
-    count, display = count_visits_by_link(link)
+def visits_count(link: str = Query(..., min_length=1), tenant_id: int = Depends(current_tenant)):
+    count, display = count_visits_by_link(tenant_id, link)
     return {"link": display, "count": count}
 
 
 @app.get("/api/visits/top")
-def visits_top(limit: int = Query(10, ge=1, le=100)):
-    items = get_top_visits(limit)
+def visits_top(limit: int = Query(10, ge=1, le=100), tenant_id: int = Depends(current_tenant)):
+    items = get_top_visits(tenant_id, limit)
     return {"items": [{"link": link, "count": count} for link, count in items]}
 
 
 @app.get("/api/schedule/selected")
-def schedule_selected(year: int, month: int):
-    return {"days": sorted(get_selected_days(year, month))}
+def schedule_selected(year: int, month: int, tenant_id: int = Depends(current_tenant)):
+    return {"days": sorted(get_selected_days(tenant_id, year, month))}
 
 
 @app.post("/api/schedule/toggle")
-def schedule_toggle(payload: ScheduleToggle):
-    selected = toggle_day(payload.year, payload.month, payload.day)
-    return {"selected": selected, "days": sorted(get_selected_days(payload.year, payload.month))}
+def schedule_toggle(payload: ScheduleToggle, tenant_id: int = Depends(current_tenant)):
+    _days_in_month(payload.year, payload.month, [payload.day])
+    selected, days = toggle_day(tenant_id, payload.year, payload.month, payload.day)
+    return {"selected": selected, "days": sorted(days)}
+
+
+def _days_in_month(year: int, month: int, days=()) -> int:
+    try:
+        days_in_month = calendar.monthrange(year, month)[1]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid month")
+    if any(day < 1 or day > days_in_month for day in days):
+        raise HTTPException(status_code=400, detail="Invalid day")
+    return days_in_month
+
+
+@app.post("/api/schedule/days")
+def schedule_days(payload: ScheduleDays, tenant_id: int = Depends(current_tenant)):
+    _days_in_month(payload.year, payload.month, payload.days)
+    days = set_days_selected(tenant_id, payload.year, payload.month, payload.days, payload.selected)
+    return {"days": sorted(days)}
+
+
+@app.post("/api/schedule/clear")
+def schedule_clear(payload: ScheduleMonth, tenant_id: int = Depends(current_tenant)):
+    _days_in_month(payload.year, payload.month)
+    return {"days": sorted(clear_month(tenant_id, payload.year, payload.month))}
+
+
+@app.post("/api/schedule/weekdays")
+def schedule_weekdays(payload: ScheduleWeekdays, tenant_id: int = Depends(current_tenant)):
+    _days_in_month(payload.year, payload.month)
+    if any(weekday < 0 or weekday > 6 for weekday in payload.weekdays):
+        raise HTTPException(status_code=400, detail="Invalid weekday")
+    return {"days": sorted(select_weekdays(tenant_id, payload.year, payload.month, payload.weekdays))}
 
 
 @app.post("/api/schedule/generate")
-def schedule_generate(year: int, month: int, payload: ScheduleGenerateRequest = None):
-    selected = sorted(get_selected_days(year, month))
+def schedule_generate(
+    year: int,
+    month: int,
+    payload: ScheduleGenerateRequest = None,
+    tenant_id: int = Depends(current_tenant),
+):
+    selected = sorted(get_selected_days(tenant_id, year, month))
     if not selected:
         return {"lines": []}
     slots_override = DEFAULT_SLOTS
-    stored_slots = get_schedule_slots()
+    stored_slots = get_schedule_slots(tenant_id)
     if stored_slots:
         slots_override = {**DEFAULT_SLOTS, **stored_slots}
     if payload and payload.slots:
         normalized = _normalize_slots_payload(payload.slots)
         if normalized:
             slots_override = {**slots_override, **normalized}
-    lines = [f"Расписание за {MONTHS_RU_GEN[month - 1]}:", ""]
-    for day in selected:
-        ymd = f"{year}-{month:02d}-{day:02d}"
-        dt = datetime.strptime(ymd, "%Y-%m-%d")
-        wd = dt.weekday()
-        slots = slots_override.get(wd, [])
-        if not slots:
-            continue
-        booked = {_normalize_time_to_hhmm(row[3]) for row in get_clients_by_day(ymd)}
-        human_date = dt.strftime("%d.%m")
-        wd_short = WEEKDAYS_RU_SHORT[wd]
-        booked_norm = {_normalize_time_to_hhmm(t) for t in booked if _normalize_time_to_hhmm(t)}
-        booked_minutes = {_hhmm_to_minutes(t) for t in booked_norm if _hhmm_to_minutes(t) >= 0}
-
-        candidate_times = set(slots) | set(booked_norm)
-        candidate_sorted = sorted(candidate_times, key=lambda t: _hhmm_to_minutes(t))
-
-        slot_texts: List[str] = []
-        for hhmm in candidate_sorted:
-            disp = _format_hhmm_with_dot(hhmm)
-            tmin = _hhmm_to_minutes(hhmm)
-            if hhmm in booked_norm:
-                slot_texts.append(f"<s>{disp}</s>")
-                continue
-            too_close = any(abs(tmin - bm) <= 90 for bm in booked_minutes)
-            if not too_close:
-                slot_texts.append(disp)
-        lines.append(f"{human_date} ({wd_short}) " + " ".join(slot_texts))
-        lines.append("")
+    lines = build_schedule_lines(year, month, selected, slots_override, partial(get_clients_by_day, tenant_id))
     return {"lines": lines}
 
 
 @app.get("/api/schedule/slots")
-def schedule_slots_get():
-    stored = get_schedule_slots()
+def schedule_slots_get(tenant_id: int = Depends(current_tenant)):
+    stored = get_schedule_slots(tenant_id)
     slots = {k: ", ".join(v) for k, v in stored.items()}
     return {"slots": slots}
 
 
 @app.post("/api/schedule/slots")
-def schedule_slots_update(payload: ScheduleSlotsUpdate):
+def schedule_slots_update(payload: ScheduleSlotsUpdate, tenant_id: int = Depends(current_tenant)):
     if not payload or not payload.slots:
         raise HTTPException(status_code=400, detail="Slots required")
     normalized = _normalize_slots_payload(payload.slots)
     if not normalized:
         raise HTTPException(status_code=400, detail="Invalid slots")
-    save_schedule_slots(normalized)
+    save_schedule_slots(tenant_id, normalized)
     return {"status": "ok", "slots": {k: ", ".join(v) for k, v in normalized.items()}}
 
 
 @app.post("/api/schedule/slots/reset")
-def schedule_slots_reset():
-    clear_schedule_slots()
+def schedule_slots_reset(tenant_id: int = Depends(current_tenant)):
+    clear_schedule_slots(tenant_id)
     return {"status": "ok", "slots": {k: ", ".join(v) for k, v in DEFAULT_SLOTS.items()}}
 
 
-def _serialize_client(row):
-    return {
-        "id": row[0],
-        "name": row[1],
-        "link": row[2],
-        "time": row[3],
-        "date": row[4],
-        "prepayment": row[5] if len(row) > 5 else None,
-        "prepayment_display": _format_prepayment(row[5] if len(row) > 5 else None),
-    }
-
-
 def _normalize_slots_payload(raw_slots: dict) -> dict:
     normalized = {}
     for k, times in raw_slots.items():
@@ -409,7 +634,7 @@ def _normalize_slots_payload(raw_slots: dict) -> dict:
             parts = [str(s).strip() for s in times if str(s).strip()]
         else:
             continue
-        cleaned = [_normalize_time_to_hhmm(t) for t in parts]
+        cleaned = [normalize_time_to_hhmm(t) for t in parts]
         cleaned = [t for t in cleaned if t]
         if cleaned:
             normalized[weekday] = cleaned
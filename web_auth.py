@@ -0,0 +1,78 @@
+import hashlib
+import hmac
+import json
+import os
+import time
+from typing import Optional
+from urllib.parse import parse_qsl
+
+from fastapi import Header, HTTPException, Query
+
+from bot.config import token as bot_token
+from bot.tenants import get_tenant_id
+
+# Мини-приложение присылает Telegram.WebApp.initData в заголовке "Authorization: tma <initData>".
+# EventSource заголовки не умеет, для /api/events те же данные идут параметром init_data
+AUTH_SCHEME = "tma"
+INIT_DATA_MAX_AGE = int(os.getenv("INIT_DATA_MAX_AGE", "86400"))
+
+_secret_keys = {}
+
+
+def _secret_key(token: str) -> bytes:
+    key = _secret_keys.get(token)
+    if key is None:
+        key = hmac.new(b"WebAppData", token.encode(), hashlib.sha256).digest()
+        _secret_keys[token] = key
+    return key
+
+
+def sign_init_data(fields: dict, token: str) -> str:
+    data_check_string = "\n".join(f"{k}={v}" for k, v in sorted(fields.items()))
+    return hmac.new(_secret_key(token), data_check_string.encode(), hashlib.sha256).hexdigest()
+
+
+def verify_init_data(init_data: str, token: str, max_age: int = INIT_DATA_MAX_AGE) -> Optional[dict]:
+    # Проверка подписи по документации Telegram: HMAC-SHA256 от отсортированных полей без hash
+    if not init_data or not token:
+        return None
+    try:
+        fields = dict(parse_qsl(init_data, keep_blank_values=True, strict_parsing=True))
+    except ValueError:
+        return None
+    received = fields.pop("hash", "")
+    if not hmac.compare_digest(sign_init_data(fields, token), received):
+        return None
+    try:
+        auth_date = int(fields.get("auth_date", "0"))
+        user = json.loads(fields.get("user", ""))
+    except ValueError:
+        return None
+    if max_age and time.time() - auth_date > max_age:
+        return None
+    if not isinstance(user, dict) or "id" not in user:
+        return None
+    return user
+
+
+def _init_data_from_header(authorization: Optional[str]) -> Optional[str]:
+    if not authorization:
+        return None
+    scheme, _, value = authorization.partition(" ")
+    if scheme.lower() != AUTH_SCHEME:
+        return None
+    return value.strip()
+
+
+def current_tenant(
+    authorization: Optional[str] = Header(None),
+    init_data: Optional[str] = Query(None, include_in_schema=False),
+) -> int:
+    # Зависимость выполняется до обработчика маршрута: чужой запрос не доходит до базы
+    user = verify_init_data(_init_data_from_header(authorization) or init_data, bot_token)
+    if user is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+    tenant_id = get_tenant_id(user["id"])
+    if tenant_id is None:
+        raise HTTPException(status_code=403, detail="Forbidden")
+    return tenant_id
@@ -0,0 +1,217 @@
+import asyncio
+import json
+from typing import Optional
+
+import orjson
+from starlette.concurrency import run_in_threadpool
+
+from database.changes import SOURCES, get_changes_since, get_compacted_seq, get_last_seq
+from utils.common import format_prepayment
+
+# Журнал изменений опрашивает одна фоновая задача на процесс, подписчики получают события из очередей
+POLL_INTERVAL = 0.5
+HEARTBEAT_INTERVAL = 15
+SUBSCRIBER_QUEUE_SIZE = 1000
+SOURCE_ORDER = tuple(SOURCES)
+
+
+def format_cursor(cursor: dict) -> str:
+    return ".".join(str(cursor[source]) for source in SOURCE_ORDER)
+
+
+def parse_cursor(value: Optional[str]) -> Optional[dict]:
+    if not value:
+        return None
+    parts = value.split(".")
+    if len(parts) != len(SOURCE_ORDER):
+        return None
+    try:
+        return {source: int(part) for source, part in zip(SOURCE_ORDER, parts)}
+    except ValueError:
+        return None
+
+
+def current_cursor() -> dict:
+    return {source: get_last_seq(source) for source in SOURCE_ORDER}
+
+
+def fetch_changes(tenant_id: Optional[int], cursor: dict):
+    changes = []
+    for source in SOURCE_ORDER:
+        for row in get_changes_since(tenant_id, source, cursor[source]):
+            changes.append((source, row))
+    return changes
+
+
+def serialize_change(row) -> dict:
+    seq, entity, op, row_id, payload = row[:5]
+    data = json.loads(payload) if payload else {}
+    if entity == "client":
+        data = _serialize_client_payload(data)
+    elif entity == "series":
+        data = _serialize_series_payload(data)
+    elif entity == "series_exception":
+        data = {
+            "series_id": data.get("series_id"),
+            "date": data.get("day"),
+            "cancelled": bool(data.get("cancelled")),
+            "new_date": data.get("new_day"),
+            "new_time": data.get("new_time"),
+        }
+    return {"entity": entity, "op": op, "id": row_id, "data": data}
+
+
+def _serialize_client_payload(data: dict) -> dict:
+    result = {"id": data.get("id"), "date": data.get("day_rec")}
+    if "name" in data:
+        result.update({
+            "name": data["name"],
+            "link": data["link"],
+            "time": data["time"],
+            "prepayment": data.get("prepayment"),
+            "prepayment_display": format_prepayment(data.get("prepayment")),
+        })
+    if "old_day_rec" in data:
+        result["old_date"] = data["old_day_rec"]
+    return result
+
+
+def _serialize_series_payload(data: dict) -> dict:
+    # Те же поля, что в GET /api/series; у удаления в журнале только id
+    result = {"id": data.get("id")}
+    if "name" in data:
+        result.update({
+            "name": data["name"],
+            "link": data["link"],
+            "time": data["time"],
+            "date": data["start_date"],
+            "until": data.get("end_date"),
+            "interval_weeks": data["interval_weeks"],
+            "prepayment": data.get("prepayment"),
+        })
+    return result
+
+
+def is_compacted(cursor: dict) -> bool:
+    return any(get_compacted_seq(source) > cursor[source] for source in SOURCE_ORDER)
+
+
+def changes_ndjson(tenant_id: int, cursor: dict):
+    # Выгрузка журнала до текущего конца: граница фиксируется на старте, поэтому поток конечен
+    cursor = dict(cursor)
+    until = current_cursor()
+    for source in SOURCE_ORDER:
+        while cursor[source] < until[source]:
+            rows = [row for row in get_changes_since(tenant_id, source, cursor[source]) if row[0] <= until[source]]
+            if not rows:
+                break
+            # Страница журнала уходит одним куском: меньше сообщений ASGI и сжатий gzip
+            lines = []
+            for row in rows:
+                cursor[source] = row[0]
+                item = serialize_change(row)
+                item.update(source=source, seq=row[0], cursor=format_cursor(cursor))
+                lines.append(orjson.dumps(item))
+            yield b"\n".join(lines) + b"\n"
+
+
+class ChangeBroadcaster:
+    # Опрос общий для всех мастеров, каждый поток сам отбирает события своего мастера
+    def __init__(self):
+        self._subscribers = set()
+        self._task = None
+        self._cursor = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.add(queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            self._cursor = None
+
+    async def _run(self):
+        while self._subscribers:
+            try:
+                if self._cursor is None:
+                    self._cursor = await run_in_threadpool(current_cursor)
+                changes = await run_in_threadpool(fetch_changes, None, self._cursor)
+                for source, row in changes:
+                    self._cursor[source] = max(self._cursor[source], row[0])
+                    self._publish((source, row))
+            except Exception as e:
+                print(f"Ошибка при чтении журнала изменений: {e}")
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def _publish(self, item):
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(item)
+            except asyncio.QueueFull:
+                # Отстающий клиент получит None, закроет поток и догонит по Last-Event-ID
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+broadcaster = ChangeBroadcaster()
+
+
+def _format_event(cursor: dict, row) -> str:
+    data = json.dumps(serialize_change(row), ensure_ascii=False)
+    return f"id: {format_cursor(cursor)}\nevent: change\ndata: {data}\n\n"
+
+
+async def _catch_up(tenant_id: int, cursor: dict):
+    # Журнал читается до конца, зафиксированного на старте; более новое придет из очереди подписки.
+    # В конце курсор встает на эту границу, даже если последние записи чужие: иначе первое же
+    # событие из очереди выглядело бы разрывом и снова вызывало бы догоняющее чтение
+    until = await run_in_threadpool(current_cursor)
+    for source in SOURCE_ORDER:
+        while cursor[source] < until[source]:
+            rows = await run_in_threadpool(get_changes_since, tenant_id, source, cursor[source])
+            rows = [row for row in rows if row[0] <= until[source]]
+            if not rows:
+                break
+            for row in rows:
+                cursor[source] = row[0]
+                yield _format_event(cursor, row)
+        cursor[source] = max(cursor[source], until[source])
+
+
+async def event_stream(tenant_id: int, last_event_id: Optional[str] = None):
+    queue = broadcaster.subscribe()
+    try:
+        cursor = parse_cursor(last_event_id) or await run_in_threadpool(current_cursor)
+        yield f"retry: 3000\nid: {format_cursor(cursor)}\n\n"
+        # Пропущенное за время переподключения, дальше дубли из очереди отсекаются по seq
+        async for event in _catch_up(tenant_id, cursor):
+            yield event
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_INTERVAL)
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+            if item is None:
+                break
+            source, row = item
+            if row[0] > cursor[source] + 1:
+                # Разрыв между догоняющим чтением и очередью закрываем чтением из базы
+                async for event in _catch_up(tenant_id, cursor):
+                    yield event
+            if row[0] <= cursor[source]:
+                continue
+            cursor[source] = row[0]
+            # Чужие события только сдвигают курсор, чтобы не принимать их за разрыв
+            if row[5] == tenant_id:
+                yield _format_event(cursor, row)
+    finally:
+        broadcaster.unsubscribe(queue)
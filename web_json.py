@@ -0,0 +1,43 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+from utils.common import format_prepayment
+
+# Сжимаем ответы от 1 КБ; уровень 5 почти не уступает 9 по размеру JSON, но в разы быстрее
+GZIP_MINIMUM_SIZE = 1024
+GZIP_COMPRESS_LEVEL = 5
+
+
+class ORJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _serialize_client(client_id, name, link, time, day_rec, prepayment) -> dict:
+    client = {
+        "id": client_id,
+        "name": name,
+        "link": link,
+        "time": time,
+        "date": day_rec,
+        "prepayment": prepayment,
+        "prepayment_display": format_prepayment(prepayment),
+    }
+    if client_id < 0:
+        # Вхождение серии (id = -series_id): своей строки в clients нет, поэтому id пустой,
+        # а ключ — серия и дата, у вхождений одной серии в ответе он не повторяется
+        series_id = -client_id
+        client["id"] = None
+        client["series_id"] = series_id
+        client["occurrence"] = f"{series_id}:{day_rec}"
+    return client
+
+
+def serialize_clients(rows) -> list:
+    # Строки из SQLite сразу в словари, без моделей и jsonable_encoder на каждую запись
+    return [_serialize_client(*row) for row in rows]
+
+
+def clients_response(rows) -> ORJSONResponse:
+    # Готовый Response FastAPI отдает как есть, минуя валидацию и кодирование ответа
+    return ORJSONResponse(serialize_clients(rows))
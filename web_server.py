@@ -0,0 +1,23 @@
+import argparse
+
+import uvicorn
+
+from bot.config import web_host, web_port, web_workers
+from database.migrations import run_migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Запуск веб-API в нескольких процессах uvicorn')
+    parser.add_argument('--host', default=web_host)
+    parser.add_argument('--port', type=int, default=web_port)
+    parser.add_argument('--workers', type=int, default=web_workers)
+    args = parser.parse_args()
+
+    # Миграции и включение WAL — один раз до запуска процессов. Процессы при старте
+    # тоже вызывают run_migrations(), но находят схему актуальной и ничего не пишут
+    run_migrations()
+    uvicorn.run('web_app:app', host=args.host, port=args.port, workers=args.workers)
+
+
+if __name__ == '__main__':
+    main()